@@ -0,0 +1,7 @@
+# File: campuscore.py
+# Headless entry point: python campuscore.py --help
+import sys
+from core.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
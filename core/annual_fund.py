@@ -0,0 +1,178 @@
+# SMS/core/annual_fund.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from core.db_init import connect_db
+
+# billing_period.kind for the annual fund run (month is always 0)
+ANNUAL_FUND_KIND = "annual_fund"
+# The academic year runs April -> March and is named by its starting year.
+ACADEMIC_YEAR_START_MONTH = 4
+DEFAULT_CHUNK_SIZE = 500
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AnnualFund")
+
+def current_academic_year(today=None):
+    """Returns the starting calendar year of the academic year containing today."""
+    today = today or datetime.now()
+    return today.year if today.month >= ACADEMIC_YEAR_START_MONTH else today.year - 1
+
+def annual_fund_due_type(academic_year):
+    """e.g. "Annual Fund - 2025-26"."""
+    return f"Annual Fund - {academic_year}-{(academic_year + 1) % 100:02d}"
+
+def _get_or_create_period(cursor, academic_year):
+    cursor.execute("""
+        INSERT OR IGNORE INTO billing_period (kind, year, month)
+        VALUES (?, ?, 0)
+    """, (ANNUAL_FUND_KIND, academic_year))
+    cursor.execute("""
+        SELECT id, generated_at FROM billing_period
+        WHERE kind = ? AND year = ? AND month = 0
+    """, (ANNUAL_FUND_KIND, academic_year))
+    return cursor.fetchone()
+
+# Months of the academic year already over when the student was admitted
+# (0 = admitted before or in the first month, 12+ = after the year ended).
+# Parameters: academic_year, start month.
+MONTHS_MISSED_SQL = """
+    MAX(0, (CAST(substr(s.date_of_admission, 1, 4) AS INTEGER) - ?) * 12
+         + CAST(substr(s.date_of_admission, 6, 2) AS INTEGER) - ?)
+"""
+
+def _bill_chunk(cursor, billing_period_id, due_type, due_date, academic_year, after_student_id, chunk_size):
+    """
+    Bills one keyset chunk of students (id > after_student_id) with one
+    INSERT ... SELECT. Students who already have this year's due are skipped.
+    Returns (last_student_id_in_chunk or None, inserted, prorated, amount).
+    """
+    cursor.execute("""
+        SELECT MAX(id) FROM (
+            SELECT id FROM student WHERE id > ? ORDER BY id LIMIT ?
+        )
+    """, (after_student_id, chunk_size))
+    last_id = cursor.fetchone()[0]
+    if last_id is None:
+        return None, 0, 0, 0.0
+
+    chunk_filter = f"""
+        FROM student s
+        WHERE s.id > ? AND s.id <= ?
+          AND s.annual_fund > 0
+          AND COALESCE({MONTHS_MISSED_SQL}, 0) < 12
+          AND NOT EXISTS (
+              SELECT 1 FROM pending_due pd
+              WHERE pd.student_id = s.id AND pd.due_type = ?
+          )
+    """
+    filter_params = (after_student_id, last_id, academic_year, ACADEMIC_YEAR_START_MONTH, due_type)
+
+    cursor.execute(f"""
+        SELECT COUNT(*), COALESCE(SUM(COALESCE({MONTHS_MISSED_SQL}, 0) > 0), 0)
+        {chunk_filter}
+    """, (academic_year, ACADEMIC_YEAR_START_MONTH) + filter_params)
+    _, prorated = cursor.fetchone()
+
+    cursor.execute(f"""
+        INSERT INTO pending_due (student_id, due_type, amount_due, due_date, status, billing_period_id)
+        SELECT s.id, ?,
+               ROUND(s.annual_fund * (12 - COALESCE({MONTHS_MISSED_SQL}, 0)) / 12.0, 2),
+               ?, 'unpaid', ?
+        {chunk_filter}
+    """, (due_type, academic_year, ACADEMIC_YEAR_START_MONTH, due_date, billing_period_id) + filter_params)
+    inserted = cursor.rowcount
+
+    cursor.execute("""
+        SELECT COALESCE(SUM(amount_due), 0) FROM pending_due
+        WHERE billing_period_id = ? AND student_id > ? AND student_id <= ?
+    """, (billing_period_id, after_student_id, last_id))
+    amount = cursor.fetchone()[0]
+    return last_id, inserted, prorated, amount
+
+def run_annual_fund_billing(academic_year=None, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None):
+    """
+    Bills every student's annual_fund once for an academic year.
+
+    Students are processed in chunks of chunk_size, each in its own short
+    transaction, so front-desk writes are never blocked for long and an
+    interrupted run simply continues where it stopped. Students admitted
+    after the year started are charged only for the remaining months.
+
+    progress_callback(students_scanned, dues_inserted) is called after each chunk.
+    Returns (True, stats) or (False, error_message). If the year was already
+    billed, stats['already_billed'] is True and nothing is written.
+    """
+    academic_year = academic_year or current_academic_year()
+    due_type = annual_fund_due_type(academic_year)
+    due_date = f"{academic_year}-{ACADEMIC_YEAR_START_MONTH:02d}-10"
+    stats = {
+        "academic_year": academic_year,
+        "already_billed": False,
+        "students_scanned": 0,
+        "inserted": 0,
+        "prorated": 0,
+        "total_amount": 0.0,
+        "chunks": 0,
+        "seconds": 0.0,
+        "rows_per_second": 0.0,
+    }
+
+    conn = connect_db()
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    try:
+        billing_period_id, generated_at = _get_or_create_period(cursor, academic_year)
+        conn.commit()
+        if generated_at:
+            stats["already_billed"] = True
+            return True, stats
+
+        last_id = 0
+        while True:
+            cursor.execute("BEGIN IMMEDIATE")
+            chunk_last_id, inserted, prorated, amount = _bill_chunk(
+                cursor, billing_period_id, due_type, due_date, academic_year, last_id, chunk_size
+            )
+            conn.commit()
+            if chunk_last_id is None:
+                break
+            cursor.execute("SELECT COUNT(*) FROM student WHERE id > ? AND id <= ?", (last_id, chunk_last_id))
+            stats["students_scanned"] += cursor.fetchone()[0]
+            stats["inserted"] += inserted
+            stats["prorated"] += prorated
+            stats["total_amount"] += amount
+            stats["chunks"] += 1
+            last_id = chunk_last_id
+            if progress_callback:
+                progress_callback(stats["students_scanned"], stats["inserted"])
+
+        stats["seconds"] = time.perf_counter() - start
+        stats["rows_per_second"] = stats["inserted"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+
+        # Close the period: counts cover dues from any earlier, interrupted run too.
+        cursor.execute("""
+            UPDATE billing_period
+            SET generated_at = ?,
+                due_count = (SELECT COUNT(*) FROM pending_due WHERE billing_period_id = ?),
+                total_amount = (SELECT COALESCE(SUM(amount_due), 0) FROM pending_due WHERE billing_period_id = ?),
+                duration_seconds = ?
+            WHERE id = ?
+        """, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), billing_period_id, billing_period_id,
+              stats["seconds"], billing_period_id))
+        conn.commit()
+        return True, stats
+
+    except Exception as e:
+        print(f"[ERROR] run_annual_fund_billing: {e}")
+        conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
+
+def start_annual_fund_billing(academic_year=None, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None):
+    """
+    Runs run_annual_fund_billing on the background worker.
+    Returns a Future resolving to its (success, stats_or_error) result.
+    Runs are queued on one worker, so two can never overlap in this process.
+    """
+    return _executor.submit(run_annual_fund_billing, academic_year, chunk_size, progress_callback)
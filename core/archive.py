@@ -0,0 +1,210 @@
+# SMS/core/archive.py
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from core import db_init
+from core.db_init import connect_db
+
+# Fully paid dues whose due date and last payment are older than this are archived.
+ARCHIVE_AFTER_DAYS = 365
+DEFAULT_CHUNK_SIZE = 500
+
+# Keeps shared-cache in-memory archives alive between connections (see configure_db).
+_memory_archive_anchors = {}
+
+def archive_db_path():
+    """The archive file sits next to the live one: data/campuscore-archive.db."""
+    path = db_init.DB_PATH
+    if path.startswith("file:"):
+        name, _, query = path.partition("?")
+        return f"{name}-archive?{query}"
+    root, ext = os.path.splitext(path)
+    return f"{root}-archive{ext or '.db'}"
+
+# Created by initialize_archive(), which db_init.initialize_db() runs once at start-up
+ARCHIVE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS archive.pending_due (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL,
+        due_type TEXT NOT NULL,
+        amount_due DOUBLE NOT NULL,
+        due_date DATE NOT NULL,
+        status TEXT,
+        billing_period_id INTEGER,
+        archived_at DATETIME NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.payment_record (
+        id INTEGER PRIMARY KEY,
+        pending_due_id INTEGER NOT NULL,
+        amount_paid DOUBLE NOT NULL,
+        payment_timestamp DATETIME NOT NULL,
+        payment_mode TEXT,
+        received_by_user TEXT NOT NULL
+    )
+    """,
+    # Migration: (student_id, due_date) also serves the newest-first history pages
+    "DROP INDEX IF EXISTS archive.idx_archived_due_student",
+    "CREATE INDEX IF NOT EXISTS archive.idx_archived_due_student_date ON pending_due(student_id, due_date)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_archived_payment_due ON payment_record(pending_due_id)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_archived_payment_timestamp ON payment_record(payment_timestamp)",
+]
+
+# TEMP views over both tiers, created once per connection by attach_archive()
+HISTORY_VIEWS = [
+    """
+    CREATE TEMP VIEW IF NOT EXISTS payment_history AS
+        SELECT id, pending_due_id, amount_paid, payment_timestamp, payment_mode, received_by_user
+        FROM main.payment_record
+        UNION ALL
+        SELECT id, pending_due_id, amount_paid, payment_timestamp, payment_mode, received_by_user
+        FROM archive.payment_record
+    """,
+    # Dues are archived together with their payments, so each tier is
+    # aggregated on its own (keeps the student_id filter on the indexes).
+    """
+    CREATE TEMP VIEW IF NOT EXISTS due_history AS
+        SELECT pd.id as pending_due_id, pd.student_id, pd.due_type, pd.amount_due, pd.due_date, pd.status,
+               COALESCE(SUM(pr.amount_paid), 0) as total_paid,
+               (pd.amount_due - COALESCE(SUM(pr.amount_paid), 0)) as amount_remaining
+        FROM main.pending_due pd
+        LEFT JOIN main.payment_record pr ON pd.id = pr.pending_due_id
+        GROUP BY pd.id, pd.student_id
+        UNION ALL
+        SELECT pd.id, pd.student_id, pd.due_type, pd.amount_due, pd.due_date, pd.status,
+               COALESCE(SUM(pr.amount_paid), 0),
+               (pd.amount_due - COALESCE(SUM(pr.amount_paid), 0))
+        FROM archive.pending_due pd
+        LEFT JOIN archive.payment_record pr ON pd.id = pr.pending_due_id
+        GROUP BY pd.id, pd.student_id
+    """,
+]
+
+def _attach(conn):
+    path = archive_db_path()
+    if path.startswith("file:") and path not in _memory_archive_anchors:
+        _memory_archive_anchors[path] = sqlite3.connect(path, uri=True)
+    # Pooled connections come back with the archive still attached
+    if not any(row[1] == "archive" for row in conn.execute("PRAGMA database_list")):
+        conn.execute("ATTACH DATABASE ? AS archive", (path,))
+
+def initialize_archive(conn):
+    """
+    Creates (and migrates) the archive database's tables and indexes through
+    conn, which must not be inside a transaction. Run by initialize_db().
+    """
+    _attach(conn)
+    for statement in ARCHIVE_SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+def attach_archive(conn):
+    """
+    Attaches the archive database as `archive` and defines the TEMP views
+    that union the live and archived rows:
+      payment_history - every payment_record row
+      due_history     - every due with total_paid / amount_remaining
+    A pooled connection keeps both, so this is done once per connection.
+    """
+    if getattr(conn, "history_ready", False):
+        return conn
+    _attach(conn)
+    for statement in HISTORY_VIEWS:
+        conn.execute(statement)
+    if isinstance(conn, db_init.PooledConnection):
+        conn.history_ready = True
+    return conn
+
+def connect_history_db():
+    """connect_db() with the archive attached, for queries over full history."""
+    return attach_archive(connect_db())
+
+def _archive_chunk(cursor, after_id, cutoff, chunk_size, archived_at):
+    """Moves one keyset chunk of eligible dues (and their payments). Returns (last_id, moved)."""
+    cursor.execute("""
+        SELECT pd.id FROM main.pending_due pd
+        WHERE pd.id > ? AND pd.status = 'paid' AND pd.due_date < ?
+          AND NOT EXISTS (
+              SELECT 1 FROM main.payment_record pr
+              WHERE pr.pending_due_id = pd.id AND pr.payment_timestamp >= ?
+          )
+        ORDER BY pd.id
+        LIMIT ?
+    """, (after_id, cutoff, cutoff, chunk_size))
+    ids = [row[0] for row in cursor.fetchall()]
+    if not ids:
+        return None, 0
+
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM archive_batch")
+    cursor.executemany("INSERT INTO archive_batch (id) VALUES (?)", [(i,) for i in ids])
+    # OR IGNORE: a chunk that was copied but not deleted before a crash is simply finished
+    cursor.execute("""
+        INSERT OR IGNORE INTO archive.pending_due
+            (id, student_id, due_type, amount_due, due_date, status, billing_period_id, archived_at)
+        SELECT id, student_id, due_type, amount_due, due_date, status, billing_period_id, ?
+        FROM main.pending_due WHERE id IN (SELECT id FROM archive_batch)
+    """, (archived_at,))
+    cursor.execute("""
+        INSERT OR IGNORE INTO archive.payment_record
+            (id, pending_due_id, amount_paid, payment_timestamp, payment_mode, received_by_user)
+        SELECT id, pending_due_id, amount_paid, payment_timestamp, payment_mode, received_by_user
+        FROM main.payment_record WHERE pending_due_id IN (SELECT id FROM archive_batch)
+    """)
+    cursor.execute("DELETE FROM main.payment_record WHERE pending_due_id IN (SELECT id FROM archive_batch)")
+    cursor.execute("DELETE FROM main.pending_due WHERE id IN (SELECT id FROM archive_batch)")
+    return ids[-1], len(ids)
+
+def archive_paid_dues(older_than_days=ARCHIVE_AFTER_DAYS, chunk_size=DEFAULT_CHUNK_SIZE,
+                      progress_callback=None, today=None):
+    """
+    Moves fully paid dues whose due date and last payment are older than
+    `older_than_days` (with their payments) from the live tables into the
+    archive database. Each chunk is one transaction spanning both files.
+    progress_callback(moved_so_far) is called after every chunk.
+    Returns (True, stats) or (False, error_message).
+    """
+    today = today or datetime.now()
+    cutoff = (today - timedelta(days=older_than_days)).strftime("%Y-%m-%d")
+    archived_at = today.strftime("%Y-%m-%d %H:%M:%S")
+    stats = {"cutoff": cutoff, "archived_dues": 0, "chunks": 0}
+
+    start = time.perf_counter()
+    conn = connect_history_db()
+    cursor = conn.cursor()
+    try:
+        after_id = 0
+        while True:
+            cursor.execute("BEGIN IMMEDIATE")
+            last_id, moved = _archive_chunk(cursor, after_id, cutoff, chunk_size, archived_at)
+            conn.commit()
+            if last_id is None:
+                break
+            after_id = last_id
+            stats["archived_dues"] += moved
+            stats["chunks"] += 1
+            if progress_callback:
+                progress_callback(stats["archived_dues"])
+        stats["seconds"] = time.perf_counter() - start
+        return True, stats
+    except Exception as e:
+        print(f"[ERROR] archive_paid_dues: {e}")
+        if conn.in_transaction:
+            conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
+
+def get_tier_sizes():
+    """Row counts of the live and archived due/payment tables."""
+    conn = connect_history_db()
+    try:
+        return {
+            f"{schema}.{table}": conn.execute(f"SELECT COUNT(*) FROM {schema}.{table}").fetchone()[0]
+            for schema in ("main", "archive") for table in ("pending_due", "payment_record")
+        }
+    finally:
+        conn.close()
@@ -0,0 +1,272 @@
+# SMS/core/backup.py
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+from core import db_init
+from core.archive import archive_db_path
+from core.db_init import connect_db
+from core.search_cache import invalidate_search_cache
+
+# Snapshots kept by rotate_backups(); the oldest are deleted first.
+DEFAULT_KEEP = 14
+# Pages copied per backup step. The source is only read-locked during a
+# step, so front-desk writes are delayed by at most one step.
+BACKUP_PAGES_PER_STEP = 256
+# Pause between steps so queued writers get the database.
+BACKUP_STEP_PAUSE = 0.002
+# A write from another connection restarts an online backup. After this many
+# restarts the rest is copied in one step instead of chasing the writers.
+MAX_BACKUP_RESTARTS = 5
+
+SNAPSHOT_PREFIX = "campuscore-"
+SNAPSHOT_PATTERN = re.compile(r"^campuscore-(\d{8}-\d{6})(?:-(\w+))?\.db$")
+# The archive database's half of a snapshot: campuscore-<stamp>.archive.db
+ARCHIVE_SUFFIX = ".archive.db"
+
+class _TooManyRestarts(Exception):
+    pass
+
+def default_backup_dir():
+    """backups/ next to the database file (or ./backups for in-memory databases)."""
+    directory = os.path.dirname(db_init.DB_PATH) if not db_init.DB_PATH.startswith("file:") else ""
+    return os.path.join(directory or ".", "backups")
+
+def snapshot_archive_path(path):
+    """Where the archive database of the snapshot at path is (or would be) stored."""
+    return os.path.splitext(path)[0] + ARCHIVE_SUFFIX
+
+def _connect_archive():
+    path = archive_db_path()
+    return sqlite3.connect(path, uri=path.startswith("file:"))
+
+def verify_snapshot(path):
+    """Runs PRAGMA integrity_check on a snapshot. Returns (ok, message)."""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return False, str(e)
+    if rows == ["ok"]:
+        return True, "ok"
+    return False, "; ".join(rows[:5])
+
+def _online_backup(target_path, progress_callback=None):
+    """Copies the live database page-step by page-step. Returns the number of restarts."""
+    restarts = 0
+    last_remaining = None
+
+    def on_step(status, remaining, total):
+        nonlocal restarts, last_remaining
+        # A restarted step copies the first pages again, so remaining does not shrink
+        if last_remaining is not None and remaining >= last_remaining:
+            restarts += 1
+            if restarts > MAX_BACKUP_RESTARTS:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+        if progress_callback:
+            progress_callback(total - remaining, total)
+        time.sleep(BACKUP_STEP_PAUSE)
+
+    source = connect_db()
+    try:
+        target = sqlite3.connect(target_path)
+        try:
+            # sleep: retry a step that found the database locked after the
+            # pause, not sqlite3's default 250 ms (writers commit in ~1 ms)
+            try:
+                source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=on_step, sleep=BACKUP_STEP_PAUSE)
+            except _TooManyRestarts:
+                source.backup(target, sleep=BACKUP_STEP_PAUSE)
+        finally:
+            target.close()
+    finally:
+        source.close()
+    return restarts
+
+def _archive_backup(target_path, method):
+    """
+    Copies the archive database in one step: it is written only by
+    archive_paid_dues(), a chunk at a time, so this is short.
+    """
+    source = _connect_archive()
+    try:
+        if method == "vacuum":
+            source.execute("VACUUM INTO ?", (target_path,))
+            return
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target, sleep=BACKUP_STEP_PAUSE)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+def _reconcile_pair(path, archive_path):
+    """
+    Drops the archived rows that are still live in the snapshot: dues that
+    archive_paid_dues() moved between the two copies. Returns the number of dues.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        conn.execute("""
+            DELETE FROM archive.payment_record
+            WHERE pending_due_id IN (SELECT id FROM main.pending_due)
+        """)
+        moved = conn.execute("""
+            DELETE FROM archive.pending_due WHERE id IN (SELECT id FROM main.pending_due)
+        """).rowcount
+        conn.commit()
+        return moved
+    finally:
+        conn.close()
+
+def _vacuum_backup(target_path):
+    """Writes a compacted copy with VACUUM INTO (one read transaction)."""
+    source = connect_db()
+    try:
+        source.execute("VACUUM INTO ?", (target_path,))
+    finally:
+        source.close()
+
+def create_backup(backup_dir=None, method="backup", keep=DEFAULT_KEEP, progress_callback=None):
+    """
+    Writes a verified snapshot of the live database and its archive
+    database (see snapshot_archive_path), then rotates old ones.
+      method: "backup" - online, page-stepped (never blocks writers for long)
+              "vacuum" - VACUUM INTO, smaller file, one longer read
+      progress_callback(done_pages, total_pages): "backup" method only
+    Both files are written under temporary names and only renamed into
+    place once PRAGMA integrity_check passes on each. The archive is copied
+    after the live database, so a due archived in between is in both
+    copies; it is dropped from the archive copy.
+    Returns (True, stats) or (False, error_message).
+    """
+    if method not in ("backup", "vacuum"):
+        return False, f"Unknown backup method: {method}"
+    backup_dir = backup_dir or default_backup_dir()
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    suffix = "" if method == "backup" else f"-{method}"
+    final_path = os.path.join(backup_dir, f"{SNAPSHOT_PREFIX}{stamp}{suffix}.db")
+    partial_path = final_path + ".partial"
+    archive_path = snapshot_archive_path(final_path)
+    archive_partial_path = archive_path + ".partial"
+    stats = {"path": final_path, "archive_path": archive_path, "method": method, "restarts": 0}
+
+    try:
+        os.makedirs(backup_dir, exist_ok=True)
+        _remove_partials(partial_path, archive_partial_path)
+
+        start = time.perf_counter()
+        if method == "backup":
+            stats["restarts"] = _online_backup(partial_path, progress_callback)
+        else:
+            _vacuum_backup(partial_path)
+        _archive_backup(archive_partial_path, method)
+        stats["copy_seconds"] = time.perf_counter() - start
+        stats["reconciled_dues"] = _reconcile_pair(partial_path, archive_partial_path)
+
+        start = time.perf_counter()
+        for path in (partial_path, archive_partial_path):
+            ok, message = verify_snapshot(path)
+            if not ok:
+                _remove_partials(partial_path, archive_partial_path)
+                return False, f"Snapshot failed integrity check: {message}"
+        stats["verify_seconds"] = time.perf_counter() - start
+
+        # The archive goes first: a snapshot is only listed once its .db is in place
+        os.replace(archive_partial_path, archive_path)
+        os.replace(partial_path, final_path)
+        stats["size_bytes"] = os.path.getsize(final_path)
+        stats["archive_size_bytes"] = os.path.getsize(archive_path)
+        stats["removed"] = rotate_backups(backup_dir, keep)
+        return True, stats
+    except Exception as e:
+        print(f"[ERROR] create_backup: {e}")
+        _remove_partials(partial_path, archive_partial_path)
+        return False, str(e)
+
+def _remove_partials(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def list_backups(backup_dir=None):
+    """
+    Returns the snapshots in backup_dir, newest first, as dicts (path,
+    archive_path, created_at, method, size_bytes). archive_path is None for
+    a snapshot taken without its archive database.
+    """
+    backup_dir = backup_dir or default_backup_dir()
+    if not os.path.isdir(backup_dir):
+        return []
+    backups = []
+    for name in os.listdir(backup_dir):
+        match = SNAPSHOT_PATTERN.match(name)
+        if not match:
+            continue
+        path = os.path.join(backup_dir, name)
+        archive_path = snapshot_archive_path(path)
+        backups.append({
+            "path": path,
+            "archive_path": archive_path if os.path.exists(archive_path) else None,
+            "created_at": datetime.strptime(match.group(1), "%Y%m%d-%H%M%S"),
+            "method": match.group(2) or "backup",
+            "size_bytes": os.path.getsize(path),
+        })
+    backups.sort(key=lambda b: (b["created_at"], b["path"]), reverse=True)
+    return backups
+
+def rotate_backups(backup_dir=None, keep=DEFAULT_KEEP):
+    """Deletes all but the newest `keep` snapshots, with their archives. Returns the deleted paths."""
+    removed = []
+    for backup in list_backups(backup_dir)[keep:]:
+        os.remove(backup["path"])
+        removed.append(backup["path"])
+        if backup["archive_path"]:
+            os.remove(backup["archive_path"])
+            removed.append(backup["archive_path"])
+    return removed
+
+def restore_backup(snapshot_path):
+    """
+    Copies a verified snapshot over the live database, and its archive over
+    the archive database, with the backup API. Each file is copied in one
+    step, so other connections see either the old or the new data. A
+    snapshot taken without its archive leaves the archive database as it is.
+    Returns (True, "SUCCESS") or (False, error_message).
+    """
+    archive_path = snapshot_archive_path(snapshot_path)
+    has_archive = os.path.exists(archive_path)
+    for path in (snapshot_path, archive_path) if has_archive else (snapshot_path,):
+        ok, message = verify_snapshot(path)
+        if not ok:
+            return False, f"Snapshot failed integrity check: {message}"
+    if not has_archive:
+        print(f"[WARNING] restore_backup: {snapshot_path} has no archive snapshot; the archive is left as it is.")
+    try:
+        source = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+        target = connect_db()
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        if has_archive:
+            source = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+            target = _connect_archive()
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+        invalidate_search_cache()  # The snapshot's change counter may match the old one
+        return True, "SUCCESS"
+    except Exception as e:
+        print(f"[ERROR] restore_backup: {e}")
+        return False, str(e)
@@ -0,0 +1,178 @@
+# SMS/core/checkout.py
+"""
+Cashier fast checkout: scan or type a student ID / family SSN, pay the
+due, print the receipt, next.
+
+resolve_checkout_code() turns what the scanner typed into students with
+one primary-key (student ID) or UNIQUE-index (family SSN) lookup, and
+get_checkout() returns them with their unpaid dues in one round trip.
+Student cards may carry an "S" prefix ("S1042") and family cards an "F"
+prefix ("F10007"); bare digits follow search_students(): five digits are
+a family SSN, anything else a student ID.
+
+CheckoutTimer measures each transaction end to end (from the first key
+of the scan to the receipt handed to the print queue) and records it in
+checkout_run on a background thread, so the cashier never waits for it;
+get_checkout_stats() summarizes those rows.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from core import queries
+from core.db_init import connect_db
+from core.records import StudentSummary, DueSummary
+# For the students.search_* and dues.unpaid_for_student statements they register
+from core import student_operations, due_operations  # noqa: F401
+
+STUDENT_PREFIX = "S"
+FAMILY_PREFIX = "F"
+FAMILY_SSN_LENGTH = 5
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CheckoutRun")
+
+def parse_checkout_code(code):
+    """
+    Returns ("by_id", student_id), ("by_family_ssn", ssn) or (None, None)
+    when code is not a student ID or family SSN.
+    """
+    code = "".join((code or "").split()).upper()
+    prefix = code[:1] if code[:1] in (STUDENT_PREFIX, FAMILY_PREFIX) else ""
+    digits = code[len(prefix):]
+    if not digits.isdigit():
+        return None, None
+    if prefix == FAMILY_PREFIX or (not prefix and len(digits) == FAMILY_SSN_LENGTH):
+        return "by_family_ssn", digits
+    return "by_id", int(digits)
+
+def resolve_checkout_code(cursor, code):
+    """The StudentSummary rows code stands for (siblings for a family SSN), using the caller's cursor."""
+    shape, value = parse_checkout_code(code)
+    if shape is None:
+        return []
+    return queries.fetch_all(cursor, f"students.search_{shape}", (value,), StudentSummary)
+
+def get_checkout(code):
+    """
+    Returns [(StudentSummary, [DueSummary])] for a scanned code, each
+    student's unpaid dues oldest first; [] if the code matches nobody.
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        return [
+            (student, queries.fetch_all(cursor, "dues.unpaid_for_student", (student.student_id,), DueSummary))
+            for student in resolve_checkout_code(cursor, code)
+        ]
+    except Exception as e:
+        print(f"[ERROR] get_checkout: {e}")
+        return []
+    finally:
+        conn.close()
+
+queries.register("checkout.record", """
+    INSERT INTO checkout_run (started_at, received_by_user, student_id, payment_record_id,
+                              lookup_seconds, payment_seconds, print_seconds, total_seconds, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+""")
+
+class CheckoutTimer:
+    """
+    Times one checkout. start() at the first key of the scan; mark("lookup"),
+    mark("payment") and mark("print") as each step ends (the time since the
+    previous mark is that step's); finish() records the transaction.
+    """
+    PHASES = ("lookup", "payment", "print")
+
+    def __init__(self):
+        self.started_at = None
+        self._start = None
+        self._last = None
+        self.seconds = {}
+
+    @property
+    def running(self):
+        return self._start is not None
+
+    def start(self):
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._start = self._last = time.perf_counter()
+        self.seconds = {}
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def elapsed(self):
+        return time.perf_counter() - self._start if self.running else 0.0
+
+    def finish(self, received_by_user, student_id, payment_record_id, status="paid"):
+        """
+        Stops the timer and hands the transaction's checkout_run row to the
+        background writer (nobody waits for it). Returns the total seconds.
+        """
+        total = self.elapsed()
+        _executor.submit(record_checkout_run, self.started_at, received_by_user, student_id, payment_record_id,
+                         *(self.seconds.get(phase) for phase in self.PHASES), total, status)
+        self._start = self._last = None
+        return total
+
+def insert_checkout_run(cursor, started_at, received_by_user, student_id, payment_record_id,
+                        lookup_seconds, payment_seconds, print_seconds, total_seconds, status):
+    """Adds one checkout_run row using the caller's cursor. Does not commit."""
+    queries.execute(cursor, "checkout.record", (
+        started_at, received_by_user, student_id, payment_record_id,
+        lookup_seconds, payment_seconds, print_seconds, total_seconds, status
+    ))
+
+def record_checkout_run(*row):
+    """Adds one checkout_run row (insert_checkout_run's arguments) in its own transaction."""
+    conn = connect_db()
+    try:
+        insert_checkout_run(conn.cursor(), *row)
+        conn.commit()
+    except Exception as e:
+        print(f"[ERROR] record_checkout_run: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+def flush_checkout_runs():
+    """Waits until every checkout_run row handed over by finish() is written."""
+    _executor.submit(lambda: None).result()
+
+queries.register("checkout.since", """
+    SELECT total_seconds, lookup_seconds, payment_seconds, print_seconds
+    FROM checkout_run
+    WHERE started_at >= ?
+    ORDER BY total_seconds
+""")
+
+def _percentile(sorted_values, share):
+    return sorted_values[min(len(sorted_values) - 1, int(share * len(sorted_values)))]
+
+def get_checkout_stats(days=7):
+    """
+    Seconds per checkout over the last days: transactions, median, p90 and
+    max end to end, and the average of each timed step (lookup, payment,
+    print). Returns None on error.
+    """
+    since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        rows = queries.fetch_all(cursor, "checkout.since", (since,))
+    except Exception as e:
+        print(f"[ERROR] get_checkout_stats: {e}")
+        return None
+    finally:
+        conn.close()
+    stats = {"transactions": len(rows), "median_seconds": 0.0, "p90_seconds": 0.0, "max_seconds": 0.0}
+    totals = [row[0] for row in rows]
+    if totals:
+        stats.update(median_seconds=_percentile(totals, 0.5), p90_seconds=_percentile(totals, 0.9),
+                     max_seconds=totals[-1])
+    for i, phase in enumerate(CheckoutTimer.PHASES, start=1):
+        values = [row[i] for row in rows if row[i] is not None]
+        stats[f"avg_{phase}_seconds"] = sum(values) / len(values) if values else 0.0
+    return stats
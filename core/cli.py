@@ -0,0 +1,494 @@
+# SMS/core/cli.py
+"""
+campuscore: command-line access to the core layer for batch work.
+
+Never imports Qt, and imports each core module only inside the command
+that needs it, so `campuscore --help` and simple commands start fast.
+"""
+import argparse
+import os
+import sys
+
+def _print_stats(stats):
+    for key, value in stats.items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+
+# --- fees ---
+
+def cmd_fees_monthly(args):
+    from core.due_operations import post_monthly_fees
+    success, result = post_monthly_fees(args.year, args.month)
+    if not success:
+        print(f"[ERROR] {result}")
+        return 1
+    if result["already_billed"]:
+        print(f"'{result['due_type']}' has already been billed. No action taken.")
+    else:
+        print(f"Billed '{result['due_type']}':")
+        _print_stats(result)
+    return 0
+
+def cmd_fees_annual(args):
+    from core.annual_fund import run_annual_fund_billing
+    success, result = run_annual_fund_billing(args.year, chunk_size=args.chunk_size)
+    if not success:
+        print(f"[ERROR] {result}")
+        return 1
+    if result["already_billed"]:
+        print(f"Annual fund for {result['academic_year']} has already been billed. No action taken.")
+    else:
+        _print_stats(result)
+    return 0
+
+def cmd_fees_bulk(args):
+    from core.due_operations import preview_bulk_due, assign_bulk_due
+    if args.all:
+        target = ("all", None)
+    elif args.student_class:
+        target = ("class", args.student_class)
+    elif args.families:
+        target = ("families", args.families.replace(",", " ").split())
+    else:
+        target = ("filter", args.filter)
+
+    success, targeted, already_charged = preview_bulk_due(*target, args.type, args.date)
+    if not success:
+        print(f"[ERROR] {targeted}")
+        return 1
+    print(f"{targeted} student(s) matched, {already_charged} already have '{args.type}' due {args.date}.")
+    if args.preview:
+        return 0
+
+    result = assign_bulk_due(*target, args.type, args.amount, args.date)
+    if not result[0]:
+        print(f"[ERROR] {result[1]}")
+        return 1
+    _print_stats(result[1])
+    return 0
+
+# --- import / export ---
+
+def cmd_import_students(args):
+    import csv
+    from core.student_operations import enroll_student
+    from core.utils import validate_date_format, validate_is_float, validate_phone_length
+
+    added = failed = 0
+    with open(args.file, newline="", encoding="utf-8") as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            row = {k: (v or "").strip() for k, v in row.items()}
+            errors = [msg for ok, msg in (
+                validate_date_format(row.get("dob")),
+                validate_date_format(row.get("date_of_admission")),
+                validate_is_float(row.get("monthly_fee") or "0"),
+                validate_is_float(row.get("annual_fund") or "0"),
+                validate_phone_length(row.get("phone", "")),
+            ) if not ok]
+            if errors:
+                print(f"  line {line_no}: skipped ({'; '.join(errors)})")
+                failed += 1
+                continue
+
+            contacts = [{"type": "phone", "value": row["phone"], "label": "primary"}]
+            if row.get("email"):
+                contacts.append({"type": "email", "value": row["email"], "label": "primary"})
+            success, message, *_ = enroll_student(
+                row.get("first_name"), row.get("middle_name") or None, row.get("last_name"),
+                row.get("father_name"), row.get("mother_name"), row.get("dob"), row.get("address"),
+                row.get("gender"), contacts, row.get("date_of_admission"),
+                row.get("monthly_fee") or "0", row.get("annual_fund") or "0", row.get("class"),
+                family_ssn=row.get("family_ssn") or None, family_name=row.get("family_name") or None
+            )
+            if success:
+                added += 1
+            else:
+                print(f"  line {line_no}: failed ({message})")
+                failed += 1
+    print(f"Imported {added} student(s), {failed} failed.")
+    return 0 if failed == 0 else 1
+
+def cmd_export(args):
+    from core import reports
+    export = {"students": reports.export_students, "dues": reports.export_dues}[args.what]
+    if args.file == "-":
+        count = export(sys.stdout)
+    else:
+        with open(args.file, "w", newline="", encoding="utf-8") as f:
+            count = export(f)
+        print(f"Exported {count} {args.what} row(s) to {args.file}.")
+    return 0
+
+# --- reports ---
+
+def cmd_report_billing(args):
+    from core.due_operations import get_billing_period_summary
+    print(f"{'Kind':<12} {'Period':<8} {'Dues':>7} {'Billed':>14} {'Outstanding':>14}  Generated")
+    for p in get_billing_period_summary(args.kind):
+        period = f"{p['year']}-{p['month']:02d}" if p['month'] else str(p['year'])
+        print(f"{p['kind']:<12} {period:<8} {p['due_count']:>7} {p['total_amount']:>14.2f} "
+              f"{p['outstanding_amount']:>14.2f}  {p['generated_at'] or 'in progress'}")
+    return 0
+
+def cmd_report_jobs(args):
+    from core.scheduler import get_job_status
+    for job in get_job_status():
+        print(f"{job['name']:<14} next {job['next_run_at']}  last {job['last_status'] or '-'} "
+              f"at {job['last_run_at'] or '-'} ({job['last_duration_seconds'] or 0:.2f}s, "
+              f"{job['run_count']} runs)  lease {job['lease_owner'] or 'free'}")
+        if job['last_error']:
+            print(f"{'':<14} error: {job['last_error']}")
+    return 0
+
+def cmd_report_checkout(args):
+    from core.checkout import get_checkout_stats
+    stats = get_checkout_stats(args.days)
+    if stats is None:
+        return 1
+    print(f"Checkouts in the last {args.days} days: {stats['transactions']}")
+    print(f"  end to end : median {stats['median_seconds']:.1f}s, p90 {stats['p90_seconds']:.1f}s, "
+          f"max {stats['max_seconds']:.1f}s")
+    print(f"  per step   : lookup {stats['avg_lookup_seconds']:.2f}s, payment {stats['avg_payment_seconds']:.2f}s, "
+          f"print {stats['avg_print_seconds']:.2f}s (averages)")
+    return 0
+
+def cmd_report_outbox(args):
+    from core.emailer import get_outbox_stats
+    stats = get_outbox_stats(args.hours)
+    if stats is None:
+        return 1
+    print(f"E-mail outbox: {stats['pending']} pending, {stats['sending']} being sent")
+    print(f"  sent in the last {args.hours}h: {stats['sent_recently']}, latency queued -> sent "
+          f"avg {stats['avg_latency_seconds']:.2f}s, max {stats['max_latency_seconds']:.2f}s")
+    return 0
+
+def cmd_report_reminders(args):
+    from core.reminders import get_campaign_stats
+    for c in get_campaign_stats(args.limit):
+        print(f"#{c['campaign_id']} {c['started_at']} by {c['started_by'] or '-'}, dues up to {c['due_before']}: "
+              f"{c['messages']} message(s) to {c['families']} families ({c['no_email']} without e-mail), "
+              f"{c['total_amount']:.2f} outstanding")
+        print(f"    query {c['query_seconds'] * 1000:.1f} ms, render {c['render_seconds'] * 1000:.1f} ms, "
+              f"queue {c['queue_seconds'] * 1000:.1f} ms; {c['sent']} sent, {c['failed']} failed, "
+              f"{c['pending']} pending, {c['messages_per_second']:.1f} messages/s")
+    return 0
+
+def cmd_report_queries(args):
+    from core.queries import explain_queries
+    from core.archive import connect_history_db
+    # Importing the core modules registers their statements
+    import core.student_operations, core.due_operations, core.db_login, core.db_receptionist, core.dedup, core.checkout, core.emailer, core.reminders
+    conn = connect_history_db()
+    try:
+        plans = explain_queries(conn)
+    finally:
+        conn.close()
+    for name, steps in plans.items():
+        # Scanning a subquery's own (already filtered) rows is not a table scan
+        subqueries = {step.split()[-1] for step in steps if step.startswith(("CO-ROUTINE", "MATERIALIZE"))}
+        scans = [step for step in steps if step.startswith("SCAN") and step.split()[1] not in subqueries
+                 and step != "SCAN CONSTANT ROW"]
+        if args.scans_only and not scans:
+            continue
+        print(f"{name}{'  [full scan]' if scans else ''}")
+        for step in steps:
+            print(f"    {step}")
+    return 0
+
+# --- reminders ---
+
+def cmd_reminders_preview(args):
+    from core.reminders import preview_reminders
+    success, result = preview_reminders(args.due_before)
+    if not success:
+        print(f"[ERROR] {result}")
+        return 1
+    _print_stats(result)
+    return 0
+
+def cmd_reminders_send(args):
+    import time
+    from core.reminders import run_reminder_campaign, get_campaign_stats
+    from core.emailer import get_email_sender
+    success, result = run_reminder_campaign(args.due_before, "cli")
+    if not success:
+        print(f"[ERROR] {result}")
+        return 1
+    _print_stats(result)
+    if not args.wait:
+        print("Queued; the application's e-mail sender delivers them.")
+        return 0
+    while True:
+        campaign = next(c for c in get_campaign_stats(50) if c["campaign_id"] == result["campaign_id"])
+        if campaign["pending"] == 0:
+            break
+        time.sleep(1)
+    get_email_sender().stop()
+    print(f"Delivered: {campaign['sent']} sent, {campaign['failed']} failed, "
+          f"{campaign['messages_per_second']:.1f} messages/s")
+    return 1 if campaign["failed"] else 0
+
+# --- maintenance ---
+
+def cmd_maintenance_init(args):
+    # main() has already run initialize_db()
+    print("Database schema is up to date.")
+    return 0
+
+def cmd_maintenance_archive(args):
+    from core.archive import archive_paid_dues, get_tier_sizes, ARCHIVE_AFTER_DAYS
+    days = args.older_than_days if args.older_than_days is not None else ARCHIVE_AFTER_DAYS
+    success, result = archive_paid_dues(days)
+    if not success:
+        print(f"[ERROR] {result}")
+        return 1
+    _print_stats(result)
+    for table, rows in get_tier_sizes().items():
+        print(f"  {table}: {rows} rows")
+    return 0
+
+def cmd_maintenance_run(args):
+    from core.maintenance import run_maintenance
+    all_ok, results = run_maintenance(args.task)
+    for task, result in results.items():
+        print(f"  {task:<20} {result['status']:<8} {result['seconds']:8.3f}s  {result['detail']}")
+    return 0 if all_ok else 1
+
+def cmd_maintenance_health(args):
+    from core.maintenance import get_database_health
+    health = get_database_health()
+    if health is None:
+        return 1
+    print(f"{health['path']}: {health['page_count']} pages x {health['page_size']} bytes, "
+          f"{health['freelist_count']} free ({health['freelist_ratio']:.1%})")
+    print(f"  auto_vacuum={health['auto_vacuum']} journal_mode={health['journal_mode']} "
+          f"analyzed={'yes' if health['analyzed'] else 'no'}")
+    for table in health["tables"][:args.top]:
+        print(f"  {table['name']:<36} {table['bytes'] / 1024:10.1f} KiB  {table['unused_ratio']:6.1%} unused")
+    for run in health["last_runs"]:
+        print(f"  last {run['task']:<20} {run['started_at']}  {run['status']:<8} "
+              f"{run['duration_seconds']:.3f}s  {run['detail']}")
+    return 0
+
+def cmd_maintenance_jobs(args):
+    from core.scheduler import JobScheduler
+    scheduler = JobScheduler()
+    for name, run_for, success, result in scheduler.run_pending():
+        print(f"{name} for {run_for:%Y-%m-%d}: {'ok' if success else 'FAILED'}")
+        if not success:
+            print(f"  {result}")
+    return 0
+
+# --- duplicates ---
+
+def _print_clusters(clusters, limit):
+    for number, cluster in enumerate(clusters[:limit], start=1):
+        print(f"Cluster {number}:")
+        for person in cluster["people"]:
+            student = f"student {person['student_id']}" if person["student_id"] else "no student"
+            print(f"  person {person['person_id']:<8} {student:<16} {person['full_name']:<30} "
+                  f"dob {person['dob']}  father {person['father_name']}  family {person['family_SSN'] or '-'}")
+        for person_id, duplicate_of, reasons in cluster["pairs"]:
+            print(f"    {person_id} ~ {duplicate_of}: {reasons}")
+    if len(clusters) > limit:
+        print(f"... and {len(clusters) - limit} more cluster(s)")
+
+def cmd_dedup_scan(args):
+    from core.dedup import scan_duplicates, get_duplicate_clusters
+    success, result = scan_duplicates()
+    if not success:
+        print(f"[ERROR] {result}")
+        return 1
+    _print_stats(result)
+    _print_clusters(get_duplicate_clusters(), args.limit)
+    return 0
+
+def cmd_dedup_list(args):
+    from core.dedup import get_duplicate_clusters
+    clusters = get_duplicate_clusters()
+    print(f"{len(clusters)} open cluster(s)")
+    _print_clusters(clusters, args.limit)
+    return 0
+
+def cmd_dedup_merge(args):
+    from core.dedup import merge_persons
+    success, result = merge_persons(args.keep, args.drop)
+    if not success:
+        print(f"[ERROR] {result}")
+        return 1
+    _print_stats(result)
+    return 0
+
+def cmd_dedup_dismiss(args):
+    from core.dedup import dismiss_duplicate
+    if not dismiss_duplicate(args.person, args.other):
+        print(f"[ERROR] No duplicate pair {args.person} ~ {args.other}")
+        return 1
+    print(f"Pair {args.person} ~ {args.other} dismissed.")
+    return 0
+
+# --- backup ---
+
+def cmd_backup_create(args):
+    from core.backup import create_backup, DEFAULT_KEEP
+    success, result = create_backup(args.dir, "vacuum" if args.vacuum else "backup",
+                                    args.keep if args.keep is not None else DEFAULT_KEEP)
+    if not success:
+        print(f"[ERROR] {result}")
+        return 1
+    print(f"Snapshot written to {result['path']}:")
+    _print_stats(result)
+    return 0
+
+def cmd_backup_list(args):
+    from core.backup import list_backups
+    for backup in list_backups(args.dir):
+        archive = "" if backup["archive_path"] else "  (no archive)"
+        print(f"{backup['created_at']:%Y-%m-%d %H:%M:%S}  {backup['method']:<7} "
+              f"{backup['size_bytes'] / 1024:10.1f} KiB  {backup['path']}{archive}")
+    return 0
+
+def cmd_backup_verify(args):
+    from core.backup import verify_snapshot, snapshot_archive_path
+    all_ok = True
+    for path in (args.file, snapshot_archive_path(args.file)):
+        if path != args.file and not os.path.exists(path):
+            print(f"{path}: missing (snapshot taken without its archive)")
+            continue
+        ok, message = verify_snapshot(path)
+        print(f"{path}: {message}")
+        all_ok = all_ok and ok
+    return 0 if all_ok else 1
+
+def cmd_backup_restore(args):
+    from core.backup import restore_backup
+    success, message = restore_backup(args.file)
+    print("Database restored." if success else f"[ERROR] {message}")
+    return 0 if success else 1
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="campuscore", description="Campus Core batch operations.")
+    parser.add_argument("--db", metavar="PATH",
+                        help="Database file, or :memory: (default: $CAMPUSCORE_DB or data/campuscore.db)")
+    groups = parser.add_subparsers(dest="group", required=True)
+
+    fees = groups.add_parser("fees", help="Generate dues").add_subparsers(dest="action", required=True)
+    p = fees.add_parser("monthly", help="Bill the monthly fee (idempotent per month)")
+    p.add_argument("--year", type=int)
+    p.add_argument("--month", type=int)
+    p.set_defaults(func=cmd_fees_monthly)
+    p = fees.add_parser("annual", help="Bill the annual fund (idempotent per academic year)")
+    p.add_argument("--year", type=int, help="Academic year, named by its starting year")
+    p.add_argument("--chunk-size", type=int, default=500)
+    p.set_defaults(func=cmd_fees_annual)
+    p = fees.add_parser("bulk", help="Charge one due to many students (idempotent)")
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--all", action="store_true")
+    target.add_argument("--class", dest="student_class")
+    target.add_argument("--families", help="Comma-separated family SSNs")
+    target.add_argument("--filter", help='e.g. "class = 9 and monthly_fee >= 3000"')
+    p.add_argument("--type", required=True, help="Due type, e.g. 'Exam Fee - Term 1'")
+    p.add_argument("--amount", type=float, required=True)
+    p.add_argument("--date", required=True, help="Due date (YYYY-MM-DD)")
+    p.add_argument("--preview", action="store_true", help="Only count, write nothing")
+    p.set_defaults(func=cmd_fees_bulk)
+
+    reminders = groups.add_parser("reminders", help="Due reminder e-mails to families").add_subparsers(
+        dest="action", required=True)
+    p = reminders.add_parser("preview", help="Count the families and messages a campaign would send")
+    p.add_argument("--due-before", help="Only dues due on or before this date (default: today)")
+    p.set_defaults(func=cmd_reminders_preview)
+    p = reminders.add_parser("send", help="Queue one reminder per family with unpaid dues")
+    p.add_argument("--due-before", help="Only dues due on or before this date (default: today)")
+    p.add_argument("--wait", action="store_true", help="Send them from this process and wait until done")
+    p.set_defaults(func=cmd_reminders_send)
+
+    imports = groups.add_parser("import", help="Import data from CSV").add_subparsers(dest="action", required=True)
+    p = imports.add_parser("students", help="Enroll students from a CSV file (one transaction per row)")
+    p.add_argument("file")
+    p.set_defaults(func=cmd_import_students)
+
+    p = groups.add_parser("export", help="Export data as CSV")
+    p.add_argument("what", choices=["students", "dues"])
+    p.add_argument("file", help="Output file, or - for stdout")
+    p.set_defaults(func=cmd_export)
+
+    reports = groups.add_parser("report", help="Print reports").add_subparsers(dest="action", required=True)
+    p = reports.add_parser("billing", help="Per billing period totals")
+    p.add_argument("--kind")
+    p.set_defaults(func=cmd_report_billing)
+    p = reports.add_parser("jobs", help="Background job status")
+    p.set_defaults(func=cmd_report_jobs)
+    p = reports.add_parser("checkout", help="Seconds per fast-checkout transaction")
+    p.add_argument("--days", type=int, default=7)
+    p.set_defaults(func=cmd_report_checkout)
+    p = reports.add_parser("outbox", help="E-mail outbox depth and send latency")
+    p.add_argument("--hours", type=int, default=24)
+    p.set_defaults(func=cmd_report_outbox)
+    p = reports.add_parser("reminders", help="Due reminder campaigns and their delivery")
+    p.add_argument("--limit", type=int, default=10)
+    p.set_defaults(func=cmd_report_reminders)
+    p = reports.add_parser("queries", help="Query plan of every catalog statement")
+    p.add_argument("--scans-only", action="store_true", help="Only statements that scan a whole table")
+    p.set_defaults(func=cmd_report_queries)
+
+    dedup = groups.add_parser("dedup", help="Duplicate people").add_subparsers(dest="action", required=True)
+    p = dedup.add_parser("scan", help="Rebuild the blocking keys, find duplicate pairs and list the clusters")
+    p.add_argument("--limit", type=int, default=20, help="Clusters to print")
+    p.set_defaults(func=cmd_dedup_scan)
+    p = dedup.add_parser("list", help="List the open duplicate clusters")
+    p.add_argument("--limit", type=int, default=20, help="Clusters to print")
+    p.set_defaults(func=cmd_dedup_list)
+    p = dedup.add_parser("merge", help="Fold one person (student, contacts, dues) into another")
+    p.add_argument("keep", type=int, help="Person id to keep")
+    p.add_argument("drop", type=int, help="Person id to merge into it and delete")
+    p.set_defaults(func=cmd_dedup_merge)
+    p = dedup.add_parser("dismiss", help="Mark a pair as different people")
+    p.add_argument("person", type=int)
+    p.add_argument("other", type=int)
+    p.set_defaults(func=cmd_dedup_dismiss)
+
+    backup = groups.add_parser("backup", help="Database snapshots").add_subparsers(dest="action", required=True)
+    p = backup.add_parser("create", help="Write a verified snapshot and rotate old ones")
+    p.add_argument("--vacuum", action="store_true", help="Compact snapshot via VACUUM INTO")
+    p.add_argument("--keep", type=int, help="Snapshots to keep (default 14)")
+    p.add_argument("--dir", help="Backup directory (default: backups/ next to the database)")
+    p.set_defaults(func=cmd_backup_create)
+    p = backup.add_parser("list", help="List snapshots, newest first")
+    p.add_argument("--dir")
+    p.set_defaults(func=cmd_backup_list)
+    p = backup.add_parser("verify", help="Run an integrity check on a snapshot")
+    p.add_argument("file")
+    p.set_defaults(func=cmd_backup_verify)
+    p = backup.add_parser("restore", help="Replace the live database with a snapshot")
+    p.add_argument("file")
+    p.set_defaults(func=cmd_backup_restore)
+
+    maintenance = groups.add_parser("maintenance", help="Database upkeep").add_subparsers(dest="action", required=True)
+    p = maintenance.add_parser("init", help="Create/upgrade the schema")
+    p.set_defaults(func=cmd_maintenance_init)
+    p = maintenance.add_parser("archive", help="Move old fully paid dues and their payments to the archive database")
+    p.add_argument("--older-than-days", type=int, help="Archive horizon (default 365)")
+    p.set_defaults(func=cmd_maintenance_archive)
+    p = maintenance.add_parser("run", help="ANALYZE/optimize, auto_vacuum switch (full VACUUM, once), "
+                                           "incremental vacuum, WAL checkpoint, quick_check")
+    p.add_argument("--task", action="append",
+                   choices=["optimize", "enable_auto_vacuum", "incremental_vacuum", "wal_checkpoint", "quick_check"],
+                   help="Run only this task (repeatable)")
+    p.set_defaults(func=cmd_maintenance_run)
+    p = maintenance.add_parser("health", help="Page counts, free space and last maintenance runs")
+    p.add_argument("--top", type=int, default=10, help="Largest tables/indexes to list")
+    p.set_defaults(func=cmd_maintenance_health)
+    p = maintenance.add_parser("jobs", help="Run due background jobs once (with catch-up)")
+    p.set_defaults(func=cmd_maintenance_jobs)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from core.db_init import configure_db, initialize_db
+    if args.db:
+        configure_db(args.db)
+    initialize_db()  # Same start-up step as the GUI; creates/upgrades the schema
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
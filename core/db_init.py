@@ -1,18 +1,207 @@
 # SMS/core/db_init.py
 import sqlite3
 import os
+import itertools
+import threading
+from core.utils import normalize_contact_key
+from core.name_index import backfill_name_index
+from core.passwords import migrate_credentials
 
-DB_PATH = "data/campuscore.db"
+DEFAULT_DB_PATH = "data/campuscore.db"
+# Overrides DEFAULT_DB_PATH for every process that doesn't call configure_db().
+DB_PATH_ENV = "CAMPUSCORE_DB"
+MEMORY_DB = ":memory:"
+
+DB_PATH = DEFAULT_DB_PATH
+FIRST_FAMILY_SSN = 10001
+# Fixed English names so due_type text does not depend on the OS locale.
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July",
+               "August", "September", "October", "November", "December"]
+
+# Prepared statements kept per connection (sqlite3's default is 128); the
+# query catalog (core/queries.py) keeps the set of distinct SQL texts small.
+CACHED_STATEMENTS = 256
+# Idle connections kept per thread for connect_db() to hand out again.
+POOL_SIZE_PER_THREAD = 4
+# change_counter row -> the tables whose writes bump it (by trigger). Read by
+# core/search_cache.py ('search') and core/prefetch.py (both).
+CHANGE_COUNTERS = {
+    "search": ["family", "person", "fullname", "contact", "student"],
+    "dues": ["pending_due", "payment_record"],
+}
+
+_memory_names = itertools.count(1)
+_memory_anchor = None
+_pool = threading.local()
+# Bumped by configure_db(); pooled connections from an older generation are discarded.
+_pool_generation = 0
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A connection whose close() hands it back to its thread's pool instead
+    of closing it, so the next connect_db() on that thread reuses it (and
+    its prepared statements). Uncommitted work is rolled back and
+    row_factory/isolation_level are reset on the way in.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.generation = _pool_generation
+        self.pooled = False
+
+    def close(self):
+        if self.pooled:
+            return
+        idle = _idle_connections()
+        if self.generation != _pool_generation or len(idle) >= POOL_SIZE_PER_THREAD:
+            self.discard()
+            return
+        try:
+            if self.in_transaction:
+                self.rollback()
+            self.row_factory = None
+            self.isolation_level = ""
+        except sqlite3.Error:
+            self.discard()
+            return
+        self.pooled = True
+        idle.append(self)
+
+    def discard(self):
+        """Really closes the connection."""
+        super().close()
+
+def _idle_connections():
+    idle = getattr(_pool, "idle", None)
+    if idle is None:
+        idle = _pool.idle = []
+    return idle
+
+def configure_db(path=None):
+    """
+    Points connect_db() in every module at `path`.
+    With no argument, uses $CAMPUSCORE_DB, else data/campuscore.db.
+
+    ":memory:" creates a new shared-cache in-memory database that every
+    connection in this process sees. It lives until the next configure_db()
+    call. Shared cache locks per table, so it suits single-threaded test and
+    benchmark runs, not the GUI's background writers.
+    Returns the path/URI now in use.
+    """
+    global DB_PATH, _memory_anchor, _pool_generation
+    _pool_generation += 1
+    idle = _idle_connections()
+    while idle:
+        idle.pop().discard()
+    if _memory_anchor is not None:
+        _memory_anchor.close()
+        _memory_anchor = None
+
+    path = path or os.environ.get(DB_PATH_ENV) or DEFAULT_DB_PATH
+    if path == MEMORY_DB:
+        DB_PATH = f"file:campuscore-{os.getpid()}-{next(_memory_names)}?mode=memory&cache=shared"
+        # The database is dropped when its last connection closes
+        _memory_anchor = sqlite3.connect(DB_PATH, uri=True)
+    else:
+        DB_PATH = path
+    return DB_PATH
 
 def connect_db():
-    os.makedirs("data", exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+    """
+    Returns a connection to the configured database, reusing one of this
+    thread's pooled connections when there is one. close() returns it.
+    """
+    idle = _idle_connections()
+    while idle:
+        conn = idle.pop()
+        conn.pooled = False
+        if conn.generation == _pool_generation:
+            return conn
+        conn.discard()
+
+    if DB_PATH.startswith("file:"):
+        return sqlite3.connect(DB_PATH, uri=True, factory=PooledConnection,
+                               cached_statements=CACHED_STATEMENTS)
+    directory = os.path.dirname(DB_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return sqlite3.connect(DB_PATH, factory=PooledConnection, cached_statements=CACHED_STATEMENTS)
+
+def clone_db(source, target=None):
+    """
+    Copies the database at `source` (a path, URI, or open connection) into
+    `target` (default: a new in-memory database) with the sqlite backup API,
+    then points connect_db() at the copy. Returns the path/URI now in use.
+    """
+    source_conn = source if isinstance(source, sqlite3.Connection) else \
+        sqlite3.connect(source, uri=source.startswith("file:"))
+    try:
+        configure_db(target or MEMORY_DB)
+        target_conn = connect_db()
+        try:
+            source_conn.backup(target_conn)
+            _initialize_archive(target_conn)  # The copy gets an archive of its own
+        finally:
+            target_conn.close()
+    finally:
+        if source_conn is not source:
+            source_conn.close()
+    return DB_PATH
+
+def _column_exists(cursor, table, column):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+def _backfill_billing_periods(cursor):
+    """
+    Migration: links existing "Monthly Fee - November 2025" dues to a
+    billing_period row. Names that don't parse are left unlinked.
+    """
+    cursor.execute('''
+        SELECT due_type, COUNT(*), SUM(amount_due), MIN(due_date)
+        FROM pending_due
+        WHERE due_type LIKE 'Monthly Fee - %'
+        GROUP BY due_type
+    ''')
+    for due_type, due_count, total_amount, first_due_date in cursor.fetchall():
+        month_name, _, year = due_type[len("Monthly Fee - "):].partition(" ")
+        if month_name not in MONTH_NAMES or not year.isdigit():
+            continue
+        cursor.execute('''
+            INSERT OR IGNORE INTO billing_period (kind, year, month, generated_at, due_count, total_amount)
+            VALUES ('monthly', ?, ?, ?, ?, ?)
+        ''', (int(year), MONTH_NAMES.index(month_name) + 1, first_due_date, due_count, total_amount))
+        cursor.execute('''
+            UPDATE pending_due
+            SET billing_period_id = (
+                SELECT id FROM billing_period WHERE kind = 'monthly' AND year = ? AND month = ?
+            )
+            WHERE due_type = ?
+        ''', (int(year), MONTH_NAMES.index(month_name) + 1, due_type))
+
+def _backfill_contact_keys(cursor):
+    """
+    Migration: fills contact.contact_key for rows written before the column
+    existed (or by tools that don't set it). Cheap once done: the NULL
+    keys are found through idx_contact_key.
+    """
+    cursor.execute("SELECT id, type, value FROM contact WHERE contact_key IS NULL")
+    keys = [(normalize_contact_key(ctype, value), contact_id) for contact_id, ctype, value in cursor.fetchall()]
+    cursor.executemany("UPDATE contact SET contact_key = ? WHERE id = ?", [k for k in keys if k[0]])
+
+def _initialize_archive(conn):
+    # Imported here: core.archive imports this module
+    from core.archive import initialize_archive
+    initialize_archive(conn)
 
 def initialize_db():
     """Create all tables according to the original schema."""
     conn = connect_db()
     cursor = conn.cursor()
 
+    # Only takes effect on a new, empty file; older databases are switched
+    # over by core.maintenance's enable_auto_vacuum task.
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
     # --- NEW: Family Table ---
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS family (
@@ -131,6 +320,281 @@ def initialize_db():
         )
     ''')
 
+    # --- Family SSN allocator ---
+    # One row per named counter; next_value is the next number to hand out.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS id_sequence (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        )
+    ''')
+
+    # Blocks of family SSNs reserved by a terminal: [next_value, end_value)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS family_ssn_block (
+            terminal_id TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL,
+            end_value INTEGER NOT NULL
+        )
+    ''')
+
+    # Migration: seed the counter from the families that already exist, and
+    # move it past any family inserted without going through the allocator.
+    cursor.execute('''
+        INSERT OR IGNORE INTO id_sequence (name, next_value) VALUES ('family_ssn', ?)
+    ''', (FIRST_FAMILY_SSN,))
+    cursor.execute('''
+        UPDATE id_sequence
+        SET next_value = MAX(next_value, (SELECT COALESCE(MAX(CAST(family_SSN AS INTEGER)) + 1, 0) FROM family))
+        WHERE name = 'family_ssn'
+    ''')
+
+    # --- Billing periods ---
+    # One row per generated billing run (e.g. kind 'monthly', 2025, 11).
+    # month is 0 for yearly kinds so the UNIQUE key has no NULLs.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS billing_period (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL DEFAULT 0,
+            generated_at DATETIME,
+            due_count INTEGER NOT NULL DEFAULT 0,
+            total_amount DOUBLE NOT NULL DEFAULT 0,
+            UNIQUE(kind, year, month)
+        )
+    ''')
+
+    # How long the generating run took (annual fund runs record this).
+    if not _column_exists(cursor, "billing_period", "duration_seconds"):
+        cursor.execute("ALTER TABLE billing_period ADD COLUMN duration_seconds DOUBLE")
+
+    if not _column_exists(cursor, "pending_due", "billing_period_id"):
+        cursor.execute('''
+            ALTER TABLE pending_due
+            ADD COLUMN billing_period_id INTEGER REFERENCES billing_period(id)
+        ''')
+        _backfill_billing_periods(cursor)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pending_due_billing_period
+        ON pending_due(billing_period_id)
+    ''')
+
+    # Dues are looked up per student everywhere (and per student + type
+    # when checking whether a bulk due was already assigned).
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pending_due_student_type
+        ON pending_due(student_id, due_type)
+    ''')
+    # Newest-first due history pages seek on (student_id, due_date).
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pending_due_student_date ON pending_due(student_id, due_date)")
+    # Every payment total (make_payment, dues summaries, archiving) sums by due.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_payment_record_due
+        ON payment_record(pending_due_id)
+    ''')
+    # A day's receipts (batch printing) are picked by payment time
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payment_record_timestamp ON payment_record(payment_timestamp)")
+    # Person-side joins (student details, contacts, name search, logins)
+    # showed up as full scans in `campuscore report queries`.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fullname_person ON fullname(person_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contact_person ON contact(person_id)")
+
+    # Reverse lookup: a caller's phone number or email -> student(s) and family.
+    # contact_key is value normalized by core.utils.normalize_contact_key.
+    if not _column_exists(cursor, "contact", "contact_key"):
+        cursor.execute("ALTER TABLE contact ADD COLUMN contact_key TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contact_key ON contact(contact_key)")
+    _backfill_contact_keys(cursor)
+
+    # Typo-tolerant name search (see core/name_index.py): one row per
+    # trigram of each person / family name.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS name_trigram (
+            kind TEXT NOT NULL,
+            trigram TEXT NOT NULL,
+            ref_id INTEGER NOT NULL,
+            PRIMARY KEY (kind, trigram, ref_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_name_trigram_ref ON name_trigram(kind, ref_id)")
+    # How many names contain each trigram, kept by index_name()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS name_trigram_count (
+            kind TEXT NOT NULL,
+            trigram TEXT NOT NULL,
+            names INTEGER NOT NULL,
+            PRIMARY KEY (kind, trigram)
+        ) WITHOUT ROWID
+    ''')
+    # Migration: count the trigrams indexed before the table existed
+    cursor.execute('''
+        INSERT INTO name_trigram_count (kind, trigram, names)
+        SELECT kind, trigram, COUNT(*) FROM name_trigram
+        WHERE NOT EXISTS (SELECT 1 FROM name_trigram_count)
+        GROUP BY kind, trigram
+    ''')
+    backfill_name_index(cursor)
+
+    # Duplicate person detection (see core/dedup.py): the blocking keys of
+    # each person, and the pairs found to look like the same person.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS person_block (
+            block TEXT NOT NULL,
+            person_id INTEGER NOT NULL,
+            PRIMARY KEY (block, person_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_person_block_person ON person_block(person_id)")
+    # person_id is the newer of the two; status is 'open', 'dismissed' or 'merged'
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS duplicate_candidate (
+            person_id INTEGER NOT NULL,
+            duplicate_of INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            reasons TEXT NOT NULL,
+            found_at DATETIME NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open',
+            PRIMARY KEY (person_id, duplicate_of)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_duplicate_candidate_of ON duplicate_candidate(duplicate_of)")
+
+    # Change counters for caches: bumped by triggers, so every writer
+    # (any process, any code path) moves them.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_counter (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    ''')
+    for counter, tables in CHANGE_COUNTERS.items():
+        cursor.execute("INSERT OR IGNORE INTO change_counter (name, version) VALUES (?, 0)", (counter,))
+        for table in tables:
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_{counter}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE change_counter SET version = version + 1 WHERE name = '{counter}';
+                    END
+                ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_student_person ON student(person_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_student_family ON student(family_id)")
+
+    # --- Background jobs ---
+    # One row per periodic job. lease_owner/lease_expires_at make sure only
+    # one process runs a job at a time; next_run_at drives catch-up.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduled_job (
+            name TEXT PRIMARY KEY,
+            next_run_at DATETIME NOT NULL,
+            lease_owner TEXT,
+            lease_expires_at DATETIME,
+            last_run_at DATETIME,
+            last_status TEXT,
+            last_error TEXT,
+            last_duration_seconds DOUBLE,
+            progress_done INTEGER NOT NULL DEFAULT 0,
+            progress_total INTEGER,
+            run_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # History of every job run, for duration/throughput reporting.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_run (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_name TEXT NOT NULL,
+            scheduled_for DATETIME NOT NULL,
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME,
+            status TEXT NOT NULL DEFAULT 'running',
+            duration_seconds DOUBLE,
+            detail TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_run_job_name ON job_run(job_name, started_at)
+    ''')
+
+    # --- Database maintenance history (core.maintenance) ---
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_run (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task TEXT NOT NULL,
+            started_at DATETIME NOT NULL,
+            duration_seconds REAL,
+            status TEXT NOT NULL,
+            detail TEXT
+        )
+    ''')
+
+    # --- Cashier checkout timings (core.checkout) ---
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS checkout_run (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at DATETIME NOT NULL,
+            received_by_user TEXT,
+            student_id INTEGER,
+            payment_record_id INTEGER,
+            lookup_seconds REAL,
+            payment_seconds REAL,
+            print_seconds REAL,
+            total_seconds REAL NOT NULL,
+            status TEXT NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_checkout_run_started ON checkout_run(started_at)")
+
+    # --- Outgoing e-mail (core.emailer) ---
+    # status: pending -> sending (claimed by one sender) -> sent / failed;
+    # a failed attempt goes back to pending with a later next_attempt_at.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME NOT NULL,
+            next_attempt_at DATETIME NOT NULL,
+            claimed_by TEXT,
+            claimed_at DATETIME,
+            sent_at DATETIME,
+            latency_seconds REAL,
+            last_error TEXT
+        )
+    ''')
+    # Bulk mail (reminder campaigns) has a higher priority number than single messages
+    if not _column_exists(cursor, "email_outbox", "priority"):
+        cursor.execute("ALTER TABLE email_outbox ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+    if not _column_exists(cursor, "email_outbox", "campaign_id"):
+        cursor.execute("ALTER TABLE email_outbox ADD COLUMN campaign_id INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_sent ON email_outbox(sent_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_campaign ON email_outbox(campaign_id)")
+
+    # --- Due reminder campaigns (core.reminders) ---
+    # One row per run; its messages are the email_outbox rows with its campaign_id.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reminder_campaign (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at DATETIME NOT NULL,
+            started_by TEXT,
+            due_before DATE NOT NULL,
+            families INTEGER NOT NULL DEFAULT 0,
+            messages INTEGER NOT NULL DEFAULT 0,
+            no_email INTEGER NOT NULL DEFAULT 0,
+            dues INTEGER NOT NULL DEFAULT 0,
+            total_amount DOUBLE NOT NULL DEFAULT 0,
+            query_seconds REAL,
+            render_seconds REAL,
+            queue_seconds REAL
+        )
+    ''')
+
     # Check if admin exists
     cursor.execute("SELECT id FROM admin LIMIT 1")
     if cursor.fetchone() is None:
@@ -151,6 +615,29 @@ def initialize_db():
             VALUES (?, ?)
         """, (person_id, "admin123"))
 
+    # --- Logins (core.db_login): one row per admin/receptionist account ---
+    # username is the normalized 'first last'; the password is a salted hash
+    # (core.passwords). failed_attempts counts wrong passwords since the last
+    # login; at db_login.MAX_FAILED_ATTEMPTS the account is locked until locked_until.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS credential (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            role TEXT NOT NULL,
+            username TEXT NOT NULL,
+            account_id INTEGER NOT NULL,
+            password_hash TEXT NOT NULL,
+            failed_attempts INTEGER NOT NULL DEFAULT 0,
+            locked_until DATETIME,
+            last_login_at DATETIME,
+            updated_at DATETIME NOT NULL,
+            UNIQUE (role, username)
+        )
+    ''')
+    # Migration: hashes the plaintext passwords (the default admin's too)
+    migrate_credentials(cursor)
 
     conn.commit()
-    conn.close()
\ No newline at end of file
+    _initialize_archive(conn)
+    conn.close()
+
+configure_db()
@@ -1,44 +1,143 @@
-import sqlite3
+# SMS/core/db_login.py
+"""
+Admin and receptionist login.
 
-DB_PATH = "data/campuscore.db"
+An account's login is its credential row, found through the UNIQUE
+(role, username) index by the normalized 'FirstName LastName' (see
+core.passwords.normalize_username), with a salted password hash. Hashing
+is deliberately slow, so the login window runs verify_login() on the
+LOGIN worker thread (submit_login) and polls the Future instead of
+waiting on the GUI thread.
+
+Every wrong password counts in credential.failed_attempts; after
+MAX_FAILED_ATTEMPTS the account is locked for LOCKOUT_MINUTES and the
+password is not even checked. A successful login resets the counter and
+re-hashes a password stored with fewer than the current iterations.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from core import queries
+from core.db_init import connect_db
+from core.passwords import normalize_username, verify_password, needs_rehash, hash_password, dummy_hash
+
+MAX_FAILED_ATTEMPTS = 5
+LOCKOUT_MINUTES = 15
+INVALID_LOGIN = "Invalid username or password."
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Login")
+
+queries.register("credentials.by_username", """
+    SELECT id, password_hash, failed_attempts, locked_until
+    FROM credential
+    WHERE role = ? AND username = ?
+""")
+queries.register("credentials.login_succeeded", """
+    UPDATE credential
+    SET failed_attempts = 0, locked_until = NULL, last_login_at = ?
+    WHERE id = ?
+""")
+# Counted in SQL, so desks failing the same account at once don't lose
+# attempts. A lock that has run out (locked_until <= ?3, now) starts the
+# count afresh; reaching ?4 attempts locks the account until ?2.
+_ATTEMPTS_AFTER_FAILURE = "CASE WHEN locked_until <= ?3 THEN 1 ELSE failed_attempts + 1 END"
+queries.register("credentials.login_failed", f"""
+    UPDATE credential
+    SET failed_attempts = {_ATTEMPTS_AFTER_FAILURE},
+        locked_until = CASE WHEN {_ATTEMPTS_AFTER_FAILURE} >= ?4 THEN ?2
+                            WHEN locked_until <= ?3 THEN NULL
+                            ELSE locked_until END
+    WHERE id = ?1
+    RETURNING failed_attempts
+""")
+queries.register("credentials.set_hash", "UPDATE credential SET password_hash = ?, updated_at = ? WHERE id = ?")
+
+def _load_credential(role, username):
+    conn = connect_db()
+    try:
+        return queries.fetch_one(conn.cursor(), "credentials.by_username", (role, normalize_username(username)))
+    finally:
+        conn.close()
+
+def _record_success(credential_id, new_hash=None):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        queries.execute(cursor, "credentials.login_succeeded", (timestamp, credential_id))
+        if new_hash:
+            queries.execute(cursor, "credentials.set_hash", (new_hash, timestamp, credential_id))
+        conn.commit()
+    except Exception as e:
+        print(f"[ERROR] _record_success: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+def _record_failure(credential_id):
+    """
+    Counts one failed attempt and locks the account once it reaches
+    MAX_FAILED_ATTEMPTS. Returns the new count, or None if it could not
+    be recorded.
+    """
+    now = datetime.now()
+    locked_until = (now + timedelta(minutes=LOCKOUT_MINUTES)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        row = queries.fetch_one(cursor, "credentials.login_failed", (
+            credential_id, locked_until, now.strftime("%Y-%m-%d %H:%M:%S"), MAX_FAILED_ATTEMPTS
+        ))
+        conn.commit()
+        return row[0] if row else None
+    except Exception as e:
+        print(f"[ERROR] _record_failure: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+def verify_login(role, username, password):
+    """
+    Checks a login for role ('admin' or 'receptionist'). Slow by design
+    (one password hash): call it through submit_login() from the GUI.
+    Returns (True, None) or (False, message to show).
+    """
+    try:
+        row = _load_credential(role, username)
+    except Exception as e:
+        print(f"[ERROR] verify_login: {e}")
+        return False, "Could not check the login. Please try again."
+
+    if row is None:
+        verify_password(password, dummy_hash())  # Same time as a wrong password
+        return False, INVALID_LOGIN
+
+    credential_id, password_hash, _, locked_until = row
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if locked_until and locked_until > now:
+        minutes = -(-(datetime.strptime(locked_until, "%Y-%m-%d %H:%M:%S") - datetime.now()).total_seconds() // 60)
+        return False, f"Too many failed attempts. Try again in {int(minutes)} minute(s)."
+    if verify_password(password, password_hash):
+        _record_success(credential_id, hash_password(password) if needs_rehash(password_hash) else None)
+        return True, None
+    failed_attempts = _record_failure(credential_id)
+    if failed_attempts is not None and failed_attempts >= MAX_FAILED_ATTEMPTS:
+        return False, f"Too many failed attempts. The account is locked for {LOCKOUT_MINUTES} minutes."
+    return False, INVALID_LOGIN
+
+def submit_login(role, username, password):
+    """Runs verify_login() on the login worker thread. Returns its Future."""
+    return _executor.submit(verify_login, role, username, password)
 
 def validate_admin(username, password):
     """
     Admin username: 'FirstName LastName'
     """
-    if " " not in username:
-        return False
-    first_name, last_name = username.strip().split(" ", 1)
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT a.id
-        FROM admin a
-        JOIN fullname f ON a.person_id = f.person_id
-        WHERE f.first_name = ? AND f.last_name = ? AND a.password = ?
-    """, (first_name, last_name, password))
-    result = cursor.fetchone()
-    conn.close()
-    return bool(result)
+    return verify_login("admin", username, password)[0]
 
 
 def validate_receptionist(username, password):
     """
     Receptionist username: 'FirstName LastName'
     """
-    if " " not in username:
-        return False
-    first_name, last_name = username.strip().split(" ", 1)
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT r.id
-        FROM receptionist r
-        JOIN fullname f ON r.person_id = f.person_id
-        WHERE f.first_name = ? AND f.last_name = ? AND r.password = ?
-    """, (first_name, last_name, password))
-    result = cursor.fetchone()
-    conn.close()
-    return bool(result)
+    return verify_login("receptionist", username, password)[0]
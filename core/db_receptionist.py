@@ -1,4 +1,15 @@
+from core import queries
 from core.db_init import connect_db
+# Shares the person/fullname/contact inserts with student enrollment
+from core.student_operations import contact_row
+from core.name_index import index_person_name
+from core.dedup import check_person
+from core.passwords import hash_password, insert_credential, MIGRATED_PASSWORD
+
+queries.register("receptionists.insert", """
+    INSERT INTO receptionist (person_id, password)
+    VALUES (?, ?)
+""")
 
 def add_receptionist(fathername, mothername, dob, address, gender,
                       first_name, middle_name, last_name,
@@ -10,38 +21,31 @@ def add_receptionist(fathername, mothername, dob, address, gender,
     """
     if not contacts or all(c.get('type') != 'phone' for c in contacts):
         raise ValueError("At least one phone number must be provided.")
+    # Hashed before the transaction starts: it takes a few hundred milliseconds
+    password_hash = hash_password(password)
 
     conn = connect_db()
     cursor = conn.cursor()
 
     # Insert into person
-    cursor.execute("""
-        INSERT INTO person (fathername, mothername, dob, address, gender)
-        VALUES (?, ?, ?, ?, ?)
-    """, (fathername, mothername, dob, address, gender))
+    queries.execute(cursor, "people.insert", (fathername, mothername, dob, address, gender))
     person_id = cursor.lastrowid
 
     # Insert into fullname
-    cursor.execute("""
-        INSERT INTO fullname (person_id, first_name, middle_name, last_name)
-        VALUES (?, ?, ?, ?)
-    """, (person_id, first_name, middle_name, last_name))
+    queries.execute(cursor, "fullnames.insert", (person_id, first_name, middle_name, last_name))
+    index_person_name(cursor, person_id, first_name, middle_name, last_name)
 
     # Insert all contacts
     for contact in contacts:
-        ctype = contact.get('type')
-        value = contact.get('value')
-        label = contact.get('label', 'primary')
-        cursor.execute("""
-            INSERT INTO contact (person_id, type, value, label)
-            VALUES (?, ?, ?, ?)
-        """, (person_id, ctype, value, label))
-
-    # Insert into receptionist with plain text password
-    cursor.execute("""
-        INSERT INTO receptionist (person_id, password)
-        VALUES (?, ?)
-    """, (person_id, password))
+        queries.execute(cursor, "contacts.insert", contact_row(person_id, {'label': 'primary', **contact}))
+    check_person(cursor, person_id)
+
+    # The password lives hashed in credential (core.passwords), never in receptionist
+    queries.execute(cursor, "receptionists.insert", (person_id, MIGRATED_PASSWORD))
+    if not insert_credential(cursor, "receptionist", f"{first_name} {last_name}", cursor.lastrowid, password_hash):
+        conn.rollback()
+        conn.close()
+        raise ValueError(f"A receptionist named '{first_name} {last_name}' already exists.")
 
     conn.commit()
     conn.close()
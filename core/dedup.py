@@ -0,0 +1,419 @@
+# SMS/core/dedup.py
+"""
+Duplicate person detection and merging.
+
+Comparing every person with every other one is O(n^2), so people are
+only compared within blocks: groups that share a blocking key.
+
+    name_dob:<name words, sorted>|<dob>      same name and birthday
+    phone:<contact_key>                      same phone number
+    parents:<father words>|<mother words>    same parents (siblings, too)
+
+A pair within a block is scored (see match_score) and recorded in
+duplicate_candidate when it reaches MIN_SCORE. check_person() does this
+for one person as they are written (enrollment, receptionist sign-up,
+student update); scan_duplicates() rebuilds every block as a batch job.
+Nothing is merged automatically: merge_persons() folds one person into
+another once someone has looked at the pair.
+"""
+import json
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime
+from core import queries
+from core.archive import connect_history_db
+from core.db_init import connect_db
+from core.name_index import PERSON, name_words, name_distance
+
+# Blocks with more members than this (a school office number, common
+# parent names) say little about who is who, and are not compared.
+MAX_BLOCK_SIZE = 50
+# Names further apart than this (see name_index.name_distance) never match.
+MAX_NAME_DISTANCE = 0.25
+# Evidence points a pair needs; see match_score().
+MIN_SCORE = 4
+
+_Person = namedtuple("_Person", ["person_id", "first_name", "middle_name", "last_name", "dob",
+                                 "fathername", "mothername", "phones"])
+
+_PEOPLE_SELECT = """
+    SELECT p.id, f.first_name, f.middle_name, f.last_name, p.dob, p.fathername, p.mothername,
+           (SELECT group_concat(c.contact_key, ' ') FROM contact c
+            WHERE c.person_id = p.id AND c.type = 'phone' AND c.contact_key IS NOT NULL) as phones
+    FROM person p
+    JOIN fullname f ON f.person_id = p.id
+"""
+queries.register("dedup.people", f"{_PEOPLE_SELECT} WHERE p.id IN (SELECT value FROM json_each(?))")
+queries.register("dedup.all_people", _PEOPLE_SELECT)
+
+def _full_name(person):
+    return " ".join(n for n in (person.first_name, person.middle_name, person.last_name) if n)
+
+def _phones(person):
+    return set((person.phones or "").split())
+
+def _parents(person):
+    father, mother = " ".join(name_words(person.fathername)), " ".join(name_words(person.mothername))
+    return f"{father}|{mother}" if father and mother else None
+
+def blocking_keys(person):
+    """The blocks a person belongs to."""
+    keys = {f"phone:{phone}" for phone in _phones(person)}
+    name = " ".join(sorted(name_words(_full_name(person))))
+    if name and person.dob:
+        keys.add(f"name_dob:{name}|{person.dob}")
+    parents = _parents(person)
+    if parents:
+        keys.add(f"parents:{parents}")
+    return keys
+
+def match_score(a, b):
+    """
+    Returns (score, reasons) for two people. Evidence points:
+      name   2 if the names are the same, 1 if within MAX_NAME_DISTANCE
+      dob    2 if the birthdays are the same
+      phone  1 if they share a phone number
+      parents 1 if they have the same parents
+    A similar name is required, so siblings (same phone and parents,
+    different name and birthday) stay at 3 or less; MIN_SCORE is 4.
+    """
+    name_a, name_b = _full_name(a), _full_name(b)
+    distance = min(name_distance(name_a, name_b), name_distance(name_b, name_a))
+    if distance > MAX_NAME_DISTANCE:
+        return 0, []
+    score, reasons = (2, ["same name"]) if distance == 0 else (1, ["similar name"])
+    if a.dob and a.dob == b.dob:
+        score += 2
+        reasons.append("dob")
+    if _phones(a) & _phones(b):
+        score += 1
+        reasons.append("phone")
+    parents = _parents(a)
+    if parents and parents == _parents(b):
+        score += 1
+        reasons.append("parents")
+    return score, reasons
+
+def _load_people(cursor, person_ids):
+    return [_Person._make(row) for row in
+            queries.fetch_all(cursor, "dedup.people", (json.dumps(list(person_ids)),))]
+
+queries.register("dedup.clear_blocks", "DELETE FROM person_block")
+queries.register("dedup.delete_blocks", "DELETE FROM person_block WHERE person_id = ?")
+queries.register("dedup.insert_block", "INSERT OR IGNORE INTO person_block (block, person_id) VALUES (?, ?)")
+queries.register("dedup.block_members", """
+    SELECT DISTINCT person_id FROM person_block
+    WHERE block IN (
+        SELECT block FROM person_block
+        WHERE block IN (SELECT value FROM json_each(?1))
+        GROUP BY block HAVING COUNT(*) <= ?2
+    ) AND person_id != ?3
+""")
+# A pair is stored once, newer person first. A pair that was dismissed
+# (or merged) keeps that status when it is found again.
+queries.register("dedup.record_candidate", """
+    INSERT INTO duplicate_candidate (person_id, duplicate_of, score, reasons, found_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(person_id, duplicate_of) DO UPDATE
+    SET score = excluded.score, reasons = excluded.reasons
+""")
+
+def _record_candidates(cursor, pairs):
+    """pairs: [(person_id, other_id, score, reasons)]"""
+    found_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    queries.execute_many(cursor, "dedup.record_candidate", [
+        (max(a, b), min(a, b), score, "+".join(reasons), found_at) for a, b, score, reasons in pairs
+    ])
+
+def check_person(cursor, person_id):
+    """
+    Refreshes one person's blocks and records the people in them who look
+    like the same person, using the caller's cursor. Does not commit.
+    Returns [(other_person_id, score, reasons)].
+    """
+    people = _load_people(cursor, [person_id])
+    if not people:
+        return []
+    person = people[0]
+    keys = blocking_keys(person)
+    queries.execute(cursor, "dedup.delete_blocks", (person_id,))
+    queries.execute_many(cursor, "dedup.insert_block", [(key, person_id) for key in keys])
+
+    others = [row[0] for row in queries.fetch_all(cursor, "dedup.block_members",
+                                                  (json.dumps(sorted(keys)), MAX_BLOCK_SIZE, person_id))]
+    matches = []
+    for other in _load_people(cursor, others) if others else []:
+        score, reasons = match_score(person, other)
+        if score >= MIN_SCORE:
+            matches.append((other.person_id, score, reasons))
+    _record_candidates(cursor, [(person_id, other_id, score, reasons) for other_id, score, reasons in matches])
+    return matches
+
+def scan_duplicates(progress_callback=None):
+    """
+    Batch job: rebuilds person_block for everyone, compares the members of
+    every block (up to MAX_BLOCK_SIZE) pairwise and records the matches.
+    progress_callback(blocks_done, blocks_total) is called every 1000 blocks.
+    Returns (True, stats) or (False, error_message).
+    """
+    start = time.perf_counter()
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        people = {row[0]: _Person._make(row) for row in queries.fetch_all(cursor, "dedup.all_people")}
+        blocks = {}
+        for person in people.values():
+            for key in blocking_keys(person):
+                blocks.setdefault(key, []).append(person.person_id)
+        queries.execute(cursor, "dedup.clear_blocks")
+        queries.execute_many(cursor, "dedup.insert_block",
+                             ((key, person_id) for key, members in blocks.items() for person_id in members))
+
+        compared = set()
+        matches = []
+        oversized = 0
+        for done, members in enumerate(blocks.values(), start=1):
+            if len(members) > MAX_BLOCK_SIZE:
+                oversized += 1
+                continue
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair in compared:
+                        continue
+                    compared.add(pair)
+                    score, reasons = match_score(people[a], people[b])
+                    if score >= MIN_SCORE:
+                        matches.append((a, b, score, reasons))
+            if progress_callback and done % 1000 == 0:
+                progress_callback(done, len(blocks))
+        _record_candidates(cursor, matches)
+        conn.commit()
+        return True, {
+            "people": len(people),
+            "blocks": len(blocks),
+            "oversized_blocks": oversized,
+            "comparisons": len(compared),
+            "all_pairs": len(people) * (len(people) - 1) // 2,
+            "duplicate_pairs": len(matches),
+            "seconds": time.perf_counter() - start,
+        }
+    except Exception as e:
+        print(f"[ERROR] scan_duplicates: {e}")
+        conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
+
+queries.register("dedup.open_pairs", "SELECT person_id, duplicate_of, reasons FROM duplicate_candidate WHERE status = 'open'")
+queries.register("dedup.cluster_people", """
+    SELECT p.id as person_id, s.id as student_id,
+           f.first_name || ' ' || COALESCE(f.middle_name || ' ', '') || f.last_name as full_name,
+           p.dob, p.fathername as father_name, fam.family_SSN
+    FROM person p
+    JOIN fullname f ON f.person_id = p.id
+    LEFT JOIN student s ON s.person_id = p.id
+    LEFT JOIN family fam ON fam.id = s.family_id
+    WHERE p.id IN (SELECT value FROM json_each(?))
+    ORDER BY p.id
+""")
+
+def get_duplicate_clusters():
+    """
+    Groups the open duplicate pairs into clusters (people linked by any chain
+    of pairs). Returns a list of {"people": [dict per person, oldest first],
+    "pairs": [(person_id, duplicate_of, reasons)]}, largest cluster first.
+    """
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    try:
+        pairs = [tuple(row) for row in queries.fetch_all(cursor, "dedup.open_pairs")]
+        parent = {}
+
+        def root(x):
+            while parent.setdefault(x, x) != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b, _ in pairs:
+            parent[root(a)] = root(b)
+        groups = {}
+        for person_id in list(parent):
+            groups.setdefault(root(person_id), []).append(person_id)
+
+        clusters = []
+        for members in groups.values():
+            people = queries.fetch_all(cursor, "dedup.cluster_people", (json.dumps(members),))
+            member_set = set(members)
+            clusters.append({
+                "people": [dict(row) for row in people],
+                "pairs": [pair for pair in pairs if pair[0] in member_set],
+            })
+        clusters.sort(key=lambda c: (-len(c["people"]), c["people"][0]["person_id"] if c["people"] else 0))
+        return clusters
+    except Exception as e:
+        print(f"[ERROR] get_duplicate_clusters: {e}")
+        return []
+    finally:
+        conn.close()
+
+queries.register("dedup.for_student", """
+    WITH pairs(other, reasons) AS (
+        SELECT duplicate_of, reasons FROM duplicate_candidate
+        WHERE person_id = (SELECT person_id FROM student WHERE id = ?1) AND status = 'open'
+        UNION ALL
+        SELECT person_id, reasons FROM duplicate_candidate
+        WHERE duplicate_of = (SELECT person_id FROM student WHERE id = ?1) AND status = 'open'
+    )
+    SELECT s.id as student_id,
+           f.first_name || ' ' || COALESCE(f.middle_name || ' ', '') || f.last_name as full_name,
+           pairs.reasons
+    FROM pairs
+    JOIN student s ON s.person_id = pairs.other
+    JOIN fullname f ON f.person_id = pairs.other
+""")
+
+def get_student_duplicates(student_id):
+    """Open duplicate pairs of a student: [{"student_id", "full_name", "reasons"}]."""
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    try:
+        return [dict(row) for row in queries.fetch_all(cursor, "dedup.for_student", (student_id,))]
+    except Exception as e:
+        print(f"[ERROR] get_student_duplicates: {e}")
+        return []
+    finally:
+        conn.close()
+
+queries.register("dedup.set_status", """
+    UPDATE duplicate_candidate SET status = ?1
+    WHERE person_id = MAX(?2, ?3) AND duplicate_of = MIN(?2, ?3)
+""")
+
+def dismiss_duplicate(person_id, other_person_id):
+    """Marks a pair as not a duplicate; later scans leave it dismissed. Returns True if the pair existed."""
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        queries.execute(cursor, "dedup.set_status", ("dismissed", person_id, other_person_id))
+        conn.commit()
+        return cursor.rowcount > 0
+    except Exception as e:
+        print(f"[ERROR] dismiss_duplicate: {e}")
+        return False
+    finally:
+        conn.close()
+
+queries.register("dedup.student_of", "SELECT id FROM student WHERE person_id = ?")
+# The dropped student's unpaid dues that the kept one was also charged
+# (same type and date), e.g. the monthly fee billed to both records
+_DOUBLE_DUES = """
+    WHERE student_id = ?1
+      AND NOT EXISTS (SELECT 1 FROM payment_record pr WHERE pr.pending_due_id = pending_due.id)
+      AND EXISTS (SELECT 1 FROM pending_due k
+                  WHERE k.student_id = ?2 AND k.due_type = pending_due.due_type
+                    AND k.due_date = pending_due.due_date)
+"""
+queries.register("dedup.delete_double_dues", "DELETE FROM pending_due" + _DOUBLE_DUES)
+queries.register("dedup.double_due_periods", f"""
+    SELECT DISTINCT billing_period_id FROM pending_due
+    {_DOUBLE_DUES}
+      AND billing_period_id IS NOT NULL
+""")
+# A period's totals from its dues in both tiers (needs the archive attached)
+queries.register("dedup.recount_period", """
+    UPDATE billing_period
+    SET due_count = (SELECT COUNT(*) FROM pending_due WHERE billing_period_id = ?1)
+                  + (SELECT COUNT(*) FROM archive.pending_due WHERE billing_period_id = ?1),
+        total_amount = (SELECT COALESCE(SUM(amount_due), 0) FROM pending_due WHERE billing_period_id = ?1)
+                     + (SELECT COALESCE(SUM(amount_due), 0) FROM archive.pending_due WHERE billing_period_id = ?1)
+    WHERE id = ?1
+""")
+queries.register("dedup.move_dues", "UPDATE pending_due SET student_id = ? WHERE student_id = ?")
+queries.register("dedup.move_archived_dues", "UPDATE archive.pending_due SET student_id = ? WHERE student_id = ?")
+queries.register("dedup.delete_student", "DELETE FROM student WHERE id = ?")
+queries.register("dedup.move_student", "UPDATE student SET person_id = ? WHERE id = ?")
+queries.register("dedup.move_contacts", """
+    UPDATE contact SET person_id = ?1
+    WHERE person_id = ?2
+      AND (contact_key IS NULL
+           OR contact_key NOT IN (SELECT contact_key FROM contact WHERE person_id = ?1 AND contact_key IS NOT NULL))
+""")
+queries.register("dedup.merge_candidates", """
+    UPDATE duplicate_candidate SET status = 'merged'
+    WHERE person_id = ?1 OR duplicate_of = ?1
+""")
+queries.register("dedup.delete_contacts", "DELETE FROM contact WHERE person_id = ?")
+queries.register("dedup.delete_fullname", "DELETE FROM fullname WHERE person_id = ?")
+queries.register("dedup.delete_person", "DELETE FROM person WHERE id = ?")
+_PERSON_ROLE_TABLES = ["teacher", "admin", "receptionist"]
+for _table in _PERSON_ROLE_TABLES:
+    queries.register(f"dedup.move_{_table}", f"UPDATE {_table} SET person_id = ? WHERE person_id = ?")
+
+def merge_persons(keep_person_id, drop_person_id):
+    """
+    Folds drop_person_id into keep_person_id in one transaction:
+      - if both are students, the dropped student's dues (live and archived)
+        move to the kept student, minus unpaid dues the kept student was
+        already charged (their billing periods' totals are recounted);
+        otherwise the dropped student row is re-pointed
+      - contacts the kept person doesn't have move over
+      - teacher/admin/receptionist rows are re-pointed
+      - the dropped person, its name, trigrams and blocks are deleted
+    The kept student keeps its own family and fee settings.
+    Returns (True, stats) or (False, error_message).
+    """
+    if keep_person_id == drop_person_id:
+        return False, "Cannot merge a person into itself"
+    conn = connect_history_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        if len(_load_people(cursor, [keep_person_id, drop_person_id])) != 2:
+            raise ValueError(f"Person {keep_person_id} or {drop_person_id} not found")
+        stats = {"kept_person_id": keep_person_id, "dropped_person_id": drop_person_id,
+                 "moved_dues": 0, "removed_double_dues": 0, "moved_archived_dues": 0}
+
+        keep_student = queries.fetch_one(cursor, "dedup.student_of", (keep_person_id,))
+        drop_student = queries.fetch_one(cursor, "dedup.student_of", (drop_person_id,))
+        if keep_student and drop_student:
+            keep_id, drop_id = keep_student[0], drop_student[0]
+            periods = [row[0] for row in queries.fetch_all(cursor, "dedup.double_due_periods", (drop_id, keep_id))]
+            stats["removed_double_dues"] = queries.execute(cursor, "dedup.delete_double_dues",
+                                                           (drop_id, keep_id)).rowcount
+            for billing_period_id in periods:
+                queries.execute(cursor, "dedup.recount_period", (billing_period_id,))
+            stats["moved_dues"] = queries.execute(cursor, "dedup.move_dues", (keep_id, drop_id)).rowcount
+            stats["moved_archived_dues"] = queries.execute(cursor, "dedup.move_archived_dues",
+                                                           (keep_id, drop_id)).rowcount
+            queries.execute(cursor, "dedup.delete_student", (drop_id,))
+            stats["kept_student_id"], stats["dropped_student_id"] = keep_id, drop_id
+        elif drop_student:
+            queries.execute(cursor, "dedup.move_student", (keep_person_id, drop_student[0]))
+            stats["kept_student_id"] = drop_student[0]
+
+        stats["moved_contacts"] = queries.execute(cursor, "dedup.move_contacts",
+                                                  (keep_person_id, drop_person_id)).rowcount
+        queries.execute(cursor, "dedup.delete_contacts", (drop_person_id,))
+        for table in _PERSON_ROLE_TABLES:
+            queries.execute(cursor, f"dedup.move_{table}", (keep_person_id, drop_person_id))
+
+        queries.execute(cursor, "dedup.delete_fullname", (drop_person_id,))
+        queries.execute(cursor, "name_index.delete", (PERSON, drop_person_id))
+        queries.execute(cursor, "dedup.delete_blocks", (drop_person_id,))
+        queries.execute(cursor, "dedup.delete_person", (drop_person_id,))
+        queries.execute(cursor, "dedup.merge_candidates", (drop_person_id,))
+        check_person(cursor, keep_person_id)  # Its blocks now include the moved contacts
+        conn.commit()
+        return True, stats
+    except Exception as e:
+        print(f"[ERROR] merge_persons: {e}")
+        conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
@@ -1,8 +1,78 @@
 # SMS/core/due_operations.py
+import calendar
+import json
 import sqlite3
 import os
-from core.db_init import connect_db
-from datetime import datetime
+import re
+import time
+from core import queries
+from core.db_init import connect_db, MONTH_NAMES
+from core.archive import connect_history_db
+from core.records import DueSummary, PaymentRecord, ReceiptRecord
+from core.pagination import Page, EMPTY_PAGE, DEFAULT_PAGE_SIZE, decode_cursor, clamp_page_size, fetch_page
+from datetime import datetime, timedelta
+
+# billing_period.kind for the monthly fee run
+MONTHLY_FEE_KIND = "monthly"
+
+queries.register("dues.insert", """
+    INSERT INTO pending_due (student_id, due_type, amount_due, due_date, status, billing_period_id)
+    VALUES (?, ?, ?, ?, 'unpaid', ?)
+""")
+queries.register("billing_periods.add_due", """
+    UPDATE billing_period
+    SET due_count = due_count + 1, total_amount = total_amount + ?
+    WHERE id = ?
+""")
+
+def insert_pending_due(cursor, student_id, due_type, amount, due_date, billing_period_id=None):
+    """
+    Inserts one unpaid due using the caller's cursor. Does not commit.
+    When billing_period_id is given, that period's row counts are updated too.
+    Returns the new pending_due id.
+    """
+    queries.execute(cursor, "dues.insert", (student_id, due_type, amount, due_date, billing_period_id))
+    new_due_id = cursor.lastrowid
+    if billing_period_id:
+        queries.execute(cursor, "billing_periods.add_due", (amount, billing_period_id))
+    return new_due_id
+
+queries.register("payments.insert", """
+    INSERT INTO payment_record (pending_due_id, amount_paid, payment_timestamp, payment_mode, received_by_user)
+    VALUES (?, ?, ?, ?, ?)
+""")
+queries.register("dues.amount_due", "SELECT amount_due FROM pending_due WHERE id = ?")
+queries.register("payments.total_for_due", """
+    SELECT SUM(amount_paid)
+    FROM payment_record
+    WHERE pending_due_id = ?
+""")
+queries.register("dues.set_status", "UPDATE pending_due SET status = ? WHERE id = ?")
+
+def apply_payment(cursor, pending_due_id, amount_paid, payment_mode, payment_timestamp, received_by_user):
+    """
+    Records a payment and refreshes the due's status using the caller's
+    cursor. Does not commit.
+    Returns (new_status, new_payment_id). Raises if the due does not exist.
+    """
+    queries.execute(cursor, "payments.insert",
+                    (pending_due_id, amount_paid, payment_timestamp, payment_mode, received_by_user))
+    
+    new_payment_id = cursor.lastrowid
+    
+    row = queries.fetch_one(cursor, "dues.amount_due", (pending_due_id,))
+    if not row:
+        raise Exception("Pending due not found")
+    amount_due = row[0]
+    
+    total_paid = queries.fetch_one(cursor, "payments.total_for_due", (pending_due_id,))[0]
+    
+    new_status = 'partially paid'
+    if total_paid >= amount_due:
+        new_status = 'paid'
+        
+    queries.execute(cursor, "dues.set_status", (new_status, pending_due_id))
+    return new_status, new_payment_id
 
 def add_manual_due(student_id, due_type, amount, due_date):
     """
@@ -12,10 +82,7 @@ def add_manual_due(student_id, due_type, amount, due_date):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("""
-            INSERT INTO pending_due (student_id, due_type, amount_due, due_date, status)
-            VALUES (?, ?, ?, ?, 'unpaid')
-        """, (student_id, due_type, amount, due_date))
+        insert_pending_due(cursor, student_id, due_type, amount, due_date)
         conn.commit()
         return True
     except Exception as e:
@@ -25,6 +92,46 @@ def add_manual_due(student_id, due_type, amount, due_date):
     finally:
         conn.close()
 
+def monthly_fee_due_type(year, month):
+    """Returns the fee name for a month, e.g. "Monthly Fee - November 2025"."""
+    return f"Monthly Fee - {MONTH_NAMES[month - 1]} {year}"
+
+def current_monthly_fee_due_type(today=None):
+    """Returns this month's fee name, e.g. "Monthly Fee - November 2025"."""
+    today = today or datetime.now()
+    return monthly_fee_due_type(today.year, today.month)
+
+queries.register("billing_periods.find_generated", """
+    SELECT id
+    FROM billing_period
+    WHERE kind = ? AND year = ? AND month = ? AND generated_at IS NOT NULL
+""")
+
+def find_billing_period(cursor, kind, year, month=0):
+    """
+    Using the caller's cursor, returns the id of the generated billing period
+    (kind, year, month), or None. This is a lookup on the table's UNIQUE key.
+    """
+    row = queries.fetch_one(cursor, "billing_periods.find_generated", (kind, year, month))
+    return row[0] if row else None
+
+def current_monthly_fee_period(cursor, today=None):
+    """Returns this month's monthly-fee billing_period id, or None if not billed yet."""
+    today = today or datetime.now()
+    return find_billing_period(cursor, MONTHLY_FEE_KIND, today.year, today.month)
+
+def insert_current_monthly_fee(cursor, student_id, fee_amount, due_type_name=None):
+    """
+    Adds this month's fee for one student using the caller's cursor, linked to
+    the month's billing period. Does not commit. Returns the new pending_due id.
+    """
+    today = datetime.now()
+    due_date = today.strftime('%Y-%m-10') # Standard due date
+    return insert_pending_due(
+        cursor, student_id, due_type_name or current_monthly_fee_due_type(today), fee_amount,
+        due_date, current_monthly_fee_period(cursor, today)
+    )
+
 # --- NEW FUNCTION ---
 def check_if_monthly_fee_was_run():
     """
@@ -35,20 +142,9 @@ def check_if_monthly_fee_was_run():
     conn = connect_db()
     cursor = conn.cursor()
     
-    today = datetime.now()
-    current_month_year = today.strftime("%B %Y")
-    specific_due_type = f"Monthly Fee - {current_month_year}"
-    
     try:
-        cursor.execute("""
-            SELECT 1 
-            FROM pending_due 
-            WHERE due_type = ?
-            LIMIT 1
-        """, (specific_due_type,))
-        
-        if cursor.fetchone():
-            return True, specific_due_type
+        if current_monthly_fee_period(cursor):
+            return True, current_monthly_fee_due_type()
         else:
             return False, None
             
@@ -67,14 +163,8 @@ def add_specific_monthly_fee(student_id, fee_amount, due_type_name):
     conn = connect_db()
     cursor = conn.cursor()
     
-    today = datetime.now()
-    due_date = today.strftime('%Y-%m-10') # Standard due date
-    
     try:
-        cursor.execute("""
-            INSERT INTO pending_due (student_id, due_type, amount_due, due_date, status)
-            VALUES (?, ?, ?, ?, 'unpaid')
-        """, (student_id, due_type_name, fee_amount, due_date))
+        insert_current_monthly_fee(cursor, student_id, fee_amount, due_type_name)
         conn.commit()
         print(f"Successfully added fee '{due_type_name}' for new student ID: {student_id}")
     except Exception as e:
@@ -83,21 +173,137 @@ def add_specific_monthly_fee(student_id, fee_amount, due_type_name):
     finally:
         conn.close()
 
+queries.register("billing_periods.mark_generated", """
+    INSERT INTO billing_period (kind, year, month, generated_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(kind, year, month) DO UPDATE SET generated_at = excluded.generated_at
+""")
+queries.register("billing_periods.id", "SELECT id FROM billing_period WHERE kind = ? AND year = ? AND month = ?")
+# Due date is the 10th of the billed month. Students admitted after the
+# month ended (a catch-up run for a missed month) are not billed for it.
+queries.register("dues.post_monthly_fees", """
+    INSERT INTO pending_due (student_id, due_type, amount_due, due_date, status, billing_period_id)
+    SELECT id, ?, monthly_fee, ?, 'unpaid', ?
+    FROM student
+    WHERE monthly_fee > 0
+      AND (date_of_admission IS NULL OR date_of_admission <= ?)
+""")
+queries.register("dues.total_for_period", """
+    SELECT COALESCE(SUM(amount_due), 0) FROM pending_due WHERE billing_period_id = ?
+""")
+queries.register("billing_periods.set_totals", """
+    UPDATE billing_period
+    SET due_count = ?, total_amount = ?, duration_seconds = ?
+    WHERE id = ?
+""")
+
+def post_monthly_fees(year=None, month=None):
+    """
+    Bills the monthly_fee of every student enrolled by the end of one month
+    (default: the current one).
+    Idempotent: a month that already has a generated billing_period is skipped.
+    All dues are inserted with one INSERT ... SELECT in one transaction.
+    Returns (True, stats) or (False, error_message).
+    stats: due_type, already_billed, inserted, total_amount, seconds
+    """
+    today = datetime.now()
+    year = year or today.year
+    month = month or today.month
+    due_type = monthly_fee_due_type(year, month)
+    stats = {"due_type": due_type, "already_billed": False, "inserted": 0, "total_amount": 0.0, "seconds": 0.0}
+
+    conn = connect_db()
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    try:
+        # BEGIN IMMEDIATE takes the write lock first, so two desks starting
+        # at the same time cannot both decide the month is unbilled.
+        cursor.execute("BEGIN IMMEDIATE")
+        if find_billing_period(cursor, MONTHLY_FEE_KIND, year, month):
+            stats["already_billed"] = True
+            conn.rollback()
+            return True, stats
+
+        queries.execute(cursor, "billing_periods.mark_generated",
+                        (MONTHLY_FEE_KIND, year, month, today.strftime("%Y-%m-%d %H:%M:%S")))
+        billing_period_id = queries.fetch_one(cursor, "billing_periods.id", (MONTHLY_FEE_KIND, year, month))[0]
+
+        month_end = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+        queries.execute(cursor, "dues.post_monthly_fees",
+                        (due_type, f"{year}-{month:02d}-10", billing_period_id, month_end))
+        stats["inserted"] = cursor.rowcount
+
+        stats["total_amount"] = queries.fetch_one(cursor, "dues.total_for_period", (billing_period_id,))[0]
+        stats["seconds"] = time.perf_counter() - start
+        queries.execute(cursor, "billing_periods.set_totals",
+                        (stats["inserted"], stats["total_amount"], stats["seconds"], billing_period_id))
+
+        conn.commit()
+        return True, stats
+    except Exception as e:
+        print(f"[ERROR] post_monthly_fees: {e}")
+        conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
+
+_BILLING_PERIOD_SUMMARY = """
+    SELECT
+        bp.id as billing_period_id,
+        bp.kind,
+        bp.year,
+        bp.month,
+        bp.generated_at,
+        bp.due_count,
+        bp.total_amount,
+        -- Paid dues may have been moved to the archive, so count what is still open
+        bp.due_count - COALESCE(SUM(CASE WHEN pd.status != 'paid' THEN 1 ELSE 0 END), 0) as paid_count,
+        COALESCE(SUM(CASE WHEN pd.status != 'paid' THEN pd.amount_due ELSE 0 END), 0) as outstanding_amount
+    FROM billing_period bp
+    LEFT JOIN pending_due pd ON pd.billing_period_id = bp.id
+    {where}
+    GROUP BY bp.id ORDER BY bp.year DESC, bp.month DESC
+"""
+queries.register("billing_periods.summary", _BILLING_PERIOD_SUMMARY.format(where=""))
+queries.register("billing_periods.summary_by_kind", _BILLING_PERIOD_SUMMARY.format(where="WHERE bp.kind = ?"))
+
+def get_billing_period_summary(kind=None):
+    """
+    Per-period billing report: what was generated and how much of it has
+    been paid so far. Uses the pending_due(billing_period_id) index.
+    """
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        if kind:
+            rows = queries.fetch_all(cursor, "billing_periods.summary_by_kind", (kind,))
+        else:
+            rows = queries.fetch_all(cursor, "billing_periods.summary")
+        results = [dict(row) for row in rows]
+        return results
+    except Exception as e:
+        print(f"[ERROR] get_billing_period_summary: {e}")
+        return []
+    finally:
+        conn.close()
+
+queries.register("dues.pending_for_student", """
+    SELECT due_type, amount_due, due_date, status
+    FROM pending_due
+    WHERE student_id = ? AND status != 'paid'
+    ORDER BY due_date ASC
+""")
+
 def get_student_pending_dues(student_id):
     """Fetches all unpaid dues for a given student ID."""
     conn = connect_db()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    query = """
-        SELECT due_type, amount_due, due_date, status
-        FROM pending_due
-        WHERE student_id = ? AND status != 'paid'
-        ORDER BY due_date ASC
-    """
     try:
-        cursor.execute(query, (student_id,))
-        results = [dict(row) for row in cursor.fetchall()]
+        results = [dict(row) for row in queries.fetch_all(cursor, "dues.pending_for_student", (student_id,))]
         return results
     except Exception as e:
         print(f"[ERROR] get_student_pending_dues: {e}")
@@ -105,35 +311,33 @@ def get_student_pending_dues(student_id):
     finally:
         conn.close()
 
+queries.register("dues.unpaid_for_student", """
+    SELECT
+        pd.id as pending_due_id,
+        pd.due_type,
+        pd.amount_due,
+        pd.due_date,
+        pd.status,
+        COALESCE(SUM(pr.amount_paid), 0) as total_paid,
+        (pd.amount_due - COALESCE(SUM(pr.amount_paid), 0)) as amount_remaining
+    FROM pending_due pd
+    LEFT JOIN payment_record pr ON pd.id = pr.pending_due_id
+    WHERE pd.student_id = ?
+    GROUP BY pd.id, pd.due_type, pd.amount_due, pd.due_date, pd.status
+    HAVING pd.status != 'paid' AND amount_remaining > 0
+    ORDER BY pd.due_date ASC
+""")
+
 def get_unpaid_dues_for_student(student_id):
     """
     Fetches all dues for a student that are not fully paid.
     Calculates what has already been paid.
     """
     conn = connect_db()
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    query = """
-        SELECT
-            pd.id as pending_due_id,
-            pd.due_type,
-            pd.amount_due,
-            pd.due_date,
-            pd.status,
-            COALESCE(SUM(pr.amount_paid), 0) as total_paid,
-            (pd.amount_due - COALESCE(SUM(pr.amount_paid), 0)) as amount_remaining
-        FROM pending_due pd
-        LEFT JOIN payment_record pr ON pd.id = pr.pending_due_id
-        WHERE pd.student_id = ?
-        GROUP BY pd.id, pd.due_type, pd.amount_due, pd.due_date, pd.status
-        HAVING pd.status != 'paid' AND amount_remaining > 0
-        ORDER BY pd.due_date ASC
-    """
-    try:
-        cursor.execute(query, (student_id,))
-        results = [dict(row) for row in cursor.fetchall()]
-        return results
+    try:
+        return queries.fetch_all(cursor, "dues.unpaid_for_student", (student_id,), DueSummary)
     except Exception as e:
         print(f"[ERROR] get_unpaid_dues_for_student: {e}")
         return []
@@ -149,41 +353,12 @@ def make_payment(pending_due_id, amount_paid, payment_mode, payment_timestamp, r
     """
     conn = connect_db()
     cursor = conn.cursor()
-    new_payment_id = None
     
     try:
         cursor.execute("BEGIN")
-        
-        cursor.execute("""
-            INSERT INTO payment_record (pending_due_id, amount_paid, payment_timestamp, payment_mode, received_by_user)
-            VALUES (?, ?, ?, ?, ?)
-        """, (pending_due_id, amount_paid, payment_timestamp, payment_mode, received_by_user))
-        
-        new_payment_id = cursor.lastrowid
-        
-        cursor.execute("SELECT amount_due FROM pending_due WHERE id = ?", (pending_due_id,))
-        row = cursor.fetchone()
-        if not row:
-            raise Exception("Pending due not found")
-        amount_due = row[0]
-        
-        cursor.execute("""
-            SELECT SUM(amount_paid) 
-            FROM payment_record 
-            WHERE pending_due_id = ?
-        """, (pending_due_id,))
-        total_paid = cursor.fetchone()[0]
-        
-        new_status = 'partially paid'
-        if total_paid >= amount_due:
-            new_status = 'paid'
-            
-        cursor.execute("""
-            UPDATE pending_due 
-            SET status = ? 
-            WHERE id = ?
-        """, (new_status, pending_due_id))
-        
+        new_status, new_payment_id = apply_payment(
+            cursor, pending_due_id, amount_paid, payment_mode, payment_timestamp, received_by_user
+        )
         conn.commit()
         return True, new_status, new_payment_id
         
@@ -194,61 +369,374 @@ def make_payment(pending_due_id, amount_paid, payment_mode, payment_timestamp, r
     finally:
         conn.close()
 
+# due_history also covers dues moved to the archive database
+queries.register("dues.history_for_student", """
+    SELECT pending_due_id, due_type, amount_due, due_date, status, total_paid, amount_remaining
+    FROM due_history
+    WHERE student_id = ?
+    ORDER BY due_date DESC
+""")
+
 def get_all_student_dues_with_summary(student_id):
     """
     Fetches ALL dues for a student (paid, unpaid, etc.) and
     calculates their payment summary.
     """
-    conn = connect_db()
-    conn.row_factory = sqlite3.Row
+    conn = connect_history_db()
     cursor = conn.cursor()
     
-    query = """
-        SELECT
-            pd.id as pending_due_id,
-            pd.due_type,
-            pd.amount_due,
-            pd.due_date,
-            pd.status,
-            COALESCE(SUM(pr.amount_paid), 0) as total_paid,
-            (pd.amount_due - COALESCE(SUM(pr.amount_paid), 0)) as amount_remaining
-        FROM pending_due pd
-        LEFT JOIN payment_record pr ON pd.id = pr.pending_due_id
-        WHERE pd.student_id = ?
-        GROUP BY pd.id, pd.due_type, pd.amount_due, pd.due_date, pd.status
-        ORDER BY pd.due_date DESC
-    """
-    try:
-        cursor.execute(query, (student_id,))
-        results = [dict(row) for row in cursor.fetchall()]
-        return results
+    try:
+        return queries.fetch_all(cursor, "dues.history_for_student", (student_id,), DueSummary)
     except Exception as e:
         print(f"[ERROR] get_all_student_dues_with_summary: {e}")
         return []
     finally:
         conn.close()
 
+# Newest first; pending_due_id breaks ties between dues sharing a due date.
+# Each tier seeks on its (student_id, due_date) index and only the dues on
+# the page get their payments summed, so a page never aggregates the whole
+# history the way the due_history view does.
+_DUE_PAGE_TIER = """
+        SELECT id, due_type, amount_due, due_date, status
+        FROM {tier}.pending_due
+        WHERE student_id = ? {after}
+"""
+_DUE_HISTORY_PAGE = """
+    SELECT d.id as pending_due_id, d.due_type, d.amount_due, d.due_date, d.status,
+           d.total_paid, (d.amount_due - d.total_paid) as amount_remaining
+    FROM (
+        SELECT page.*,
+               COALESCE((SELECT SUM(amount_paid) FROM main.payment_record WHERE pending_due_id = page.id), 0)
+             + COALESCE((SELECT SUM(amount_paid) FROM archive.payment_record WHERE pending_due_id = page.id), 0)
+               as total_paid
+        FROM ({main} UNION ALL {archive} ORDER BY due_date DESC, id DESC LIMIT ?) page
+    ) d
+    ORDER BY d.due_date DESC, d.id DESC
+"""
+_AFTER_DUE = "AND (due_date, id) < (?, ?)"
+for _name, _after in (("dues.history_page", ""), ("dues.history_page_after", _AFTER_DUE)):
+    queries.register(_name, _DUE_HISTORY_PAGE.format(
+        main=_DUE_PAGE_TIER.format(tier="main", after=_after),
+        archive=_DUE_PAGE_TIER.format(tier="archive", after=_after),
+    ))
+queries.register("dues.history_count", """
+    SELECT (SELECT COUNT(*) FROM main.pending_due WHERE student_id = ?)
+         + (SELECT COUNT(*) FROM archive.pending_due WHERE student_id = ?)
+""")
+
+def get_student_dues_page(student_id, cursor=None, page_size=DEFAULT_PAGE_SIZE, with_total=False):
+    """
+    One page of get_all_student_dues_with_summary() (DueSummary), newest
+    due first. Pass the returned Page's next_cursor back for the next page.
+    """
+    conn = connect_history_db()
+    db_cursor = conn.cursor()
+    try:
+        if cursor:
+            name, tier_params = "dues.history_page_after", (student_id, *decode_cursor("dues", cursor))
+        else:
+            name, tier_params = "dues.history_page", (student_id,)
+        params = tier_params * 2  # Once per tier
+        items, next_cursor = fetch_page(db_cursor, name, params, clamp_page_size(page_size), "dues",
+                                        lambda due: [due.due_date, due.pending_due_id], DueSummary)
+        total = None
+        if with_total and not cursor:
+            total = queries.fetch_one(db_cursor, "dues.history_count", (student_id, student_id))[0]
+        return Page(items, next_cursor, total)
+    except Exception as e:
+        print(f"[ERROR] get_student_dues_page: {e}")
+        return EMPTY_PAGE
+    finally:
+        conn.close()
+
+queries.register("payments.history_for_due", """
+    SELECT payment_timestamp, amount_paid, payment_mode, received_by_user, id as payment_id
+    FROM payment_history
+    WHERE pending_due_id = ?
+    ORDER BY payment_timestamp ASC
+""")
+
 def get_payments_for_due(pending_due_id):
     """
     Fetches all individual payment records (installments) for a
     single pending due, ordered by date.
     """
-    conn = connect_db()
-    conn.row_factory = sqlite3.Row
+    conn = connect_history_db()
     cursor = conn.cursor()
     
-    query = """
-        SELECT payment_timestamp, amount_paid, payment_mode, received_by_user
-        FROM payment_record
-        WHERE pending_due_id = ?
-        ORDER BY payment_timestamp ASC
-    """
     try:
-        cursor.execute(query, (pending_due_id,))
-        results = [dict(row) for row in cursor.fetchall()]
-        return results
+        return queries.fetch_all(cursor, "payments.history_for_due", (pending_due_id,), PaymentRecord)
     except Exception as e:
         print(f"[ERROR] get_payments_for_due: {e}")
         return []
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+# Oldest first; the payment id breaks ties between same-second payments
+_PAYMENT_HISTORY_PAGE = """
+    SELECT id, payment_timestamp, amount_paid, payment_mode, received_by_user
+    FROM payment_history
+    WHERE pending_due_id = ? {after}
+    ORDER BY payment_timestamp ASC, id ASC
+    LIMIT ?
+"""
+queries.register("payments.history_page", _PAYMENT_HISTORY_PAGE.format(after=""))
+queries.register("payments.history_page_after",
+                 _PAYMENT_HISTORY_PAGE.format(after="AND (payment_timestamp, id) > (?, ?)"))
+queries.register("payments.history_count", "SELECT COUNT(*) FROM payment_history WHERE pending_due_id = ?")
+
+def get_payments_for_due_page(pending_due_id, cursor=None, page_size=DEFAULT_PAGE_SIZE, with_total=False):
+    """
+    One page of get_payments_for_due() (PaymentRecord), oldest first.
+    Pass the returned Page's next_cursor back for the next page.
+    """
+    conn = connect_history_db()
+    db_cursor = conn.cursor()
+    try:
+        if cursor:
+            name, params = "payments.history_page_after", (pending_due_id, *decode_cursor("payments", cursor))
+        else:
+            name, params = "payments.history_page", (pending_due_id,)
+        # The payment id comes first for the cursor; it is PaymentRecord's last field
+        rows, next_cursor = fetch_page(db_cursor, name, params, clamp_page_size(page_size), "payments",
+                                       lambda row: [row[1], row[0]])
+        total = None
+        if with_total and not cursor:
+            total = queries.fetch_one(db_cursor, "payments.history_count", (pending_due_id,))[0]
+        return Page([PaymentRecord._make(row[1:] + row[:1]) for row in rows], next_cursor, total)
+    except Exception as e:
+        print(f"[ERROR] get_payments_for_due_page: {e}")
+        return EMPTY_PAGE
+    finally:
+        conn.close()
+
+# --- Receipts ---
+
+# One branch per tier (dues are archived together with their payments).
+# The balance after each payment sums that due's payments up to it.
+_RECEIPT_TIER = """
+    SELECT pr.id as receipt_id, pr.payment_timestamp, pr.amount_paid, pr.payment_mode,
+           pr.received_by_user as received_by, s.id as student_id,
+           f.first_name || ' ' || COALESCE(f.middle_name || ' ', '') || f.last_name as student_name,
+           pd.due_type,
+           pd.amount_due - (SELECT SUM(p2.amount_paid) FROM {tier}.payment_record p2
+                            WHERE p2.pending_due_id = pr.pending_due_id AND p2.id <= pr.id) as amount_remaining
+    FROM {tier}.payment_record pr
+    JOIN {tier}.pending_due pd ON pd.id = pr.pending_due_id
+    JOIN main.student s ON s.id = pd.student_id
+    JOIN main.fullname f ON f.person_id = s.person_id
+    WHERE {where}
+"""
+# A day's receipts come in payment time order, which its index already has
+for _name, _where, _order in [
+    ("receipts.by_ids", "pr.id IN (SELECT value FROM json_each(?1))", "receipt_id"),
+    ("receipts.for_day", "pr.payment_timestamp >= ?1 AND pr.payment_timestamp < ?2", "payment_timestamp, receipt_id"),
+]:
+    queries.register(_name, " UNION ALL ".join(
+        _RECEIPT_TIER.format(tier=tier, where=_where) for tier in ("main", "archive")
+    ) + f" ORDER BY {_order}")
+
+def get_receipts(payment_ids):
+    """ReceiptRecord for each payment_record id (archived ones included), in id order."""
+    conn = connect_history_db()
+    cursor = conn.cursor()
+    try:
+        return queries.fetch_all(cursor, "receipts.by_ids", (json.dumps([int(i) for i in payment_ids]),),
+                                 ReceiptRecord)
+    except Exception as e:
+        print(f"[ERROR] get_receipts: {e}")
+        return []
+    finally:
+        conn.close()
+
+def get_receipts_for_day(day):
+    """ReceiptRecord for every payment taken on day ("YYYY-MM-DD"), in payment time order."""
+    start = datetime.strptime(day, "%Y-%m-%d")
+    conn = connect_history_db()
+    cursor = conn.cursor()
+    try:
+        return queries.fetch_all(cursor, "receipts.for_day", (
+            start.strftime("%Y-%m-%d %H:%M:%S"), (start + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+        ), ReceiptRecord)
+    except Exception as e:
+        print(f"[ERROR] get_receipts_for_day: {e}")
+        return []
+    finally:
+        conn.close()
+
+# --- Bulk due assignment ---
+
+# Student columns a bulk-due filter expression may use, e.g. "class = 9 and monthly_fee >= 3000"
+BULK_DUE_FILTER_FIELDS = {
+    "class": "s.class",
+    "monthly_fee": "s.monthly_fee",
+    "annual_fund": "s.annual_fund",
+    "date_of_admission": "s.date_of_admission",
+    "family_ssn": "fam.family_SSN",
+    "gender": "p.gender",
+    "address": "p.address",
+}
+BULK_DUE_FILTER_OPERATORS = ("<=", ">=", "!=", "=", "<", ">")
+
+# One "field op value" clause; a quoted value may contain spaces and "and"
+_BULK_DUE_FILTER_CLAUSE = re.compile(r"""
+    \s*(?P<field>\w+)\s*(?P<op><=|>=|!=|=|<|>)\s*
+    (?:'(?P<single>[^']*)'|"(?P<double>[^"]*)"|(?P<bare>[^'"\s].*?)(?=\s+and\s+|\s*$))\s*
+""", re.VERBOSE | re.IGNORECASE)
+_BULK_DUE_FILTER_AND = re.compile(r"and\s+", re.IGNORECASE)
+
+def _parse_bulk_due_filter(expression):
+    """
+    Turns "field op value [and field op value ...]" into a list of
+    [field, op, value] conditions for the dues.bulk_*_filter statements.
+    Values may be quoted ('Sand and Co'). Only BULK_DUE_FILTER_FIELDS and
+    the plain comparison operators are accepted. Raises ValueError otherwise.
+    """
+    expression = expression.strip()
+    conditions = []
+    pos = 0
+    while True:
+        match = _BULK_DUE_FILTER_CLAUSE.match(expression, pos)
+        if not match:
+            clause = re.split(r"\s+and\s+", expression[pos:], maxsplit=1, flags=re.IGNORECASE)[0]
+            raise ValueError(f"Filter clause has no comparison: '{clause}'")
+        field = match["field"].lower()
+        value = next((v for v in (match["single"], match["double"], match["bare"]) if v is not None), "").strip()
+        if field not in BULK_DUE_FILTER_FIELDS:
+            raise ValueError(f"Unknown filter field '{field}'. Use one of: {', '.join(BULK_DUE_FILTER_FIELDS)}")
+        if not value:
+            raise ValueError(f"Filter clause has no value: '{match.group().strip()}'")
+        conditions.append([field, match["op"], float(value) if field in ("monthly_fee", "annual_fund") else value])
+        pos = match.end()
+        if pos == len(expression):
+            return conditions
+        separator = _BULK_DUE_FILTER_AND.match(expression, pos)
+        if not separator:
+            raise ValueError(f"Expected 'and' before: '{expression[pos:]}'")
+        pos = separator.end()
+
+def _bulk_due_target(target_kind, target_value):
+    """
+    Returns the ?1 parameter of the dues.bulk_*_<target_kind> statements.
+    target_kind: 'all', 'class' (class name), 'families' (list of family SSNs)
+    or 'filter' (expression, see _parse_bulk_due_filter).
+    """
+    if target_kind == "all":
+        return None
+    if target_kind == "class":
+        return str(target_value).strip()
+    if target_kind == "families":
+        ssns = [ssn.strip() for ssn in target_value if ssn.strip()]
+        if not ssns:
+            raise ValueError("No family SSNs given.")
+        return json.dumps(ssns)
+    if target_kind == "filter":
+        return json.dumps(_parse_bulk_due_filter(target_value))
+    raise ValueError(f"Unknown target: {target_kind}")
+
+BULK_DUE_FROM = """
+    FROM student s
+    JOIN person p ON s.person_id = p.id
+    LEFT JOIN family fam ON s.family_id = fam.id
+"""
+
+# A filter is a JSON array of [field, op, value]: a student matches when no
+# condition is false (a NULL column fails its condition, as in a plain WHERE).
+_BULK_DUE_FILTER = """NOT EXISTS (
+        SELECT 1 FROM json_each(?1) c
+        WHERE NOT COALESCE((
+            SELECT CASE op
+                {}
+            END
+            FROM (SELECT c.value ->> '$[1]' AS op, c.value ->> '$[2]' AS value,
+                         CASE c.value ->> '$[0]'
+                             {}
+                         END AS field_value)
+        ), 0)
+    )""".format(
+    "\n                ".join(f"WHEN '{op}' THEN field_value {op} value" for op in BULK_DUE_FILTER_OPERATORS),
+    "\n                             ".join(f"WHEN '{field}' THEN {column}"
+                                         for field, column in BULK_DUE_FILTER_FIELDS.items()),
+)
+
+# One variant per target kind, the target always bound to ?1 ('all' binds NULL)
+for _kind, _where in [
+    ("all", "?1 IS NULL"),
+    ("class", "s.class = ?1"),
+    ("families", "fam.family_SSN IN (SELECT value FROM json_each(?1))"),
+    ("filter", _BULK_DUE_FILTER),
+]:
+    queries.register(f"dues.bulk_preview_{_kind}", f"""
+        SELECT
+            COUNT(*),
+            COALESCE(SUM(EXISTS (
+                SELECT 1 FROM pending_due pd
+                WHERE pd.student_id = s.id AND pd.due_type = ?2 AND pd.due_date = ?3
+            )), 0)
+        {BULK_DUE_FROM}
+        WHERE {_where}
+    """)
+    queries.register(f"dues.bulk_count_{_kind}", f"SELECT COUNT(*) {BULK_DUE_FROM} WHERE {_where}")
+    queries.register(f"dues.bulk_insert_{_kind}", f"""
+        INSERT INTO pending_due (student_id, due_type, amount_due, due_date, status)
+        SELECT s.id, ?2, ?3, ?4, 'unpaid'
+        {BULK_DUE_FROM}
+        WHERE {_where}
+          AND NOT EXISTS (
+              SELECT 1 FROM pending_due pd
+              WHERE pd.student_id = s.id AND pd.due_type = ?2 AND pd.due_date = ?4
+          )
+    """)
+
+def preview_bulk_due(target_kind, target_value, due_type, due_date):
+    """
+    Counts the students a bulk due would reach before anything is written.
+    Returns (True, targeted_count, already_charged_count) or (False, error_message, None).
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        target = _bulk_due_target(target_kind, target_value)
+        targeted, already_charged = queries.fetch_one(
+            cursor, f"dues.bulk_preview_{target_kind}", (target, due_type, due_date)
+        )
+        return True, targeted, already_charged
+    except Exception as e:
+        print(f"[ERROR] preview_bulk_due: {e}")
+        return False, str(e), None
+    finally:
+        conn.close()
+
+def assign_bulk_due(target_kind, target_value, due_type, amount, due_date):
+    """
+    Adds the same due to every targeted student with one INSERT ... SELECT
+    in one transaction. Idempotent: a student who already has a due with
+    this due_type and due_date is skipped, so re-running does not double-charge.
+    Returns (True, stats) or (False, error_message).
+    stats: targeted, inserted, skipped, seconds, rows_per_second
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    try:
+        target = _bulk_due_target(target_kind, target_value)
+        cursor.execute("BEGIN IMMEDIATE")
+        targeted = queries.fetch_one(cursor, f"dues.bulk_count_{target_kind}", (target,))[0]
+        queries.execute(cursor, f"dues.bulk_insert_{target_kind}", (target, due_type, amount, due_date))
+        inserted = cursor.rowcount
+        conn.commit()
+        seconds = time.perf_counter() - start
+        return True, {
+            "targeted": targeted,
+            "inserted": inserted,
+            "skipped": targeted - inserted,
+            "seconds": seconds,
+            "rows_per_second": inserted / seconds if seconds > 0 else 0.0,
+        }
+    except Exception as e:
+        print(f"[ERROR] assign_bulk_due: {e}")
+        conn.rollback()
+        return False, str(e)
+    finally:
+        conn.close()
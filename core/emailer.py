@@ -1,29 +1,446 @@
 # File: core/emailer.py
+"""
+Outgoing e-mail through a persistent outbox.
+
+queue_email() only inserts a row into email_outbox and wakes the sender,
+so callers (the signup window on the GUI thread) never wait for the
+network. The sender thread claims due messages in batches of up to
+BATCH_SIZE and sends them over one SMTP session (STARTTLS and login done
+once) that it keeps open while there is work and closes after
+IDLE_SECONDS. A failed message is retried with exponential backoff
+(RETRY_BASE_SECONDS doubling, up to RETRY_MAX_SECONDS) until
+MAX_ATTEMPTS; one the server refuses outright (5xx) fails at once.
+Pending messages survive restarts, and a row left 'sending' by a process
+that died is picked up again after SENDING_TIMEOUT.
+
+Bulk mail (due reminder campaigns, core.reminders) is queued in one
+transaction at BULK_PRIORITY, so a verification code queued meanwhile is
+claimed first. The sender sends no faster than CAMPUSCORE_SMTP_RATE
+messages per second, to stay under the provider's sending limits.
+
+The SMTP server, login and addresses come from CAMPUSCORE_SMTP_* and
+CAMPUSCORE_ADMIN_EMAIL, so a local stand-in (scripts/smtp_stub.py) can
+take the place of the real server.
+"""
+import os
 import random
 import smtplib
+import socket
+import ssl
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
+from core import queries
+from core.db_init import connect_db
+
+ADMIN_EMAIL = os.environ.get("CAMPUSCORE_ADMIN_EMAIL", "l230639@lhr.nu.edu.pk")
+
+# Messages sent over one session before the outbox is read again.
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 8
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+# How long a 'sending' row may stay claimed before another sender takes it.
+SENDING_TIMEOUT = 600
+# An unused session is closed after this long; checked with NOOP when older.
+IDLE_SECONDS = 60
+# How often the sender looks at the outbox when nobody wakes it.
+POLL_INTERVAL = 30
+SMTP_TIMEOUT = 30
+
+# Lower is sent first
+PRIORITY = 0
+BULK_PRIORITY = 10
+
+# Millisecond timestamps, so the send latency is measured below a second
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+def _fmt(dt):
+    return dt.strftime(TIME_FORMAT)[:-3]
 
-ADMIN_EMAIL = "l230639@lhr.nu.edu.pk"  # replace with actual admin email
+def _parse(text):
+    return datetime.strptime(text, TIME_FORMAT)
+
+def smtp_settings():
+    """
+    Where and as whom to send, from the environment (read on every connect).
+    There are no default credentials: without CAMPUSCORE_SMTP_USER the
+    session does not log in, and without a sender (CAMPUSCORE_SMTP_SENDER,
+    else the user) nothing can be sent.
+    """
+    user = os.environ.get("CAMPUSCORE_SMTP_USER", "")
+    return {
+        "host": os.environ.get("CAMPUSCORE_SMTP_HOST", "smtp.gmail.com"),
+        "port": int(os.environ.get("CAMPUSCORE_SMTP_PORT", "587")),
+        "starttls": os.environ.get("CAMPUSCORE_SMTP_STARTTLS", "1") == "1",
+        "user": user,
+        "password": os.environ.get("CAMPUSCORE_SMTP_PASSWORD", ""),
+        "sender": os.environ.get("CAMPUSCORE_SMTP_SENDER", "") or user,
+        # Messages per second at most; 0 for no limit
+        "rate": float(os.environ.get("CAMPUSCORE_SMTP_RATE", "5")),
+    }
 
 def generate_code():
     """Generate a random 6-digit verification code."""
     return str(random.randint(100000, 999999))
 
 def send_code(code):
-    """Send verification code to admin email (mocked with print for testing)."""
-    print(f"[DEBUG] Verification code sent to admin ({ADMIN_EMAIL}): {code}")
-
-    # Uncomment below to send real email via SMTP
-    sender_email = "mshaheerhussain902@gmail.com"
-    sender_password = "ulnj cgaq jiaj cvvj"
-    
-    msg = MIMEText(f"New Receptionist Sign-Up verification code: {code}")
-    msg['Subject'] = "Receptionist Sign-Up Code"
-    msg['From'] = sender_email
-    msg['To'] = ADMIN_EMAIL
-    
-    with smtplib.SMTP('smtp.gmail.com', 587) as server:
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.send_message(msg)
+    """Queues the verification code for the admin. Returns the outbox id, or None."""
+    print(f"[DEBUG] Verification code queued for admin ({ADMIN_EMAIL}): {code}")
+    return queue_email(ADMIN_EMAIL, "Receptionist Sign-Up Code",
+                       f"New Receptionist Sign-Up verification code: {code}")
+
+queries.register("outbox.insert", """
+    INSERT INTO email_outbox (recipient, subject, body, status, attempts, created_at, next_attempt_at,
+                              priority, campaign_id)
+    VALUES (?1, ?2, ?3, 'pending', 0, ?4, ?4, ?5, ?6)
+""")
+
+def queue_email(recipient, subject, body):
+    """Adds a message to the outbox and wakes the sender. Returns its id, or None on error."""
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        queries.execute(cursor, "outbox.insert", (recipient, subject, body, _fmt(datetime.now()), PRIORITY, None))
+        conn.commit()
+        email_id = cursor.lastrowid
+    except Exception as e:
+        print(f"[ERROR] queue_email: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+    get_email_sender().wake()
+    return email_id
+
+def insert_emails(cursor, messages, campaign_id=None, priority=BULK_PRIORITY):
+    """
+    Adds (recipient, subject, body) messages to the outbox using the
+    caller's cursor. Does not commit, and does not wake the sender.
+    """
+    now = _fmt(datetime.now())
+    queries.execute_many(cursor, "outbox.insert", [
+        (recipient, subject, body, now, priority, campaign_id) for recipient, subject, body in messages
+    ])
+
+def queue_emails(messages, campaign_id=None, priority=BULK_PRIORITY):
+    """
+    Adds many (recipient, subject, body) messages in one transaction and
+    wakes the sender once. Returns the number queued, or None on error.
+    """
+    messages = list(messages)
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        insert_emails(cursor, messages, campaign_id, priority)
+        conn.commit()
+    except Exception as e:
+        print(f"[ERROR] queue_emails: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+    get_email_sender().wake()
+    return len(messages)
+
+# Claims due rows, and rows whose sender has stopped answering
+queries.register("outbox.claim", """
+    UPDATE email_outbox
+    SET status = 'sending', claimed_by = ?1, claimed_at = ?2
+    WHERE id IN (
+        SELECT id FROM email_outbox
+        WHERE (status = 'pending' AND next_attempt_at <= ?2) OR (status = 'sending' AND claimed_at < ?3)
+        ORDER BY priority, next_attempt_at
+        LIMIT ?4
+    )
+""")
+queries.register("outbox.claimed", """
+    SELECT id, recipient, subject, body, attempts, created_at
+    FROM email_outbox
+    WHERE status = 'sending' AND claimed_by = ? AND claimed_at = ?
+    ORDER BY id
+""")
+queries.register("outbox.sent", """
+    UPDATE email_outbox
+    SET status = 'sent', attempts = attempts + 1, sent_at = ?, latency_seconds = ?, last_error = NULL,
+        claimed_by = NULL
+    WHERE id = ?
+""")
+queries.register("outbox.retry", """
+    UPDATE email_outbox
+    SET status = ?, attempts = attempts + 1, next_attempt_at = ?, last_error = ?, claimed_by = NULL
+    WHERE id = ?
+""")
+queries.register("outbox.next_attempt", "SELECT MIN(next_attempt_at) FROM email_outbox WHERE status = 'pending'")
+queries.register("outbox.depth", """
+    SELECT status, COUNT(*) FROM email_outbox
+    WHERE status IN ('pending', 'sending')
+    GROUP BY status
+""")
+queries.register("outbox.latency_since", """
+    SELECT COUNT(*), AVG(latency_seconds), MAX(latency_seconds)
+    FROM email_outbox
+    WHERE status = 'sent' AND sent_at >= ?
+""")
+
+def retry_delay(attempts):
+    """Seconds before attempt number attempts + 1: doubling, capped, with some jitter."""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+class EmailSender:
+    """
+    The background thread that drains email_outbox over one reused SMTP
+    session. Several processes may run one; each claims its own rows.
+    """
+    def __init__(self, batch_size=BATCH_SIZE, poll_interval=POLL_INTERVAL, idle_seconds=IDLE_SECONDS):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.idle_seconds = idle_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._smtp = None
+        self._last_used = 0.0
+        self._last_sent = 0.0
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(["sent", "failed", "retried", "batches", "connections", "throttled"], 0)
+        self._send_seconds = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="EmailSender", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stops after the batch in flight; unsent messages stay in the outbox."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._stop_event.set()
+            self._wake_event.set()
+            thread.join()
+
+    def wake(self):
+        """Makes the sender look at the outbox now (starting it if needed)."""
+        self.start()
+        self._wake_event.set()
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                if self._send_batch():
+                    continue
+                if self._smtp is not None and time.monotonic() - self._last_used > self.idle_seconds:
+                    self._close_session()
+                self._wake_event.wait(self._seconds_to_next_attempt())
+                self._wake_event.clear()
+        finally:
+            self._close_session()
+
+    def _seconds_to_next_attempt(self):
+        wait = self.poll_interval
+        if self._smtp is not None:
+            wait = min(wait, self.idle_seconds)
+        conn = connect_db()
+        try:
+            row = queries.fetch_one(conn.cursor(), "outbox.next_attempt")
+            if row and row[0]:
+                wait = min(wait, max(0.0, (_parse(row[0]) - datetime.now()).total_seconds()))
+        except Exception as e:
+            print(f"[ERROR] EmailSender: {e}")
+        finally:
+            conn.close()
+        return wait
+
+    def _claim(self):
+        now = datetime.now()
+        claimed_at = _fmt(now)
+        conn = connect_db()
+        cursor = conn.cursor()
+        try:
+            queries.execute(cursor, "outbox.claim", (
+                self.owner, claimed_at, _fmt(now - timedelta(seconds=SENDING_TIMEOUT)), self.batch_size
+            ))
+            conn.commit()
+            return queries.fetch_all(cursor, "outbox.claimed", (self.owner, claimed_at))
+        except Exception as e:
+            print(f"[ERROR] EmailSender claim: {e}")
+            conn.rollback()
+            return []
+        finally:
+            conn.close()
+
+    def _send_batch(self):
+        """Sends one claimed batch and records each result. Returns False when nothing was due."""
+        batch = self._claim()
+        if not batch:
+            return False
+        results = []  # (email_id, created_at, attempts, error or None, permanent)
+        seconds = 0.0
+        settings = smtp_settings()
+        if not settings["sender"]:
+            error = "SMTP is not configured: set CAMPUSCORE_SMTP_SENDER (or CAMPUSCORE_SMTP_USER)"
+            print(f"[ERROR] EmailSender: {error}")
+            self._record([(email_id, created_at, attempts, error, True)
+                          for email_id, _, _, _, attempts, created_at in batch], 0.0)
+            return True
+        rate = settings["rate"]
+        for email_id, recipient, subject, body, attempts, created_at in batch:
+            if rate > 0:
+                self._throttle(rate)
+            start = time.perf_counter()
+            try:
+                self._session().send_message(self._message(recipient, subject, body))
+                results.append((email_id, created_at, attempts, None, False))
+            except smtplib.SMTPRecipientsRefused as e:
+                results.append((email_id, created_at, attempts, str(e), True))
+            except smtplib.SMTPResponseException as e:
+                # smtplib resets the session after a refused message; 421 means the server is closing it.
+                # 5xx won't get better by retrying.
+                if e.smtp_code == 421:
+                    self._close_session()
+                results.append((email_id, created_at, attempts, f"{e.smtp_code} {e.smtp_error!r}",
+                                e.smtp_code >= 500 and not isinstance(e, smtplib.SMTPAuthenticationError)))
+            except (smtplib.SMTPException, OSError) as e:
+                self._close_session()
+                results.append((email_id, created_at, attempts, str(e) or type(e).__name__, False))
+            seconds += time.perf_counter() - start
+            self._last_used = time.monotonic()
+        self._record(results, seconds)
+        return True
+
+    def _throttle(self, rate):
+        """Waits until 1 / rate seconds have passed since the previous send started."""
+        wait = self._last_sent + 1.0 / rate - time.monotonic()
+        if wait > 0:
+            with self._lock:
+                self._counts["throttled"] += 1
+            time.sleep(wait)
+        self._last_sent = time.monotonic()
+
+    def _record(self, results, send_seconds):
+        now = datetime.now()
+        conn = connect_db()
+        cursor = conn.cursor()
+        counts = dict.fromkeys(["sent", "failed", "retried"], 0)
+        try:
+            for email_id, created_at, attempts, error, permanent in results:
+                if error is None:
+                    latency = (now - _parse(created_at)).total_seconds()
+                    queries.execute(cursor, "outbox.sent", (_fmt(now), latency, email_id))
+                    counts["sent"] += 1
+                elif permanent or attempts + 1 >= MAX_ATTEMPTS:
+                    queries.execute(cursor, "outbox.retry", ("failed", _fmt(now), error, email_id))
+                    counts["failed"] += 1
+                    print(f"[ERROR] EmailSender: message {email_id} failed: {error}")
+                else:
+                    next_attempt = now + timedelta(seconds=retry_delay(attempts + 1))
+                    queries.execute(cursor, "outbox.retry", ("pending", _fmt(next_attempt), error, email_id))
+                    counts["retried"] += 1
+            conn.commit()
+        except Exception as e:
+            print(f"[ERROR] EmailSender record: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+        with self._lock:
+            for name, count in counts.items():
+                self._counts[name] += count
+            self._counts["batches"] += 1
+            self._send_seconds += send_seconds
+
+    def _message(self, recipient, subject, body):
+        msg = MIMEText(body)
+        msg['Subject'] = subject
+        msg['From'] = smtp_settings()["sender"]
+        msg['To'] = recipient
+        return msg
+
+    def _session(self):
+        """The open SMTP session, checked with NOOP after a pause, or a new one."""
+        if self._smtp is not None and time.monotonic() - self._last_used > 5:
+            try:
+                if self._smtp.noop()[0] != 250:
+                    self._close_session()
+            except (smtplib.SMTPException, OSError):
+                self._close_session()
+        if self._smtp is None:
+            settings = smtp_settings()
+            smtp = smtplib.SMTP(settings["host"], settings["port"], timeout=SMTP_TIMEOUT)
+            try:
+                if settings["starttls"]:
+                    smtp.starttls(context=ssl.create_default_context())
+                if settings["user"] and not settings["password"]:
+                    print("[ERROR] EmailSender: CAMPUSCORE_SMTP_USER is set without CAMPUSCORE_SMTP_PASSWORD; "
+                          "sending without logging in")
+                elif settings["user"]:
+                    smtp.login(settings["user"], settings["password"])
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            with self._lock:
+                self._counts["connections"] += 1
+        return self._smtp
+
+    def _close_session(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts, send_seconds=self._send_seconds)
+        attempts = stats["sent"] + stats["failed"] + stats["retried"]
+        stats["avg_send_ms"] = stats["send_seconds"] / attempts * 1000 if attempts else 0.0
+        return stats
+
+_shared_sender = None
+_shared_lock = threading.Lock()
+
+def get_email_sender():
+    """Returns the process-wide EmailSender (started by wake() / start())."""
+    global _shared_sender
+    with _shared_lock:
+        if _shared_sender is None:
+            _shared_sender = EmailSender()
+        return _shared_sender
 
+def get_outbox_stats(hours=24):
+    """
+    Queue depth (pending, sending) from the outbox, sent count and average /
+    max latency (queued -> sent) over the last hours, and this process's
+    sender counters (sent, failed, retried, batches, connections, throttled,
+    avg_send_ms).
+    Returns None on error.
+    """
+    since = _fmt(datetime.now() - timedelta(hours=hours))
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        depth = dict(queries.fetch_all(cursor, "outbox.depth"))
+        sent, avg_latency, max_latency = queries.fetch_one(cursor, "outbox.latency_since", (since,))
+    except Exception as e:
+        print(f"[ERROR] get_outbox_stats: {e}")
+        return None
+    finally:
+        conn.close()
+    return {
+        "pending": depth.get("pending", 0),
+        "sending": depth.get("sending", 0),
+        "sent_recently": sent,
+        "avg_latency_seconds": avg_latency or 0.0,
+        "max_latency_seconds": max_latency or 0.0,
+        "sender": get_email_sender().stats(),
+    }
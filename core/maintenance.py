@@ -0,0 +1,182 @@
+# SMS/core/maintenance.py
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from core import db_init
+from core.db_init import connect_db
+
+# In the order run_maintenance() runs them.
+MAINTENANCE_TASKS = ["optimize", "enable_auto_vacuum", "incremental_vacuum", "wal_checkpoint", "quick_check"]
+# What the nightly job and the GUI run: everything but the one-time full VACUUM,
+# which rewrites the whole file and is left to `campuscore maintenance run`.
+SCHEDULED_TASKS = [task for task in MAINTENANCE_TASKS if task != "enable_auto_vacuum"]
+# Rows ANALYZE samples per index; keeps the statistics pass short on big tables.
+ANALYSIS_LIMIT = 1000
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Maintenance")
+
+def _task_optimize(conn):
+    """Refreshes the planner statistics (sqlite_stat1)."""
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    tables = conn.execute("SELECT COUNT(DISTINCT tbl) FROM sqlite_stat1").fetchone()[0]
+    return True, f"statistics for {tables} table(s)"
+
+def _task_enable_auto_vacuum(conn):
+    """
+    Switches a database created before auto_vacuum was enabled to
+    incremental mode. Takes one full VACUUM, which locks the database for
+    as long as it rewrites the file, so only run it when the desks are idle.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return True, "already incremental"
+    freelist_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True, f"switched to incremental auto_vacuum (full VACUUM, {freelist_before} free pages reclaimed)"
+
+def _task_incremental_vacuum(conn):
+    """
+    Returns free pages (left by deletes such as update_student's contact
+    rewrite, or archiving) to the OS. Needs incremental auto_vacuum (see
+    enable_auto_vacuum).
+    """
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode != 2:
+        return True, (f"skipped (auto_vacuum={AUTO_VACUUM_MODES.get(mode, mode)}; "
+                      f"run `campuscore maintenance run --task enable_auto_vacuum` once)")
+    freelist_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # Each sqlite3_step frees one page and execute() only steps once;
+    # executescript() steps the pragma to completion.
+    conn.executescript("PRAGMA incremental_vacuum;")
+    return True, f"{freelist_before} free pages reclaimed"
+
+def _task_wal_checkpoint(conn):
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+        return True, "skipped (not in WAL mode)"
+    busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    if busy:
+        return False, f"checkpoint blocked by readers ({checkpointed}/{log_frames} frames)"
+    return True, f"{checkpointed} frames checkpointed"
+
+def _task_quick_check(conn):
+    rows = [row[0] for row in conn.execute("PRAGMA quick_check")]
+    if rows == ["ok"]:
+        return True, "ok"
+    return False, "; ".join(rows[:5])
+
+TASK_FUNCTIONS = {
+    "optimize": _task_optimize,
+    "enable_auto_vacuum": _task_enable_auto_vacuum,
+    "incremental_vacuum": _task_incremental_vacuum,
+    "wal_checkpoint": _task_wal_checkpoint,
+    "quick_check": _task_quick_check,
+}
+
+def _record_run(task, started_at, duration, status, detail):
+    conn = connect_db()
+    try:
+        conn.execute("""
+            INSERT INTO maintenance_run (task, started_at, duration_seconds, status, detail)
+            VALUES (?, ?, ?, ?, ?)
+        """, (task, started_at, duration, status, detail))
+        conn.commit()
+    finally:
+        conn.close()
+
+def run_maintenance(tasks=None, progress_callback=None):
+    """
+    Runs the given maintenance tasks (default: all, in MAINTENANCE_TASKS
+    order) and records each one's duration and result in maintenance_run.
+    progress_callback(done, total) is called after each task.
+    Returns (all_ok, {task: {"status", "seconds", "detail"}}).
+    """
+    tasks = tasks or MAINTENANCE_TASKS
+    results = {}
+    all_ok = True
+    for i, task in enumerate(tasks, start=1):
+        started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        start = time.perf_counter()
+        # VACUUM and the pragmas can't run inside a transaction
+        conn = connect_db()
+        conn.isolation_level = None
+        try:
+            ok, detail = TASK_FUNCTIONS[task](conn)
+        except Exception as e:
+            ok, detail = False, str(e)
+        finally:
+            conn.close()
+        duration = time.perf_counter() - start
+        status = "success" if ok else "failed"
+        try:
+            _record_run(task, started_at, duration, status, detail)
+        except Exception as e:
+            print(f"[ERROR] run_maintenance could not record '{task}': {e}")
+        results[task] = {"status": status, "seconds": duration, "detail": detail}
+        all_ok = all_ok and ok
+        if progress_callback:
+            progress_callback(i, len(tasks))
+    return all_ok, results
+
+def start_maintenance(tasks=None, progress_callback=None):
+    """
+    Runs run_maintenance on the background worker, so the GUI stays responsive.
+    tasks defaults to SCHEDULED_TASKS. Returns a Future resolving to its
+    (all_ok, results) result.
+    """
+    return _executor.submit(run_maintenance, tasks or SCHEDULED_TASKS, progress_callback)
+
+def get_database_health():
+    """
+    Size and fragmentation figures for the live database, plus the last run
+    of each maintenance task. Per-table figures come from the dbstat virtual
+    table and are left empty on SQLite builds without it.
+    """
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    try:
+        pragma = lambda name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+        page_size, page_count, freelist_count = pragma("page_size"), pragma("page_count"), pragma("freelist_count")
+        health = {
+            "path": db_init.DB_PATH,
+            "file_bytes": os.path.getsize(db_init.DB_PATH) if os.path.exists(db_init.DB_PATH) else None,
+            "page_size": page_size,
+            "page_count": page_count,
+            "freelist_count": freelist_count,
+            "free_bytes": freelist_count * page_size,
+            "freelist_ratio": freelist_count / page_count if page_count else 0.0,
+            "auto_vacuum": AUTO_VACUUM_MODES.get(pragma("auto_vacuum"), "unknown"),
+            "journal_mode": pragma("journal_mode"),
+            "analyzed": conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone() is not None,
+            "tables": [],
+        }
+        try:
+            # unused_ratio: share of each table's pages that holds no data (internal fragmentation)
+            health["tables"] = [dict(row) for row in conn.execute("""
+                SELECT name, COUNT(*) as pages, SUM(pgsize) as bytes,
+                       CAST(SUM(unused) AS REAL) / SUM(pgsize) as unused_ratio
+                FROM dbstat
+                GROUP BY name
+                ORDER BY bytes DESC
+            """)]
+        except sqlite3.OperationalError:
+            pass
+
+        health["last_runs"] = [dict(row) for row in conn.execute("""
+            SELECT task, started_at, duration_seconds, status, detail
+            FROM maintenance_run
+            WHERE id IN (SELECT MAX(id) FROM maintenance_run GROUP BY task)
+            ORDER BY task
+        """)]
+        return health
+    except Exception as e:
+        print(f"[ERROR] get_database_health: {e}")
+        return None
+    finally:
+        conn.close()
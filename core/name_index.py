@@ -0,0 +1,165 @@
+# SMS/core/name_index.py
+"""
+Trigram index over person and family names for typo-tolerant search.
+
+Each name is lower-cased, reduced to letters and split into words; every
+word is padded ("  muhammad ") and cut into three-letter trigrams, which
+are stored in name_trigram (kind, trigram, ref_id). "Muhammad" and
+"Mohammad" share 6 of their 9 trigrams, so a misspelling still finds
+the right rows with one indexed lookup per trigram. Trigrams that a large
+share of all names contain ("  m", "ad ") are skipped like stop words, as
+they would only add long posting lists to count; name_trigram_count keeps
+the number of names per trigram, so telling them apart is one primary-key
+lookup each and only the rare posting lists are read. The candidates with
+the most shared trigrams are then ranked by edit distance in Python.
+
+The index is kept current by the write paths (index_person_name /
+index_family_name); initialize_db() backfills names it is missing.
+"""
+import json
+import re
+from functools import lru_cache
+from core import queries
+
+PERSON = "person"
+FAMILY = "family"
+
+# A candidate must share at least this share of the query's trigrams.
+MIN_SIMILARITY = 0.3
+# Candidates (by shared trigrams) that get an edit-distance score.
+CANDIDATE_LIMIT = 200
+# Query trigrams found in more than this share of the names are not looked up...
+COMMON_TRIGRAM_SHARE = 0.1
+# ...unless fewer than this many would be left; then the rarest ones are kept.
+MIN_QUERY_TRIGRAMS = 3
+
+def name_words(text):
+    """Lower-cased words of a name, letters only."""
+    return re.sub(r"[^a-z ]", " ", (text or "").lower()).split()
+
+def name_trigrams(text):
+    """The set of padded trigrams of every word in text."""
+    trigrams = set()
+    for word in name_words(text):
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+# Names repeat a lot (every "Muhammad", every "Khan"), so most pairs are cached
+@lru_cache(maxsize=65536)
+def edit_distance(a, b):
+    """Levenshtein distance (insert, delete, substitute each cost 1)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            cost = previous[j - 1] + (ca != cb)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[-1] + 1 < cost:
+                cost = current[-1] + 1
+            current.append(cost)
+        previous = current
+    return previous[-1]
+
+def name_distance(query, name):
+    """
+    How far name is from what was typed: each query word is matched to the
+    closest word of name, and the edit distances are summed relative to the
+    query length. 0.0 is an exact match (of every typed word).
+    """
+    return _words_distance(name_words(query), name_words(name))
+
+def _words_distance(query_words, words):
+    if not query_words or not words:
+        return 1.0
+    total = sum(min(edit_distance(q, w) for w in words) for q in query_words)
+    return total / sum(len(q) for q in query_words)
+
+queries.register("name_index.uncount", """
+    UPDATE name_trigram_count SET names = names - 1
+    WHERE kind = ?1 AND trigram IN (SELECT trigram FROM name_trigram WHERE kind = ?1 AND ref_id = ?2)
+""")
+queries.register("name_index.delete", "DELETE FROM name_trigram WHERE kind = ? AND ref_id = ?")
+queries.register("name_index.insert", "INSERT OR IGNORE INTO name_trigram (kind, trigram, ref_id) VALUES (?, ?, ?)")
+queries.register("name_index.count", """
+    INSERT INTO name_trigram_count (kind, trigram, names) VALUES (?, ?, 1)
+    ON CONFLICT (kind, trigram) DO UPDATE SET names = names + 1
+""")
+queries.register("name_index.frequencies", """
+    SELECT value, COALESCE((SELECT names FROM name_trigram_count WHERE kind = ?1 AND trigram = value), 0)
+    FROM json_each(?2)
+""")
+# MAX(ref_id) stands in for the number of names: ids are assigned in order
+queries.register("name_index.size", "SELECT MAX(ref_id) FROM name_trigram WHERE kind = ?")
+# "+ref_id" keeps the planner on the primary key (one seek per trigram)
+# instead of walking idx_name_trigram_ref for a sorted GROUP BY
+queries.register("name_index.candidates", """
+    SELECT ref_id, COUNT(*) as shared
+    FROM name_trigram
+    WHERE kind = ? AND trigram IN (SELECT value FROM json_each(?))
+    GROUP BY +ref_id
+    HAVING shared >= ?
+    ORDER BY shared DESC, ref_id
+    LIMIT ?
+""")
+
+def index_name(cursor, kind, ref_id, text):
+    """
+    Replaces the trigrams of one name, and their counts in
+    name_trigram_count, using the caller's cursor. Does not commit.
+    """
+    rows = [(kind, t, ref_id) for t in name_trigrams(text)]
+    queries.execute(cursor, "name_index.uncount", (kind, ref_id))
+    queries.execute(cursor, "name_index.delete", (kind, ref_id))
+    queries.execute_many(cursor, "name_index.insert", rows)
+    queries.execute_many(cursor, "name_index.count", [(kind, t) for kind, t, _ in rows])
+
+def index_person_name(cursor, person_id, first_name, middle_name, last_name):
+    index_name(cursor, PERSON, person_id, " ".join(n for n in (first_name, middle_name, last_name) if n))
+
+def index_family_name(cursor, family_id, family_name):
+    index_name(cursor, FAMILY, family_id, family_name)
+
+def find_candidates(cursor, kind, text, limit=CANDIDATE_LIMIT):
+    """
+    Returns [(ref_id, shared_trigrams)] for the names sharing at least
+    MIN_SIMILARITY of text's looked-up trigrams, most shared first.
+    """
+    trigrams = name_trigrams(text)
+    if not trigrams:
+        return []
+    frequencies = queries.fetch_all(cursor, "name_index.frequencies", (kind, json.dumps(sorted(trigrams))))
+    common = COMMON_TRIGRAM_SHARE * (queries.fetch_one(cursor, "name_index.size", (kind,))[0] or 0)
+    ranked = sorted((names, trigram) for trigram, names in frequencies if names)
+    lookup = [trigram for i, (names, trigram) in enumerate(ranked) if names <= common or i < MIN_QUERY_TRIGRAMS]
+    if not lookup:
+        return []
+    min_shared = max(1, round(len(lookup) * MIN_SIMILARITY))
+    return queries.fetch_all(cursor, "name_index.candidates",
+                             (kind, json.dumps(lookup), min_shared, limit))
+
+def rank_by_name(query, rows, name_of):
+    """Sorts rows by name_distance(query, name_of(row)), closest first (stable for ties)."""
+    query_words = name_words(query)
+    return sorted(rows, key=lambda row: _words_distance(query_words, name_words(name_of(row))))
+
+def backfill_name_index(cursor):
+    """
+    Migration: indexes every person and family name that has no trigrams
+    yet (names written before the index existed, or by other tools).
+    """
+    cursor.execute("""
+        SELECT person_id, first_name, middle_name, last_name FROM fullname f
+        WHERE NOT EXISTS (SELECT 1 FROM name_trigram t WHERE t.kind = 'person' AND t.ref_id = f.person_id)
+    """)
+    for person_id, first_name, middle_name, last_name in cursor.fetchall():
+        index_person_name(cursor, person_id, first_name, middle_name, last_name)
+    cursor.execute("""
+        SELECT id, family_name FROM family fam
+        WHERE NOT EXISTS (SELECT 1 FROM name_trigram t WHERE t.kind = 'family' AND t.ref_id = fam.id)
+    """)
+    for family_id, family_name in cursor.fetchall():
+        index_family_name(cursor, family_id, family_name)
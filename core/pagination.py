@@ -0,0 +1,59 @@
+# SMS/core/pagination.py
+"""
+Keyset (seek) pagination for the search and history APIs.
+
+A page is read with "WHERE <sort key> > <last key seen> ORDER BY <sort key>
+LIMIT n", so page 1000 costs the same as page 1 (there are no OFFSET rows to
+skip), and rows added or removed between requests never shift a page.
+The last key of a page goes back to the caller as an opaque cursor token,
+which it passes in to get the next page.
+"""
+import base64
+import json
+from collections import namedtuple
+from core import queries
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+class Page(namedtuple("Page", ["items", "next_cursor", "total"])):
+    """
+    items:       the rows of this page
+    next_cursor: token for the following page, or None on the last one
+    total:       matching rows when with_total was asked for on the first
+                 page (counted then, so it can drift as rows change), else None
+    """
+    __slots__ = ()
+
+EMPTY_PAGE = Page([], None, None)
+
+def encode_cursor(kind, key):
+    """Packs a sort key (a list of JSON values) into a token tagged with the API it belongs to."""
+    payload = json.dumps([kind, list(key)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(kind, token):
+    """Returns the sort key packed by encode_cursor(). Raises ValueError for a token from another API."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        token_kind, key = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid page cursor: {e}") from None
+    if token_kind != kind:
+        raise ValueError(f"Page cursor belongs to '{token_kind}', not '{kind}'")
+    return key
+
+def clamp_page_size(page_size):
+    return max(1, min(int(page_size), MAX_PAGE_SIZE))
+
+def fetch_page(cursor, name, params, page_size, kind, key_of, record_cls=None):
+    """
+    Runs a catalog query whose last parameter is the LIMIT, asking for one
+    row more than page_size to learn whether another page follows.
+    key_of(row) gives the sort key of a row. Returns (items, next_cursor).
+    """
+    rows = queries.fetch_all(cursor, name, tuple(params) + (page_size + 1,), record_cls)
+    if len(rows) <= page_size:
+        return rows, None
+    items = rows[:page_size]
+    return items, encode_cursor(kind, key_of(items[-1]))
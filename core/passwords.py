@@ -0,0 +1,118 @@
+# SMS/core/passwords.py
+"""
+Password hashing and the credential table's migration.
+
+Passwords are stored as salted PBKDF2-HMAC-SHA256 hashes in the form
+"pbkdf2_sha256$<iterations>$<salt>$<hash>" (salt and hash base64), so
+the iteration count can be raised later: needs_rehash() tells the login
+to re-hash a password stored with fewer. A hash takes a few hundred
+milliseconds on purpose, which is why core.db_login verifies logins on a
+worker thread.
+
+Cursor helpers only (no connection of their own), so core.db_init can
+run migrate_credentials() while it sets up the schema.
+"""
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from core import queries
+
+ALGORITHM = "pbkdf2_sha256"
+ITERATIONS = 600_000
+SALT_BYTES = 16
+# What the admin/receptionist password column holds once the password has moved to credential
+MIGRATED_PASSWORD = ""
+
+def normalize_username(username):
+    """'FirstName LastName' with spacing and case folded: what credential.username is keyed by."""
+    return " ".join((username or "").split()).casefold()
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+def hash_password(password, iterations=ITERATIONS):
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+def verify_password(password, stored):
+    """True when password matches the stored hash (compared in constant time)."""
+    try:
+        algorithm, iterations, salt, digest = stored.split("$")
+        if algorithm != ALGORITHM:
+            return False
+        candidate = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), base64.b64decode(salt), int(iterations))
+        return hmac.compare_digest(candidate, base64.b64decode(digest))
+    except (ValueError, AttributeError):
+        return False
+
+def needs_rehash(stored):
+    try:
+        return int(stored.split("$")[1]) < ITERATIONS
+    except (IndexError, ValueError):
+        return True
+
+@lru_cache(maxsize=1)
+def dummy_hash():
+    """Checked against when the username is unknown, so that takes as long as a wrong password."""
+    return hash_password("")
+
+queries.register("credentials.insert", """
+    INSERT OR IGNORE INTO credential (role, username, account_id, password_hash, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+""")
+
+# Accounts whose password is still in the role table, with their login name
+_UNMIGRATED = """
+    SELECT t.id, f.first_name || ' ' || f.last_name, t.password
+    FROM {table} t
+    JOIN fullname f ON f.person_id = t.person_id
+    WHERE t.password != ?
+    ORDER BY t.id
+"""
+queries.register("credentials.unmigrated_admin", _UNMIGRATED.format(table="admin"))
+queries.register("credentials.unmigrated_receptionist", _UNMIGRATED.format(table="receptionist"))
+queries.register("credentials.clear_admin", "UPDATE admin SET password = ? WHERE id = ?")
+queries.register("credentials.clear_receptionist", "UPDATE receptionist SET password = ? WHERE id = ?")
+
+def insert_credential(cursor, role, username, account_id, password_hash):
+    """
+    Adds the login of an admin or receptionist account using the caller's
+    cursor. Does not commit. Returns False if the username is taken for
+    that role.
+    """
+    queries.execute(cursor, "credentials.insert", (
+        role, normalize_username(username), account_id, password_hash,
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ))
+    return cursor.rowcount == 1
+
+def migrate_credentials(cursor):
+    """
+    Migration: moves every plaintext admin/receptionist password into
+    credential as a hash and blanks the old column, using the caller's
+    cursor. Does not commit. The passwords are hashed in parallel (hashlib
+    releases the GIL while hashing), then written in one transaction. An
+    account whose name is already taken for its role keeps its plaintext
+    password and is reported, so an admin can rename it. Returns the
+    number migrated.
+    """
+    migrated = 0
+    for role in ("admin", "receptionist"):
+        accounts = queries.fetch_all(cursor, f"credentials.unmigrated_{role}", (MIGRATED_PASSWORD,))
+        if not accounts:
+            continue
+        with ThreadPoolExecutor(max_workers=min(len(accounts), os.cpu_count() or 1)) as executor:
+            hashes = list(executor.map(hash_password, [password for _, _, password in accounts]))
+        for (account_id, username, _), password_hash in zip(accounts, hashes):
+            if insert_credential(cursor, role, username, account_id, password_hash):
+                queries.execute(cursor, f"credentials.clear_{role}", (MIGRATED_PASSWORD, account_id))
+                migrated += 1
+            else:
+                print(f"[WARNING] migrate_credentials: {role} {account_id} ('{username}') shares its name "
+                      f"with another {role}; its password was not migrated.")
+    return migrated
@@ -0,0 +1,137 @@
+# SMS/core/prefetch.py
+"""
+Speculative loading of a student's details and dues.
+
+As soon as a student is selected (or hovered) in a search result list,
+prefetch_student() starts loading what the next screen will show on a
+worker thread; the screen then takes it with get_prefetched(), waiting
+for the load if it is still running, instead of querying from scratch.
+
+A prefetched result is used once, within TTL_SECONDS, and only if no
+write has moved the change counters (see db_init.CHANGE_COUNTERS) since
+its load started; otherwise the caller's own query runs as before.
+Selecting another student cancels the loads that haven't started yet.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from core import queries
+from core.db_init import connect_db
+from core.student_operations import get_student_contacts
+from core.due_operations import get_unpaid_dues_for_student, get_all_student_dues_with_summary
+
+# kind -> loader(student_id)
+PREFETCH_LOADERS = {
+    "contacts": get_student_contacts,
+    "unpaid_dues": get_unpaid_dues_for_student,
+    "dues_summary": get_all_student_dues_with_summary,
+}
+# What StudentDetailsWindow shows
+DETAILS = ("contacts", "unpaid_dues")
+# Loads kept (oldest dropped first) and how long one stays usable.
+MAX_ENTRIES = 16
+TTL_SECONDS = 30
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Prefetch")
+
+queries.register("prefetch.versions", "SELECT name, version FROM change_counter ORDER BY name")
+
+def _data_versions():
+    conn = connect_db()
+    try:
+        return tuple(queries.fetch_all(conn.cursor(), "prefetch.versions"))
+    finally:
+        conn.close()
+
+def _load(kind, student_id):
+    """Runs on the worker: (versions before loading, result, seconds the load took)."""
+    versions = _data_versions()
+    start = time.perf_counter()
+    result = PREFETCH_LOADERS[kind](student_id)
+    return versions, result, time.perf_counter() - start
+
+class Prefetcher:
+    def __init__(self, executor=_executor, max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS):
+        self.executor = executor
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # (kind, student_id) -> (future, requested_at)
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(["requested", "cancelled", "hits", "misses", "stale"], 0)
+        self._saved_seconds = 0.0
+
+    def prefetch(self, student_id, kinds=DETAILS):
+        """Starts loading kinds for student_id unless a usable load is already there."""
+        now = time.monotonic()
+        with self._lock:
+            # Only the latest selection matters: drop queued loads for others
+            for key, (future, _) in list(self._entries.items()):
+                if key[1] != student_id and future.cancel():
+                    del self._entries[key]
+                    self._counts["cancelled"] += 1
+            for kind in kinds:
+                key = (kind, student_id)
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[1] < self.ttl_seconds:
+                    continue
+                self._entries[key] = (self.executor.submit(_load, kind, student_id), now)
+                self._entries.move_to_end(key)
+                self._counts["requested"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)[1][0].cancel()
+
+    def get(self, kind, student_id):
+        """The prefetched result if it is still valid, else loader(student_id) run here."""
+        with self._lock:
+            entry = self._entries.pop((kind, student_id), None)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+            start = time.perf_counter()
+            try:
+                versions, result, load_seconds = entry[0].result()
+            except (CancelledError, Exception):
+                versions = None
+            waited = time.perf_counter() - start
+            if versions is not None and versions == _data_versions():
+                with self._lock:
+                    self._counts["hits"] += 1
+                    self._saved_seconds += max(0.0, load_seconds - waited)
+                return result
+            with self._lock:
+                self._counts["stale"] += 1
+        with self._lock:
+            self._counts["misses"] += 1
+        return PREFETCH_LOADERS[kind](student_id)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts, saved_seconds=self._saved_seconds, pending=len(self._entries))
+        used = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / used if used else 0.0
+        stats["avg_saved_ms"] = stats["saved_seconds"] / stats["hits"] * 1000 if stats["hits"] else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._counts:
+                self._counts[name] = 0
+            self._saved_seconds = 0.0
+
+_prefetcher = Prefetcher()
+
+def prefetch_student(student_id, kinds=DETAILS):
+    _prefetcher.prefetch(student_id, kinds)
+
+def get_prefetched(kind, student_id):
+    return _prefetcher.get(kind, student_id)
+
+def get_prefetch_stats():
+    """
+    requested/cancelled loads; hits, misses (incl. stale) and hit_rate of
+    get_prefetched(); saved_seconds / avg_saved_ms: load time the screens
+    did not wait for.
+    """
+    return _prefetcher.stats()
+
+def reset_prefetch_stats():
+    _prefetcher.reset_stats()
@@ -0,0 +1,131 @@
+# SMS/core/queries.py
+"""
+The query catalog.
+
+Every fixed SQL statement in core/ is registered once, by name, next to the
+function that uses it, and run through execute()/fetch_all()/fetch_one().
+Because the text of a named statement never changes, each pooled
+connection's statement cache (db_init.CACHED_STATEMENTS) prepares it once,
+and every call is counted and timed per name (get_query_stats()).
+
+Statements whose shape depends on the input (e.g. a search with 1-4 name
+tokens) are registered as a fixed set of variants, one name per shape.
+"""
+import re
+import threading
+import time
+
+_statements = {}
+_stats = {}
+_stats_lock = threading.Lock()
+
+def register(name, sql):
+    """Registers sql under name and returns the name. Re-registering the same text is a no-op."""
+    existing = _statements.get(name)
+    if existing is not None and existing != sql:
+        raise ValueError(f"Query '{name}' is already registered with different SQL")
+    _statements[name] = sql
+    return name
+
+def get_sql(name):
+    return _statements[name]
+
+def registered_queries():
+    """Name -> SQL of every registered statement."""
+    return dict(_statements)
+
+def _record(name, elapsed, failed):
+    with _stats_lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = [0, 0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += failed
+        stats[2] += elapsed
+        if elapsed > stats[3]:
+            stats[3] = elapsed
+
+def execute(cursor, name, params=()):
+    """Runs a registered statement on cursor and returns the cursor. Times the execute step."""
+    start = time.perf_counter()
+    failed = True
+    try:
+        cursor.execute(_statements[name], params)
+        failed = False
+        return cursor
+    finally:
+        _record(name, time.perf_counter() - start, failed)
+
+def execute_many(cursor, name, seq_of_params):
+    start = time.perf_counter()
+    failed = True
+    try:
+        cursor.executemany(_statements[name], seq_of_params)
+        failed = False
+        return cursor
+    finally:
+        _record(name, time.perf_counter() - start, failed)
+
+def fetch_all(cursor, name, params=(), record_cls=None):
+    """Runs a registered query and returns all rows (as record_cls records if given). Times execute + fetch."""
+    from core.records import fetch_records
+    start = time.perf_counter()
+    failed = True
+    try:
+        cursor.execute(_statements[name], params)
+        rows = fetch_records(cursor, record_cls) if record_cls else cursor.fetchall()
+        failed = False
+        return rows
+    finally:
+        _record(name, time.perf_counter() - start, failed)
+
+def fetch_one(cursor, name, params=()):
+    """Runs a registered query and returns its first row (or None)."""
+    start = time.perf_counter()
+    failed = True
+    try:
+        cursor.execute(_statements[name], params)
+        row = cursor.fetchone()
+        failed = False
+        return row
+    finally:
+        _record(name, time.perf_counter() - start, failed)
+
+def explain_queries(conn):
+    """
+    Name -> EXPLAIN QUERY PLAN detail lines for every registered statement,
+    with parameters left unbound. A "SCAN <table>" line (rather than
+    "SEARCH ... USING INDEX") marks a statement that reads a whole table.
+    """
+    plans = {}
+    for name, sql in sorted(_statements.items()):
+        try:
+            numbered = [int(n) for n in re.findall(r"\?(\d+)", sql)]
+            params = (None,) * (max(numbered) if numbered else sql.count("?"))
+            plans[name] = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        except Exception as e:
+            plans[name] = [f"error: {e}"]
+    return plans
+
+def get_query_stats():
+    """
+    One dict per statement that has run in this process, slowest total first:
+    name, calls, errors, total_seconds, avg_ms, max_ms.
+    """
+    with _stats_lock:
+        snapshot = {name: list(values) for name, values in _stats.items()}
+    return sorted((
+        {
+            "name": name,
+            "calls": calls,
+            "errors": errors,
+            "total_seconds": total,
+            "avg_ms": total / calls * 1000 if calls else 0.0,
+            "max_ms": longest * 1000,
+        }
+        for name, (calls, errors, total, longest) in snapshot.items()
+    ), key=lambda s: s["total_seconds"], reverse=True)
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,99 @@
+# SMS/core/records.py
+"""
+Compact, read-only result records for the core read functions.
+
+Each record is a namedtuple (one small tuple per row, no per-row dict),
+so fields are attributes: student.full_name, due.amount_remaining.
+For existing callers they also answer row['key'] and row.get('key'),
+and to_dict() gives a plain dict when one is really needed.
+"""
+from collections import namedtuple
+
+class _RecordMixin:
+    __slots__ = ()
+    # SQL column names that aren't valid field names ('class') -> field name
+    _aliases = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return getattr(self, self._aliases.get(key, key))
+            except AttributeError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, self._aliases.get(key, key), default)
+
+    def keys(self):
+        return self._columns()
+
+    def to_dict(self):
+        """A plain dict keyed by the SQL column names."""
+        return dict(zip(self._columns(), self))
+
+    @classmethod
+    def _columns(cls):
+        reverse = {field: column for column, field in cls._aliases.items()}
+        return tuple(reverse.get(field, field) for field in cls._fields)
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """sqlite3 row_factory building this record (columns in field order)."""
+        return tuple.__new__(cls, row)
+
+def fetch_records(cursor, record_cls):
+    """
+    Returns the cursor's remaining rows as record_cls instances.
+    The query's columns must match the record's fields, in order; this is
+    checked once per query, not per row.
+    """
+    columns = tuple(d[0] for d in cursor.description)
+    if columns != record_cls._columns():
+        raise ValueError(f"{record_cls.__name__} expects columns {record_cls._columns()}, got {columns}")
+    # No intermediate tuple per row. The caller's cursor gets its own row_factory back.
+    previous = cursor.row_factory
+    cursor.row_factory = record_cls.row_factory
+    try:
+        return cursor.fetchall()
+    finally:
+        cursor.row_factory = previous
+
+class StudentSummary(_RecordMixin, namedtuple("StudentSummary", [
+    "student_id", "full_name", "father_name", "mother_name", "student_class",
+    "monthly_fee", "annual_fund", "family_SSN", "family_name",
+])):
+    """One search_students() result."""
+    __slots__ = ()
+    _aliases = {"class": "student_class"}
+
+class ContactRecord(_RecordMixin, namedtuple("ContactRecord", ["type", "value", "label"])):
+    __slots__ = ()
+
+class StudentDetails(_RecordMixin, namedtuple("StudentDetails", [
+    "student_id", "person_id", "family_id", "date_of_admission", "monthly_fee", "annual_fund",
+    "student_class", "fathername", "mothername", "dob", "address", "gender",
+    "first_name", "middle_name", "last_name", "family_SSN", "family_name", "contacts",
+])):
+    """get_student_details_by_id() result; contacts is a list of ContactRecord."""
+    __slots__ = ()
+    _aliases = {"class": "student_class"}
+
+class DueSummary(_RecordMixin, namedtuple("DueSummary", [
+    "pending_due_id", "due_type", "amount_due", "due_date", "status", "total_paid", "amount_remaining",
+])):
+    """A due with its payment totals."""
+    __slots__ = ()
+
+class PaymentRecord(_RecordMixin, namedtuple("PaymentRecord", [
+    "payment_timestamp", "amount_paid", "payment_mode", "received_by_user", "payment_id",
+])):
+    """One installment paid against a due."""
+    __slots__ = ()
+
+class ReceiptRecord(_RecordMixin, namedtuple("ReceiptRecord", [
+    "receipt_id", "payment_timestamp", "amount_paid", "payment_mode", "received_by",
+    "student_id", "student_name", "due_type", "amount_remaining",
+])):
+    """What a payment receipt shows; amount_remaining is the due's balance right after that payment."""
+    __slots__ = ()
@@ -0,0 +1,287 @@
+# SMS/core/reminders.py
+"""
+Due reminder campaigns: one e-mail per family listing every outstanding
+due of its children.
+
+reminders.outstanding finds the families to remind in one aggregate
+query: each unpaid due with what is left of it (payments summed per
+due), grouped per family through student.family_id (a student without a
+family is a family of one), with the family's e-mail addresses (the
+'email' contacts of its students) and its dues as a JSON array. The
+messages are rendered from REMINDER_TEMPLATE and queued in the same
+transaction as the reminder_campaign row (core.emailer.insert_emails),
+so a campaign is queued completely or not at all. The outbox's sender
+delivers them over its one SMTP session at CAMPUSCORE_SMTP_RATE messages
+per second, after any verification codes.
+
+get_campaign_stats() reports each run's query, render and queue times
+and its delivery progress from the outbox.
+"""
+import json
+import time
+from datetime import datetime
+from core import queries
+from core.db_init import connect_db
+from core.emailer import insert_emails, get_email_sender, BULK_PRIORITY
+
+SCHOOL_NAME = "School Management System"
+
+REMINDER_SUBJECT = "Outstanding dues - {family}: {total:.2f}"
+REMINDER_TEMPLATE = """Dear Parent/Guardian,
+
+Our records show the following dues of the {family} family outstanding as of {today}:
+
+{lines}
+
+Total outstanding: {total:.2f}
+
+Please clear them at the school office at your earliest convenience.
+If you have paid already, please ignore this message.
+
+{school}
+"""
+
+queries.register("reminders.outstanding", """
+    WITH outstanding AS (
+        SELECT pd.student_id, pd.due_type, pd.due_date,
+               pd.amount_due - COALESCE(SUM(pr.amount_paid), 0) AS remaining
+        FROM pending_due pd
+        LEFT JOIN payment_record pr ON pr.pending_due_id = pd.id
+        WHERE pd.status != 'paid' AND pd.due_date <= ?
+        GROUP BY pd.id
+        HAVING remaining > 0.005
+    ),
+    family_dues AS (
+        SELECT COALESCE(s.family_id, -s.id) AS family_key,
+               s.family_id,
+               MIN(fn.last_name) AS last_name,
+               COUNT(*) AS due_count,
+               SUM(o.remaining) AS total,
+               json_group_array(json_array(
+                   s.id, fn.first_name || ' ' || fn.last_name, s.class, o.due_type, o.due_date, o.remaining
+               )) AS dues
+        FROM outstanding o
+        JOIN student s ON s.id = o.student_id
+        JOIN fullname fn ON fn.person_id = s.person_id
+        GROUP BY family_key
+    )
+    SELECT fd.family_key,
+           f.family_SSN,
+           COALESCE(NULLIF(f.family_name, ''), fd.last_name) AS family_name,
+           CASE WHEN fd.family_id IS NULL THEN (
+               SELECT group_concat(DISTINCT c.value)
+               FROM student s JOIN contact c ON c.person_id = s.person_id
+               WHERE s.id = -fd.family_key AND c.type = 'email'
+           ) ELSE (
+               SELECT group_concat(DISTINCT c.value)
+               FROM student s JOIN contact c ON c.person_id = s.person_id
+               WHERE s.family_id = fd.family_id AND c.type = 'email'
+           ) END AS recipients,
+           fd.due_count,
+           fd.total,
+           fd.dues
+    FROM family_dues fd
+    LEFT JOIN family f ON f.id = fd.family_id
+    ORDER BY fd.family_key
+""")
+
+def load_outstanding_by_family(cursor, due_before):
+    """
+    Families with dues due on or before due_before that are not fully paid,
+    using the caller's cursor. Returns a list of dicts: family_key,
+    family_ssn, family_name, recipients (list), due_count, total and dues
+    [(student_id, student_name, class, due_type, due_date, remaining)],
+    sorted by student and due date.
+    """
+    families = []
+    for key, ssn, name, recipients, due_count, total, dues in queries.fetch_all(
+        cursor, "reminders.outstanding", (due_before,)
+    ):
+        families.append({
+            "family_key": key,
+            "family_ssn": ssn,
+            "family_name": name,
+            "recipients": recipients.split(",") if recipients else [],
+            "due_count": due_count,
+            "total": total,
+            "dues": sorted((tuple(due) for due in json.loads(dues)), key=lambda due: (due[1], due[0], due[4])),
+        })
+    return families
+
+def render_reminder(family, today=None):
+    """(recipient, subject, body) of one family's reminder; all its addresses share the message."""
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    lines = []
+    current_student = None
+    for student_id, student_name, student_class, due_type, due_date, remaining in family["dues"]:
+        if student_id != current_student:
+            if lines:
+                lines.append("")
+            lines.append(f"  {student_name} (ID {student_id}, Class {student_class})")
+            current_student = student_id
+        lines.append(f"    {due_type:<32} due {due_date}  {remaining:>10.2f}")
+    subject = REMINDER_SUBJECT.format(family=family["family_name"], total=family["total"])
+    body = REMINDER_TEMPLATE.format(family=family["family_name"], today=today, lines="\n".join(lines),
+                                    total=family["total"], school=SCHOOL_NAME)
+    return ", ".join(family["recipients"]), subject, body
+
+def preview_reminders(due_before=None):
+    """
+    Counts what run_reminder_campaign(due_before) would send, writing nothing.
+    Returns (True, stats) or (False, error_message); stats has families,
+    messages, no_email (families without an e-mail contact), dues,
+    total_amount and query_seconds.
+    """
+    due_before = due_before or datetime.now().strftime("%Y-%m-%d")
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        start = time.perf_counter()
+        families = load_outstanding_by_family(cursor, due_before)
+        query_seconds = time.perf_counter() - start
+    except Exception as e:
+        print(f"[ERROR] preview_reminders: {e}")
+        return False, f"Could not load outstanding dues: {e}"
+    finally:
+        conn.close()
+    messages = sum(1 for family in families if family["recipients"])
+    return True, {
+        "due_before": due_before,
+        "families": len(families),
+        "messages": messages,
+        "no_email": len(families) - messages,
+        "dues": sum(family["due_count"] for family in families),
+        "total_amount": sum(family["total"] for family in families),
+        "query_seconds": query_seconds,
+    }
+
+queries.register("reminders.insert_campaign", """
+    INSERT INTO reminder_campaign (started_at, started_by, due_before) VALUES (?, ?, ?)
+""")
+queries.register("reminders.finish_campaign", """
+    UPDATE reminder_campaign
+    SET families = ?, messages = ?, no_email = ?, dues = ?, total_amount = ?,
+        query_seconds = ?, render_seconds = ?, queue_seconds = ?
+    WHERE id = ?
+""")
+
+def run_reminder_campaign(due_before=None, started_by=None):
+    """
+    Queues one reminder per family with dues due on or before due_before
+    (default: today) that are not fully paid. Families without an e-mail
+    contact are counted in no_email and skipped.
+
+    Returns (True, stats) or (False, error_message). stats adds
+    campaign_id, render_seconds, queue_seconds and messages_per_second
+    (rendered and queued) to preview_reminders()'s.
+    """
+    due_before = due_before or datetime.now().strftime("%Y-%m-%d")
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        start = time.perf_counter()
+        families = load_outstanding_by_family(cursor, due_before)
+        query_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        today = datetime.now().strftime("%Y-%m-%d")
+        messages = [render_reminder(family, today) for family in families if family["recipients"]]
+        render_seconds = time.perf_counter() - start
+
+        # The write lock is taken only for the inserts
+        start = time.perf_counter()
+        cursor.execute("BEGIN IMMEDIATE")
+        queries.execute(cursor, "reminders.insert_campaign", (
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"), started_by, due_before
+        ))
+        campaign_id = cursor.lastrowid
+        insert_emails(cursor, messages, campaign_id, BULK_PRIORITY)
+        stats = {
+            "campaign_id": campaign_id,
+            "due_before": due_before,
+            "families": len(families),
+            "messages": len(messages),
+            "no_email": len(families) - len(messages),
+            "dues": sum(family["due_count"] for family in families),
+            "total_amount": sum(family["total"] for family in families),
+            "query_seconds": query_seconds,
+            "render_seconds": render_seconds,
+            "queue_seconds": time.perf_counter() - start,
+        }
+        queries.execute(cursor, "reminders.finish_campaign", (
+            stats["families"], stats["messages"], stats["no_email"], stats["dues"], stats["total_amount"],
+            query_seconds, render_seconds, stats["queue_seconds"], campaign_id
+        ))
+        conn.commit()
+    except Exception as e:
+        print(f"[ERROR] run_reminder_campaign: {e}")
+        conn.rollback()
+        return False, f"Could not queue the reminders: {e}"
+    finally:
+        conn.close()
+
+    elapsed = stats["query_seconds"] + stats["render_seconds"] + stats["queue_seconds"]
+    stats["messages_per_second"] = stats["messages"] / elapsed if elapsed > 0 else 0.0
+    if messages:
+        get_email_sender().wake()
+    return True, stats
+
+# Each campaign with its delivery progress from the outbox
+queries.register("reminders.campaigns", """
+    SELECT rc.id, rc.started_at, rc.started_by, rc.due_before, rc.families, rc.messages, rc.no_email,
+           rc.total_amount, rc.query_seconds, rc.render_seconds, rc.queue_seconds,
+           COALESCE(SUM(eo.status = 'sent'), 0),
+           COALESCE(SUM(eo.status = 'failed'), 0),
+           COALESCE(SUM(eo.status IN ('pending', 'sending')), 0),
+           MIN(eo.sent_at), MAX(eo.sent_at), AVG(eo.latency_seconds)
+    FROM reminder_campaign rc
+    LEFT JOIN email_outbox eo ON eo.campaign_id = rc.id
+    GROUP BY rc.id
+    ORDER BY rc.id DESC
+    LIMIT ?
+""")
+
+def get_campaign_stats(limit=10):
+    """
+    The last limit campaigns, newest first, as dicts: what was queued
+    (families, messages, no_email, total_amount), how long the query,
+    rendering and queueing took, and delivery so far (sent, failed,
+    pending, avg_latency_seconds, delivery_seconds from the first to the
+    last message sent, and messages_per_second over it). Returns [] on error.
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        rows = queries.fetch_all(cursor, "reminders.campaigns", (limit,))
+    except Exception as e:
+        print(f"[ERROR] get_campaign_stats: {e}")
+        return []
+    finally:
+        conn.close()
+    campaigns = []
+    for (campaign_id, started_at, started_by, due_before, families, messages, no_email, total_amount,
+         query_seconds, render_seconds, queue_seconds, sent, failed, pending,
+         first_sent, last_sent, avg_latency) in rows:
+        delivery_seconds = 0.0
+        if first_sent and last_sent:
+            delivery_seconds = (datetime.fromisoformat(last_sent) - datetime.fromisoformat(first_sent)).total_seconds()
+        campaigns.append({
+            "campaign_id": campaign_id,
+            "started_at": started_at,
+            "started_by": started_by,
+            "due_before": due_before,
+            "families": families,
+            "messages": messages,
+            "no_email": no_email,
+            "total_amount": total_amount,
+            "query_seconds": query_seconds or 0.0,
+            "render_seconds": render_seconds or 0.0,
+            "queue_seconds": queue_seconds or 0.0,
+            "sent": sent,
+            "failed": failed,
+            "pending": pending,
+            "avg_latency_seconds": avg_latency or 0.0,
+            "delivery_seconds": delivery_seconds,
+            "messages_per_second": (sent - 1) / delivery_seconds if delivery_seconds > 0 else 0.0,
+        })
+    return campaigns
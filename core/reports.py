@@ -0,0 +1,52 @@
+# SMS/core/reports.py
+import csv
+from core.db_init import connect_db
+from core.archive import connect_history_db
+
+STUDENT_EXPORT_COLUMNS = [
+    "student_id", "first_name", "middle_name", "last_name", "father_name", "mother_name",
+    "dob", "address", "gender", "date_of_admission", "monthly_fee", "annual_fund", "class",
+    "family_ssn", "family_name",
+]
+
+DUE_EXPORT_COLUMNS = [
+    "pending_due_id", "student_id", "due_type", "amount_due", "due_date", "status",
+    "total_paid", "amount_remaining",
+]
+
+def _write_query_csv(file_obj, columns, query, params=(), connect=connect_db):
+    """Streams a query's rows into CSV without building a list. Returns the row count."""
+    conn = connect()
+    try:
+        writer = csv.writer(file_obj)
+        writer.writerow(columns)
+        count = 0
+        for row in conn.execute(query, params):
+            writer.writerow(row)
+            count += 1
+        return count
+    finally:
+        conn.close()
+
+def export_students(file_obj):
+    """Writes every student (with name and family) as CSV. Returns the row count."""
+    return _write_query_csv(file_obj, STUDENT_EXPORT_COLUMNS, """
+        SELECT s.id, f.first_name, f.middle_name, f.last_name, p.fathername, p.mothername,
+               p.dob, p.address, p.gender, s.date_of_admission, s.monthly_fee, s.annual_fund,
+               s.class, fam.family_SSN, fam.family_name
+        FROM student s
+        JOIN person p ON s.person_id = p.id
+        JOIN fullname f ON f.person_id = p.id
+        LEFT JOIN family fam ON s.family_id = fam.id
+        ORDER BY s.id
+    """)
+
+def export_dues(file_obj, unpaid_only=False):
+    """Writes every due (archived ones included) with its payment totals as CSV. Returns the row count."""
+    return _write_query_csv(file_obj, DUE_EXPORT_COLUMNS, f"""
+        SELECT pending_due_id, student_id, due_type, amount_due, due_date, status,
+               total_paid, amount_remaining
+        FROM due_history
+        {"WHERE status != 'paid'" if unpaid_only else ""}
+        ORDER BY pending_due_id
+    """, connect=connect_history_db)
@@ -0,0 +1,339 @@
+# SMS/core/scheduler.py
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from core.db_init import connect_db
+from core.due_operations import post_monthly_fees
+from core.annual_fund import run_annual_fund_billing, ACADEMIC_YEAR_START_MONTH
+from core.backup import create_backup
+from core.archive import archive_paid_dues
+from core.maintenance import run_maintenance, SCHEDULED_TASKS
+from core.dedup import scan_duplicates
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# How long a process may hold a job before another one may take it over.
+LEASE_SECONDS = 300
+# How often the background thread looks for due jobs.
+POLL_INTERVAL = 60
+# db_maintenance only runs in this off-hours window (local time), when no
+# desk is working: MAINTENANCE_HOUR:00 for MAINTENANCE_WINDOW_HOURS hours.
+MAINTENANCE_HOUR = 2
+MAINTENANCE_WINDOW_HOURS = 4
+
+def _fmt(dt):
+    return dt.strftime(TIME_FORMAT)
+
+def _parse(text):
+    return datetime.strptime(text, TIME_FORMAT)
+
+# --- Schedules: each returns the start of a period ---
+
+def month_start(dt):
+    return datetime(dt.year, dt.month, 1)
+
+def next_month(dt):
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+def academic_year_start(dt):
+    year = dt.year if dt.month >= ACADEMIC_YEAR_START_MONTH else dt.year - 1
+    return datetime(year, ACADEMIC_YEAR_START_MONTH, 1)
+
+def next_academic_year(dt):
+    return datetime(dt.year + 1, ACADEMIC_YEAR_START_MONTH, 1)
+
+def day_start(dt):
+    return datetime(dt.year, dt.month, dt.day)
+
+def next_day(dt):
+    return day_start(dt) + timedelta(days=1)
+
+def maintenance_window(dt):
+    """The off-hours window dt falls in, or else the next one to start."""
+    start = day_start(dt) + timedelta(hours=MAINTENANCE_HOUR)
+    if dt >= start + timedelta(hours=MAINTENANCE_WINDOW_HOURS):
+        start += timedelta(days=1)
+    return start
+
+def next_maintenance_window(dt):
+    return maintenance_window(next_day(dt))
+
+class Job:
+    """
+    A periodic job.
+    func(run_for, progress) -> (success, stats_or_error_message)
+      run_for: start of the period being run (missed periods are run in order)
+      progress(done, total=None): reports progress and keeps the lease alive
+    first_run(now): the period to start from when the job is first registered
+    next_run(run_for): the period after run_for
+    """
+    def __init__(self, name, func, first_run, next_run):
+        self.name = name
+        self.func = func
+        self.first_run = first_run
+        self.next_run = next_run
+
+def _monthly_fees_job(run_for, progress):
+    return post_monthly_fees(run_for.year, run_for.month)
+
+def _annual_fund_job(run_for, progress):
+    return run_annual_fund_billing(
+        run_for.year, progress_callback=lambda scanned, inserted: progress(scanned)
+    )
+
+def _nightly_backup_job(run_for, progress):
+    # A snapshot is only useful for the latest period; missed nights are skipped
+    if next_day(run_for) <= datetime.now():
+        return True, {"skipped": "superseded by a later run"}
+    return create_backup(progress_callback=lambda done, total: progress(done, total))
+
+def _maintenance_job(run_for, progress):
+    # Missed windows (nobody ran the scheduler overnight) are not made up
+    # during the day: the next window runs it
+    now = datetime.now()
+    start = maintenance_window(run_for)
+    if not start <= now < start + timedelta(hours=MAINTENANCE_WINDOW_HOURS):
+        return True, {"skipped": "outside the off-hours window"}
+    return run_maintenance(SCHEDULED_TASKS, progress_callback=progress)
+
+def _archive_job(run_for, progress):
+    return archive_paid_dues(progress_callback=progress)
+
+def _duplicate_scan_job(run_for, progress):
+    # Each scan covers everyone, so only the latest missed month is run
+    if next_month(run_for) <= datetime.now():
+        return True, {"skipped": "superseded by a later run"}
+    return scan_duplicates(progress_callback=progress)
+
+JOBS = {}
+
+def register_job(job):
+    """Adds a job to every scheduler created afterwards (and the shared one)."""
+    JOBS[job.name] = job
+
+register_job(Job("monthly_fees", _monthly_fees_job, month_start, next_month))
+register_job(Job("annual_fund", _annual_fund_job, academic_year_start, next_academic_year))
+register_job(Job("nightly_backup", _nightly_backup_job, day_start, next_day))
+register_job(Job("archive_paid_dues", _archive_job, month_start, next_month))
+register_job(Job("db_maintenance", _maintenance_job, maintenance_window, next_maintenance_window))
+register_job(Job("duplicate_scan", _duplicate_scan_job, month_start, next_month))
+
+class JobScheduler:
+    """
+    Runs registered jobs when they are due.
+
+    State lives in the scheduled_job table, so it survives restarts and is
+    shared by every desk: a job is only run by the process that wins its
+    lease, and if nobody ran it for a while each missed period is run in
+    order (catch-up). Every run is recorded in job_run.
+    """
+    def __init__(self, jobs=None, poll_interval=POLL_INTERVAL, lease_seconds=LEASE_SECONDS, owner=None):
+        self.jobs = jobs if jobs is not None else JOBS
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts polling on a background thread (the first check runs immediately)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._loop, name="JobScheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            self.run_pending()
+            self._stop_event.wait(self.poll_interval)
+
+    def ensure_jobs(self, now=None):
+        """Creates a scheduled_job row for every registered job that has none."""
+        now = now or datetime.now()
+        conn = connect_db()
+        try:
+            conn.executemany("""
+                INSERT OR IGNORE INTO scheduled_job (name, next_run_at) VALUES (?, ?)
+            """, [(job.name, _fmt(job.first_run(now))) for job in self.jobs.values()])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def run_pending(self, now=None):
+        """
+        Runs every job whose next_run_at has passed, including missed periods.
+        Returns a list of (job_name, run_for, success, stats_or_error).
+        """
+        now = now or datetime.now()
+        results = []
+        try:
+            self.ensure_jobs(now)
+        except Exception as e:
+            print(f"[ERROR] JobScheduler.ensure_jobs: {e}")
+            return results
+        for job in self.jobs.values():
+            if not self._acquire_lease(job.name, now):
+                continue
+            try:
+                results.extend(self._run_due_periods(job, now))
+            except Exception as e:
+                print(f"[ERROR] JobScheduler job '{job.name}': {e}")
+            finally:
+                self._release_lease(job.name)
+        return results
+
+    def _run_due_periods(self, job, now):
+        results = []
+        while True:
+            conn = connect_db()
+            try:
+                row = conn.execute("SELECT next_run_at FROM scheduled_job WHERE name = ?", (job.name,)).fetchone()
+            finally:
+                conn.close()
+            run_for = _parse(row[0])
+            if run_for > now:
+                break
+
+            run_id = self._record_start(job.name, run_for)
+            start = time.perf_counter()
+            try:
+                success, result = job.func(run_for, lambda done, total=None: self._report_progress(job.name, done, total))
+            except Exception as e:
+                success, result = False, str(e)
+            duration = time.perf_counter() - start
+            self._record_finish(job, run_id, run_for, success, result, duration)
+            results.append((job.name, run_for, success, result))
+            if not success:
+                break  # Retried on the next poll; later periods wait for this one
+        return results
+
+    # --- Leasing ---
+
+    def _acquire_lease(self, name, now):
+        conn = connect_db()
+        try:
+            cursor = conn.execute("""
+                UPDATE scheduled_job
+                SET lease_owner = ?, lease_expires_at = ?
+                WHERE name = ? AND next_run_at <= ?
+                  AND (lease_owner IS NULL OR lease_owner = ? OR lease_expires_at < ?)
+            """, (self.owner, _fmt(datetime.now() + timedelta(seconds=self.lease_seconds)),
+                  name, _fmt(now), self.owner, _fmt(datetime.now())))
+            conn.commit()
+            return cursor.rowcount == 1
+        except Exception as e:
+            print(f"[ERROR] JobScheduler lease for '{name}': {e}")
+            return False
+        finally:
+            conn.close()
+
+    def _release_lease(self, name):
+        conn = connect_db()
+        try:
+            conn.execute("""
+                UPDATE scheduled_job SET lease_owner = NULL, lease_expires_at = NULL
+                WHERE name = ? AND lease_owner = ?
+            """, (name, self.owner))
+            conn.commit()
+        except Exception as e:
+            print(f"[ERROR] JobScheduler release for '{name}': {e}")
+        finally:
+            conn.close()
+
+    def _report_progress(self, name, done, total=None):
+        """Stores progress and extends the lease while a long job runs."""
+        conn = connect_db()
+        try:
+            conn.execute("""
+                UPDATE scheduled_job
+                SET progress_done = ?, progress_total = ?, lease_expires_at = ?
+                WHERE name = ? AND lease_owner = ?
+            """, (done, total, _fmt(datetime.now() + timedelta(seconds=self.lease_seconds)), name, self.owner))
+            conn.commit()
+        except Exception as e:
+            print(f"[ERROR] JobScheduler progress for '{name}': {e}")
+        finally:
+            conn.close()
+
+    # --- Run history ---
+
+    def _record_start(self, name, run_for):
+        conn = connect_db()
+        try:
+            cursor = conn.execute("""
+                INSERT INTO job_run (job_name, scheduled_for, started_at) VALUES (?, ?, ?)
+            """, (name, _fmt(run_for), _fmt(datetime.now())))
+            conn.execute("""
+                UPDATE scheduled_job SET progress_done = 0, progress_total = NULL WHERE name = ?
+            """, (name,))
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def _record_finish(self, job, run_id, run_for, success, result, duration):
+        status = "success" if success else "failed"
+        finished_at = _fmt(datetime.now())
+        conn = connect_db()
+        try:
+            conn.execute("""
+                UPDATE job_run
+                SET finished_at = ?, status = ?, duration_seconds = ?, detail = ?
+                WHERE id = ?
+            """, (finished_at, status, duration, json.dumps(result, default=str), run_id))
+            conn.execute("""
+                UPDATE scheduled_job
+                SET last_run_at = ?, last_status = ?, last_error = ?, last_duration_seconds = ?,
+                    run_count = run_count + 1,
+                    next_run_at = CASE WHEN ? THEN ? ELSE next_run_at END
+                WHERE name = ?
+            """, (finished_at, status, None if success else str(result), duration,
+                  success, _fmt(job.next_run(run_for)), job.name))
+            conn.commit()
+        finally:
+            conn.close()
+
+def get_job_status():
+    """
+    Returns one dict per scheduled job: schedule, lease, progress, last result,
+    and run count / average duration from job_run.
+    """
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT
+                j.name, j.next_run_at, j.lease_owner, j.lease_expires_at,
+                j.last_run_at, j.last_status, j.last_error, j.last_duration_seconds,
+                j.progress_done, j.progress_total, j.run_count,
+                (SELECT AVG(duration_seconds) FROM job_run r
+                 WHERE r.job_name = j.name AND r.status = 'success') as avg_duration_seconds
+            FROM scheduled_job j
+            ORDER BY j.name
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"[ERROR] get_job_status: {e}")
+        return []
+    finally:
+        conn.close()
+
+_shared_scheduler = None
+
+def get_scheduler():
+    """Returns the process-wide JobScheduler (not started)."""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        _shared_scheduler = JobScheduler()
+    return _shared_scheduler
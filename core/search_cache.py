@@ -0,0 +1,131 @@
+# SMS/core/search_cache.py
+"""
+Result cache for the student and family searches.
+
+Receptionists repeat the same lookups all shift (a family SSN for every
+sibling, one student ID on the due, payment and history pages), so the
+results of the functions decorated with @cached_search are kept, keyed
+by function, normalized search term and the remaining arguments.
+
+Entries are evicted least-recently-used beyond MAX_ENTRIES and expire
+after TTL_SECONDS. Every lookup also reads the 'search' row of
+change_counter, which triggers on family, person, fullname, contact and
+student bump on every write, from this process or any other (the CLI,
+the scheduler, another terminal). When it has moved, the whole cache is
+dropped. Writes to dues and payments don't touch it.
+
+Cached results are shared between callers: treat them as read-only.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from core import db_init, queries
+from core.db_init import connect_db
+
+MAX_ENTRIES = 256
+TTL_SECONDS = 300
+
+queries.register("search_cache.version", "SELECT version FROM change_counter WHERE name = 'search'")
+
+def normalize_term(search_term):
+    """Case and spacing don't change a search (LIKE is case-insensitive), so they don't split the cache."""
+    return " ".join((search_term or "").split()).lower()
+
+class SearchCache:
+    """An LRU + TTL map of results, dropped as a whole when the data version changes."""
+    def __init__(self, max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, result), least recently used first
+        self._version = None
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(["hits", "misses", "invalidations", "expired", "evicted"], 0)
+
+    def get_or_compute(self, key, version, compute):
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self._counts["invalidations"] += 1
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counts["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+                self._counts["expired"] += 1
+            self._counts["misses"] += 1
+
+        result = compute()
+        with self._lock:
+            # A write that landed while computing makes this result unsafe to keep
+            if version == self._version:
+                self._entries[key] = (now + self.ttl_seconds, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counts["evicted"] += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts, entries=len(self._entries))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._counts:
+                self._counts[name] = 0
+
+_cache = SearchCache()
+
+def _current_version():
+    """(database generation, change counter), or None if it can't be read (then nothing is cached)."""
+    conn = connect_db()
+    try:
+        row = queries.fetch_one(conn.cursor(), "search_cache.version")
+        return (db_init.DB_PATH, conn.generation, row[0]) if row else None
+    except Exception as e:
+        print(f"[ERROR] search_cache: {e}")
+        return None
+    finally:
+        conn.close()
+
+def cached_search(func):
+    """
+    Decorator for search functions taking the search term first. The term
+    is normalized (normalize_term) before the call, and the result comes
+    from the cache when the same search was made since the last write.
+    """
+    @functools.wraps(func)
+    def wrapper(search_term, *args, **kwargs):
+        search_term = normalize_term(search_term)
+        version = _current_version()
+        if version is None:
+            return func(search_term, *args, **kwargs)
+        key = (func.__name__, search_term, args, tuple(sorted(kwargs.items())))
+        return _cache.get_or_compute(key, version, lambda: func(search_term, *args, **kwargs))
+    wrapper.uncached = func
+    return wrapper
+
+def invalidate_search_cache():
+    """Drops every cached result (e.g. after the database file was replaced)."""
+    _cache.clear()
+
+def get_search_cache_stats():
+    """hits, misses, hit_rate, invalidations, expired, evicted and entries for this process."""
+    return _cache.stats()
+
+def reset_search_cache_stats():
+    _cache.reset_stats()
@@ -1,9 +1,35 @@
 # SMS/core/student_operations.py
+import json
 import sqlite3
 import os
 import re
-from core.db_init import connect_db
-from core.due_operations import check_if_monthly_fee_was_run, add_specific_monthly_fee
+import socket
+from core import queries
+from core.db_init import connect_db, FIRST_FAMILY_SSN
+from core.utils import normalize_contact_key
+from core.dedup import check_person
+from core.search_cache import cached_search
+from core.name_index import PERSON, FAMILY, find_candidates, rank_by_name, index_person_name, index_family_name
+from core.records import StudentSummary, StudentDetails, ContactRecord
+from core.pagination import (
+    Page, EMPTY_PAGE, DEFAULT_PAGE_SIZE, decode_cursor, clamp_page_size, fetch_page
+)
+from core.due_operations import (
+    check_if_monthly_fee_was_run, add_specific_monthly_fee,
+    current_monthly_fee_period, insert_current_monthly_fee, current_monthly_fee_due_type
+)
+
+# Family SSNs reserved per terminal at a time (see allocate_family_ssn).
+FAMILY_SSN_BLOCK_SIZE = 20
+# Identifies this desk when reserving SSN blocks.
+TERMINAL_ID = socket.gethostname()
+
+queries.register("families.id_by_ssn", "SELECT id FROM family WHERE family_SSN = ?")
+queries.register("families.rename", "UPDATE family SET family_name = ? WHERE id = ?")
+queries.register("families.insert", """
+    INSERT INTO family (family_SSN, family_name)
+    VALUES (?, ?)
+""")
 
 def get_or_create_family(family_ssn, family_name):
     """
@@ -13,22 +39,21 @@ def get_or_create_family(family_ssn, family_name):
     conn = connect_db()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT id FROM family WHERE family_SSN = ?", (family_ssn,))
-        row = cursor.fetchone()
+        row = queries.fetch_one(cursor, "families.id_by_ssn", (family_ssn,))
         
         if row:
             family_id = row[0]
             if family_name:
-                cursor.execute("UPDATE family SET family_name = ? WHERE id = ?", (family_name, family_id))
+                queries.execute(cursor, "families.rename", (family_name, family_id))
+                index_family_name(cursor, family_id, family_name)
             conn.commit()
             return family_id
         else:
-            cursor.execute("""
-                INSERT INTO family (family_SSN, family_name)
-                VALUES (?, ?)
-            """, (family_ssn, family_name))
+            queries.execute(cursor, "families.insert", (family_ssn, family_name))
+            family_id = cursor.lastrowid
+            index_family_name(cursor, family_id, family_name)
             conn.commit()
-            return cursor.lastrowid
+            return family_id
             
     except Exception as e:
         print(f"[ERROR] get_or_create_family: {e}")
@@ -37,27 +62,132 @@ def get_or_create_family(family_ssn, family_name):
     finally:
         conn.close()
 
-def get_next_family_ssn():
+queries.register("ssn_blocks.get", "SELECT next_value, end_value FROM family_ssn_block WHERE terminal_id = ?")
+queries.register("ssn_blocks.take", "UPDATE family_ssn_block SET next_value = next_value + 1 WHERE terminal_id = ?")
+queries.register("ssn_blocks.reserve", """
+    INSERT INTO family_ssn_block (terminal_id, next_value, end_value)
+    VALUES (?, ?, ?)
+    ON CONFLICT(terminal_id) DO UPDATE
+    SET next_value = excluded.next_value, end_value = excluded.end_value
+""")
+
+def allocate_family_ssn(cursor, terminal_id=None, block_size=FAMILY_SSN_BLOCK_SIZE):
+    """
+    Hands out the next family SSN using the caller's cursor. Does not commit.
+    The counter is bumped with a single-row UPDATE, so two desks can never
+    receive the same number. With a terminal_id the SSN is taken from that
+    terminal's reserved block (a new block is reserved when it runs out).
+    """
+    if terminal_id:
+        row = queries.fetch_one(cursor, "ssn_blocks.get", (terminal_id,))
+        if row and row[0] < row[1]:
+            queries.execute(cursor, "ssn_blocks.take", (terminal_id,))
+            return str(row[0])
+        first = _bump_family_ssn_sequence(cursor, block_size)
+        queries.execute(cursor, "ssn_blocks.reserve", (terminal_id, first + 1, first + block_size))
+        return str(first)
+
+    return str(_bump_family_ssn_sequence(cursor, 1))
+
+queries.register("id_sequence.bump_family_ssn",
+                 "UPDATE id_sequence SET next_value = next_value + ? WHERE name = 'family_ssn'")
+queries.register("id_sequence.seed_family_ssn", """
+    INSERT INTO id_sequence (name, next_value)
+    SELECT 'family_ssn', COALESCE(MAX(CAST(family_SSN AS INTEGER)) + 1, ?) + ?
+    FROM family
+""")
+queries.register("id_sequence.family_ssn", "SELECT next_value FROM id_sequence WHERE name = 'family_ssn'")
+
+def _bump_family_ssn_sequence(cursor, count):
+    """Advances the global counter by count and returns the first value taken."""
+    queries.execute(cursor, "id_sequence.bump_family_ssn", (count,))
+    if cursor.rowcount == 0:
+        # Counter missing (e.g. initialize_db not run yet): seed it from the family table.
+        queries.execute(cursor, "id_sequence.seed_family_ssn", (FIRST_FAMILY_SSN, count))
+    return queries.fetch_one(cursor, "id_sequence.family_ssn")[0] - count
+
+def reserve_family_ssn_block(terminal_id, block_size=FAMILY_SSN_BLOCK_SIZE):
     """
-    Calculates the next available family SSN.
-    Starts at 10001.
+    Reserves a fresh block of family SSNs for one terminal.
+    Returns (first_ssn, end_ssn) with end exclusive, or (None, None) on error.
     """
     conn = connect_db()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT MAX(CAST(family_SSN AS INTEGER)) FROM family")
-        row = cursor.fetchone()
-        if row and row[0] is not None:
-            next_ssn = row[0] + 1
-            return str(next_ssn)
-        else:
-            return "10001"
+        cursor.execute("BEGIN IMMEDIATE")
+        first = _bump_family_ssn_sequence(cursor, block_size)
+        queries.execute(cursor, "ssn_blocks.reserve", (terminal_id, first, first + block_size))
+        conn.commit()
+        return first, first + block_size
+    except Exception as e:
+        print(f"[ERROR] reserve_family_ssn_block: {e}")
+        conn.rollback()
+        return None, None
+    finally:
+        conn.close()
+
+def get_next_family_ssn(terminal_id=None):
+    """
+    Returns the family SSN the next create_family call will most likely get,
+    for display only. This is a primary-key read and does not reserve anything;
+    with a terminal_id it is exact, since the terminal's block is its own.
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        if terminal_id:
+            row = queries.fetch_one(cursor, "ssn_blocks.get", (terminal_id,))
+            if row and row[0] < row[1]:
+                return str(row[0])
+        row = queries.fetch_one(cursor, "id_sequence.family_ssn")
+        if row:
+            return str(row[0])
+        return str(FIRST_FAMILY_SSN)
     except Exception as e:
         print(f"[ERROR] get_next_family_ssn: {e}")
-        return "10001"
+        return str(FIRST_FAMILY_SSN)
     finally:
         conn.close()
 
+def create_family(family_name, terminal_id=None):
+    """
+    Creates a new family with a freshly allocated SSN in one transaction.
+    Returns (family_id, family_ssn), or (None, None) on failure.
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        family_ssn = allocate_family_ssn(cursor, terminal_id)
+        queries.execute(cursor, "families.insert", (family_ssn, family_name))
+        family_id = cursor.lastrowid
+        index_family_name(cursor, family_id, family_name)
+        conn.commit()
+        return family_id, family_ssn
+    except Exception as e:
+        print(f"[ERROR] create_family: {e}")
+        conn.rollback()
+        return None, None
+    finally:
+        conn.close()
+
+# Results returned by the typo-tolerant searches
+FUZZY_RESULT_LIMIT = 50
+
+_FAMILY_FILTERS = {"by_ssn": "family_SSN LIKE ?", "by_name": "family_name LIKE ?"}
+for _shape, _where in _FAMILY_FILTERS.items():
+    queries.register(f"families.search_{_shape}", f"SELECT id, family_SSN, family_name FROM family WHERE {_where}")
+    queries.register(f"families.page_{_shape}", f"""
+        SELECT id, family_SSN, family_name FROM family
+        WHERE {_where} AND id > ?
+        ORDER BY id LIMIT ?
+    """)
+    queries.register(f"families.count_{_shape}", f"SELECT COUNT(*) FROM family WHERE {_where}")
+
+def _family_search_shape(search_term):
+    return "by_ssn" if search_term.isdigit() else "by_name"
+
+@cached_search
 def search_families(search_term):
     """
     Searches the family table by SSN or name.
@@ -65,23 +195,107 @@ def search_families(search_term):
     conn = connect_db()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
-    query = "SELECT id, family_SSN, family_name FROM family"
-    params = []
-    if search_term.isdigit():
-        query += " WHERE family_SSN LIKE ?"
-        params.append(f"%{search_term}%")
-    else:
-        query += " WHERE family_name LIKE ?"
-        params.append(f"%{search_term}%")
+    name = f"families.search_{_family_search_shape(search_term)}"
     try:
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in queries.fetch_all(cursor, name, (f"%{search_term}%",))]
     except Exception as e:
         print(f"[ERROR] search_families: {e}")
         return []
     finally:
         conn.close()
 
+@cached_search
+def search_families_page(search_term, cursor=None, page_size=DEFAULT_PAGE_SIZE, with_total=False):
+    """
+    One page of search_families() results (dicts), in family id order.
+    Pass the returned Page's next_cursor back as cursor for the next page.
+    """
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    db_cursor = conn.cursor()
+    shape = _family_search_shape(search_term)
+    pattern = f"%{search_term}%"
+    try:
+        after_id = decode_cursor("families", cursor)[0] if cursor else 0
+        rows, next_cursor = fetch_page(db_cursor, f"families.page_{shape}", (pattern, after_id),
+                                       clamp_page_size(page_size), "families", lambda row: [row["id"]])
+        total = None
+        if with_total and not cursor:
+            total = queries.fetch_one(db_cursor, f"families.count_{shape}", (pattern,))[0]
+        return Page([dict(row) for row in rows], next_cursor, total)
+    except Exception as e:
+        print(f"[ERROR] search_families_page: {e}")
+        return EMPTY_PAGE
+    finally:
+        conn.close()
+
+queries.register("families.by_ids", """
+    SELECT id, family_SSN, family_name FROM family
+    WHERE id IN (SELECT value FROM json_each(?))
+""")
+
+@cached_search
+def search_families_fuzzy(search_term, limit=FUZZY_RESULT_LIMIT):
+    """
+    Typo-tolerant family name search: families whose name shares enough
+    trigrams with search_term, closest name first (dicts, like search_families).
+    """
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    try:
+        ids = [ref_id for ref_id, _ in find_candidates(cursor, FAMILY, search_term)]
+        if not ids:
+            return []
+        rows = queries.fetch_all(cursor, "families.by_ids", (json.dumps(ids),))
+        return [dict(row) for row in rank_by_name(search_term, rows, lambda row: row["family_name"])[:limit]]
+    except Exception as e:
+        print(f"[ERROR] search_families_fuzzy: {e}")
+        return []
+    finally:
+        conn.close()
+
+queries.register("people.insert", """
+    INSERT INTO person (fathername, mothername, dob, address, gender)
+    VALUES (?, ?, ?, ?, ?)
+""")
+queries.register("fullnames.insert", """
+    INSERT INTO fullname (person_id, first_name, middle_name, last_name)
+    VALUES (?, ?, ?, ?)
+""")
+queries.register("contacts.insert", """
+    INSERT INTO contact (person_id, type, value, label, contact_key)
+    VALUES (?, ?, ?, ?, ?)
+""")
+
+def contact_row(person_id, contact):
+    """contacts.insert parameters for one contact dict, with its normalized contact_key."""
+    ctype, value = contact.get('type'), contact.get('value')
+    return (person_id, ctype, value, contact.get('label'), normalize_contact_key(ctype, value))
+queries.register("students.insert", """
+    INSERT INTO student (person_id, family_id, date_of_admission, monthly_fee, annual_fund, class)
+    VALUES (?, ?, ?, ?, ?, ?)
+""")
+
+def insert_student_rows(cursor, first_name, middle_name, last_name, father_name, mother_name,
+                        dob, address, gender, contacts, date_of_admission, monthly_fee,
+                        annual_fund, student_class, family_id):
+    """
+    Inserts the person, fullname, contact and student rows for a new student
+    using the caller's cursor. Does not commit. Returns the new student id.
+    """
+    queries.execute(cursor, "people.insert", (father_name, mother_name, dob, address, gender))
+    person_id = cursor.lastrowid
+
+    queries.execute(cursor, "fullnames.insert", (person_id, first_name, middle_name, last_name))
+    index_person_name(cursor, person_id, first_name, middle_name, last_name)
+
+    queries.execute_many(cursor, "contacts.insert", [contact_row(person_id, c) for c in contacts])
+    check_person(cursor, person_id)  # Records likely duplicates for review (core/dedup.py)
+
+    queries.execute(cursor, "students.insert",
+                    (person_id, family_id, date_of_admission, monthly_fee, annual_fund, student_class))
+    return cursor.lastrowid
 
 def add_student(first_name, middle_name, last_name, father_name, mother_name,
                 dob, address, gender, contacts, date_of_admission, monthly_fee,
@@ -95,29 +309,11 @@ def add_student(first_name, middle_name, last_name, father_name, mother_name,
         fee_amount = float(monthly_fee)
         fund_amount = float(annual_fund)
         
-        cursor.execute('''
-            INSERT INTO person (fathername, mothername, dob, address, gender)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (father_name, mother_name, dob, address, gender))
-        person_id = cursor.lastrowid
-
-        cursor.execute('''
-            INSERT INTO fullname (person_id, first_name, middle_name, last_name)
-            VALUES (?, ?, ?, ?)
-        ''', (person_id, first_name, middle_name, last_name))
-
-        for contact in contacts:
-            cursor.execute('''
-                INSERT INTO contact (person_id, type, value, label)
-                VALUES (?, ?, ?, ?)
-            ''', (person_id, contact.get('type'), contact.get('value'), contact.get('label')))
-
-        cursor.execute('''
-            INSERT INTO student (person_id, family_id, date_of_admission, monthly_fee, annual_fund, class)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (person_id, family_id, date_of_admission, fee_amount, fund_amount, student_class))
-        
-        new_student_id = cursor.lastrowid
+        new_student_id = insert_student_rows(
+            cursor, first_name, middle_name, last_name, father_name, mother_name,
+            dob, address, gender, contacts, date_of_admission, fee_amount,
+            fund_amount, student_class, family_id
+        )
         conn.commit()
         
         if fee_amount > 0:
@@ -134,51 +330,143 @@ def add_student(first_name, middle_name, last_name, father_name, mother_name,
     finally:
         conn.close()
 
-def search_students(search_term):
+queries.register("families.ssn_by_id", "SELECT family_SSN FROM family WHERE id = ?")
+queries.register("families.upsert", """
+    INSERT INTO family (family_SSN, family_name)
+    VALUES (?, ?)
+    ON CONFLICT(family_SSN) DO UPDATE
+    SET family_name = COALESCE(excluded.family_name, family.family_name)
+""")
+
+def enroll_student(first_name, middle_name, last_name, father_name, mother_name,
+                   dob, address, gender, contacts, date_of_admission, monthly_fee,
+                   annual_fund, student_class, family_id=None, family_ssn=None,
+                   family_name=None, add_current_month_fee=False, terminal_id=None):
     """
-    Search for students by ID, 5-digit Family SSN, or name.
+    Enrolls a student in a single transaction on a single connection:
+    family, person, fullname, contacts, student and (optionally) the
+    current month's fee.
+
+    The family is resolved in this order:
+      - family_id: link to an existing family.
+      - family_ssn: upsert by SSN (name updated if given).
+      - otherwise: create a new family named family_name with a freshly
+        allocated SSN (see allocate_family_ssn).
+
+    The current month's fee is only added when add_current_month_fee is set
+    and the monthly fee job has already billed this month.
+
+    Returns (True, "SUCCESS", student_id, family_ssn, fee_due_type_or_None)
+    Returns (False, error_message, None, None, None) on failure.
     """
     conn = connect_db()
-    conn.row_factory = sqlite3.Row 
     cursor = conn.cursor()
-    
-    query = """
-        SELECT 
-            s.id as student_id,
-            f.first_name || ' ' || COALESCE(f.middle_name || ' ', '') || f.last_name as full_name,
-            p.fathername as father_name,
-            p.mothername as mother_name,
-            s.class,
-            s.monthly_fee,
-            s.annual_fund,
-            fam.family_SSN,
-            fam.family_name
-        FROM student s
-        JOIN person p ON s.person_id = p.id
-        JOIN fullname f ON f.person_id = p.id
-        LEFT JOIN family fam ON s.family_id = fam.id
-    """
-    params = []
+    try:
+        fee_amount = float(monthly_fee)
+        fund_amount = float(annual_fund)
+
+        cursor.execute("BEGIN IMMEDIATE")
+
+        if family_id:
+            row = queries.fetch_one(cursor, "families.ssn_by_id", (family_id,))
+            if not row:
+                raise Exception(f"Family {family_id} not found")
+            family_ssn = row[0]
+        else:
+            if not family_ssn:
+                family_ssn = allocate_family_ssn(cursor, terminal_id)
+            queries.execute(cursor, "families.upsert", (family_ssn, family_name or None))
+            family_id = queries.fetch_one(cursor, "families.id_by_ssn", (family_ssn,))[0]
+            if family_name:
+                index_family_name(cursor, family_id, family_name)
+
+        new_student_id = insert_student_rows(
+            cursor, first_name, middle_name, last_name, father_name, mother_name,
+            dob, address, gender, contacts, date_of_admission, fee_amount,
+            fund_amount, student_class, family_id
+        )
+
+        fee_due_type = None
+        if add_current_month_fee and fee_amount > 0 and current_monthly_fee_period(cursor):
+            fee_due_type = current_monthly_fee_due_type()
+            insert_current_monthly_fee(cursor, new_student_id, fee_amount, fee_due_type)
+
+        conn.commit()
+        return True, "SUCCESS", new_student_id, family_ssn, fee_due_type
+
+    except Exception as e:
+        print(f"[ERROR] enroll_student: {e}")
+        conn.rollback()
+        return False, str(e), None, None, None
+    finally:
+        conn.close()
+
+_STUDENT_FROM = """
+    FROM student s
+    JOIN person p ON s.person_id = p.id
+    JOIN fullname f ON f.person_id = p.id
+    LEFT JOIN family fam ON s.family_id = fam.id
+"""
+_STUDENT_SEARCH = """
+    SELECT 
+        s.id as student_id,
+        f.first_name || ' ' || COALESCE(f.middle_name || ' ', '') || f.last_name as full_name,
+        p.fathername as father_name,
+        p.mothername as mother_name,
+        s.class,
+        s.monthly_fee,
+        s.annual_fund,
+        fam.family_SSN,
+        fam.family_name
+""" + _STUDENT_FROM
+_NAME_TERM = "(f.first_name LIKE ? OR f.middle_name LIKE ? OR f.last_name LIKE ?)"
+# Name searches use one fixed statement per token count, up to this many
+# tokens; further tokens are matched against full_name in Python.
+MAX_SQL_NAME_TERMS = 4
+
+_STUDENT_FILTERS = {
+    "all": "1 = 1",
+    "by_family_ssn": "fam.family_SSN = ?",
+    "by_id": "s.id = ?",
+}
+for _count in range(1, MAX_SQL_NAME_TERMS + 1):
+    _STUDENT_FILTERS[f"by_name_{_count}"] = " AND ".join([_NAME_TERM] * _count)
+for _shape, _where in _STUDENT_FILTERS.items():
+    queries.register(f"students.search_{_shape}", f"{_STUDENT_SEARCH} WHERE {_where}")
+    queries.register(f"students.page_{_shape}",
+                     f"{_STUDENT_SEARCH} WHERE {_where} AND s.id > ? ORDER BY s.id LIMIT ?")
+    queries.register(f"students.count_{_shape}", f"SELECT COUNT(*) {_STUDENT_FROM} WHERE {_where}")
+
+def _student_search_shape(search_term):
+    """Returns (shape, params, extra_terms) for a search_students() term."""
     cleaned_term = re.sub(r'\D', '', search_term)
-    
+    terms = search_term.split()
     if cleaned_term.isdigit() and len(cleaned_term) == 5:
-        query += " WHERE fam.family_SSN = ?"
-        params.append(cleaned_term)
-    elif cleaned_term.isdigit():
-        query += " WHERE s.id = ?"
-        params.append(int(cleaned_term))
-    else:
-        terms = search_term.split()
-        conditions = []
-        for term in terms:
-            conditions.append("(f.first_name LIKE ? OR f.middle_name LIKE ? OR f.last_name LIKE ?)")
-            params.extend([f"%{term}%", f"%{term}%", f"%{term}%"])
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-            
+        return "by_family_ssn", (cleaned_term,), []
+    if cleaned_term.isdigit():
+        return "by_id", (int(cleaned_term),), []
+    if terms:
+        sql_terms, extra_terms = terms[:MAX_SQL_NAME_TERMS], terms[MAX_SQL_NAME_TERMS:]
+        params = tuple(pattern for term in sql_terms for pattern in (f"%{term}%",) * 3)
+        return f"by_name_{len(sql_terms)}", params, [term.lower() for term in extra_terms]
+    return "all", (), []
+
+def _matches_extra_terms(results, extra_terms):
+    return [r for r in results if all(term in r.full_name.lower() for term in extra_terms)]
+
+@cached_search
+def search_students(search_term):
+    """
+    Search for students by ID, 5-digit Family SSN, or name.
+    Returns a list of StudentSummary.
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+    shape, params, extra_terms = _student_search_shape(search_term)
     try:
-        cursor.execute(query, params)
-        results = [dict(row) for row in cursor.fetchall()]
+        results = queries.fetch_all(cursor, f"students.search_{shape}", params, StudentSummary)
+        if extra_terms:
+            results = _matches_extra_terms(results, extra_terms)
         return results
     except Exception as e:
         print(f"[ERROR] search_students: {e}")
@@ -186,27 +474,128 @@ def search_students(search_term):
     finally:
         conn.close()
 
-def get_student_contacts(student_id):
-    """Fetches all contacts for a given student ID."""
+@cached_search
+def search_students_page(search_term, cursor=None, page_size=DEFAULT_PAGE_SIZE, with_total=False):
+    """
+    One page of search_students() results (StudentSummary), in student id
+    order. Pass the returned Page's next_cursor back as cursor for the next
+    page. With more than MAX_SQL_NAME_TERMS name tokens the total counts the
+    SQL matches before the extra tokens are applied, so it is an upper bound.
+    """
+    conn = connect_db()
+    db_cursor = conn.cursor()
+    shape, params, extra_terms = _student_search_shape(search_term)
+    page_size = clamp_page_size(page_size)
+    try:
+        after_id = decode_cursor("students", cursor)[0] if cursor else 0
+        items = []
+        next_cursor = None
+        while True:
+            rows, next_cursor = fetch_page(db_cursor, f"students.page_{shape}", params + (after_id,),
+                                           page_size - len(items), "students", lambda r: [r.student_id],
+                                           StudentSummary)
+            if rows:
+                after_id = rows[-1].student_id
+            items.extend(_matches_extra_terms(rows, extra_terms) if extra_terms else rows)
+            # Rows dropped by the extra tokens are made up from the following rows
+            if next_cursor is None or len(items) == page_size:
+                break
+        total = None
+        if with_total and not cursor:
+            total = queries.fetch_one(db_cursor, f"students.count_{shape}", params)[0]
+        return Page(items, next_cursor, total)
+    except Exception as e:
+        print(f"[ERROR] search_students_page: {e}")
+        return EMPTY_PAGE
+    finally:
+        conn.close()
+
+queries.register("students.by_person_ids", f"""
+    {_STUDENT_SEARCH}
+    WHERE f.person_id IN (SELECT value FROM json_each(?))
+""")
+
+@cached_search
+def search_students_fuzzy(search_term, limit=FUZZY_RESULT_LIMIT):
+    """
+    Typo-tolerant name search ("Mohamad Ali" finds "Muhammad Ali"): students
+    whose name shares enough trigrams with search_term, ranked by edit
+    distance, closest first. Returns at most limit StudentSummary.
+    """
     conn = connect_db()
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
-    query = """
-        SELECT c.type, c.value, c.label
+    try:
+        person_ids = [ref_id for ref_id, _ in find_candidates(cursor, PERSON, search_term)]
+        if not person_ids:
+            return []
+        rows = queries.fetch_all(cursor, "students.by_person_ids", (json.dumps(person_ids),), StudentSummary)
+        return rank_by_name(search_term, rows, lambda r: r.full_name)[:limit]
+    except Exception as e:
+        print(f"[ERROR] search_students_fuzzy: {e}")
+        return []
+    finally:
+        conn.close()
+
+# Every student matching the contact, plus their siblings (same family)
+queries.register("students.by_contact_key", f"""
+    WITH matched AS (
+        SELECT s.id, s.family_id
         FROM contact c
-        JOIN student s ON c.person_id = s.person_id
-        WHERE s.id = ?
+        JOIN student s ON s.person_id = c.person_id
+        WHERE c.contact_key = ?
+    )
+    {_STUDENT_SEARCH}
+    WHERE s.id IN (SELECT id FROM matched)
+       OR s.family_id IN (SELECT family_id FROM matched)
+    ORDER BY fam.family_SSN, s.id
+""")
+
+def contact_type_of(value):
+    """'email' for anything with an @, otherwise 'phone'."""
+    return "email" if "@" in value else "phone"
+
+@cached_search
+def find_students_by_contact(value):
+    """
+    Reverse lookup for a caller's phone number or email, in any format
+    ("+92 300-1234567", "0300 1234567", " Name@Mail.com"). Returns the
+    StudentSummary of every student with that contact and of their
+    siblings in the same family, grouped by family.
     """
+    key = normalize_contact_key(contact_type_of(value), value)
+    if not key:
+        return []
+    conn = connect_db()
+    cursor = conn.cursor()
     try:
-        cursor.execute(query, (student_id,))
-        results = [dict(row) for row in cursor.fetchall()]
-        return results
+        return queries.fetch_all(cursor, "students.by_contact_key", (key,), StudentSummary)
+    except Exception as e:
+        print(f"[ERROR] find_students_by_contact: {e}")
+        return []
+    finally:
+        conn.close()
+
+queries.register("contacts.for_student", """
+    SELECT c.type, c.value, c.label
+    FROM contact c
+    JOIN student s ON c.person_id = s.person_id
+    WHERE s.id = ?
+""")
+
+def get_student_contacts(student_id):
+    """Fetches all contacts (ContactRecord) for a given student ID."""
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        return queries.fetch_all(cursor, "contacts.for_student", (student_id,), ContactRecord)
     except Exception as e:
         print(f"[ERROR] get_student_contacts: {e}")
         return []
     finally:
         conn.close()
 
+queries.register("students.exists", "SELECT 1 FROM student WHERE id = ? LIMIT 1")
+
 def check_student_exists(student_id):
     """
     Checks if a student with the given ID exists in the database.
@@ -214,8 +603,7 @@ def check_student_exists(student_id):
     conn = connect_db()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT 1 FROM student WHERE id = ? LIMIT 1", (student_id,))
-        if cursor.fetchone():
+        if queries.fetch_one(cursor, "students.exists", (student_id,)):
             return True
         else:
             return False
@@ -225,51 +613,45 @@ def check_student_exists(student_id):
     finally:
         conn.close()
 
+queries.register("students.details", """
+    SELECT 
+        s.id as student_id, s.person_id, s.family_id,
+        s.date_of_admission, s.monthly_fee, s.annual_fund, s.class,
+        p.fathername, p.mothername, p.dob, p.address, p.gender,
+        f.first_name, f.middle_name, f.last_name,
+        fam.family_SSN, fam.family_name
+    FROM student s
+    JOIN person p ON s.person_id = p.id
+    -- --- FIX: Corrected JOIN from p.person_id = f.id to f.person_id = p.id ---
+    JOIN fullname f ON f.person_id = p.id
+    LEFT JOIN family fam ON s.family_id = fam.id
+    WHERE s.id = ?
+""")
+queries.register("contacts.for_person", """
+    SELECT type, value, label
+    FROM contact
+    WHERE person_id = ?
+""")
+
 # --- UPDATED FUNCTION ---
 def get_student_details_by_id(student_id):
     """
     Fetches a complete record for a student for populating the update form.
+    Returns a StudentDetails (contacts included) or None.
     """
     conn = connect_db()
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    details = {}
     try:
         # 1. Get main data
-        cursor.execute("""
-            SELECT 
-                s.id as student_id, s.person_id, s.family_id,
-                s.date_of_admission, s.monthly_fee, s.annual_fund, s.class,
-                p.fathername, p.mothername, p.dob, p.address, p.gender,
-                f.first_name, f.middle_name, f.last_name,
-                fam.family_SSN, fam.family_name
-            FROM student s
-            JOIN person p ON s.person_id = p.id
-            -- --- FIX: Corrected JOIN from p.person_id = f.id to f.person_id = p.id ---
-            JOIN fullname f ON f.person_id = p.id
-            LEFT JOIN family fam ON s.family_id = fam.id
-            WHERE s.id = ?
-        """, (student_id,))
-        
-        main_data = cursor.fetchone()
+        main_data = queries.fetch_one(cursor, "students.details", (student_id,))
         if not main_data:
             return None
         
-        details = dict(main_data)
-        
         # 2. Get contacts (uses person_id)
-        person_id = details['person_id']
-        cursor.execute("""
-            SELECT type, value, label
-            FROM contact
-            WHERE person_id = ?
-        """, (person_id,))
-        
-        contacts = [dict(row) for row in cursor.fetchall()]
-        details['contacts'] = contacts
-        
-        return details
+        person_id = main_data[1]
+        contacts = queries.fetch_all(cursor, "contacts.for_person", (person_id,), ContactRecord)
+        return StudentDetails._make(main_data + (contacts,))
         
     except Exception as e:
         print(f"[ERROR] get_student_details_by_id: {e}")
@@ -277,6 +659,24 @@ def get_student_details_by_id(student_id):
     finally:
         conn.close()
 
+queries.register("people.update", """
+    UPDATE person
+    SET fathername = ?, mothername = ?, dob = ?, address = ?, gender = ?
+    WHERE id = ?
+""")
+queries.register("fullnames.update", """
+    UPDATE fullname
+    SET first_name = ?, middle_name = ?, last_name = ?
+    WHERE person_id = ?
+""")
+queries.register("students.update", """
+    UPDATE student
+    SET family_id = ?, date_of_admission = ?, monthly_fee = ?, 
+        annual_fund = ?, class = ?
+    WHERE id = ?
+""")
+queries.register("contacts.delete_for_person", "DELETE FROM contact WHERE person_id = ?")
+
 # --- NEW FUNCTION ---
 def update_student(student_id, person_id, data, contacts, family_id):
     """
@@ -288,38 +688,26 @@ def update_student(student_id, person_id, data, contacts, family_id):
         cursor.execute("BEGIN")
         
         # 1. Update person table
-        cursor.execute("""
-            UPDATE person
-            SET fathername = ?, mothername = ?, dob = ?, address = ?, gender = ?
-            WHERE id = ?
-        """, (data['father_name'], data['mother_name'], data['dob'], 
-              data['address'], data['gender'], person_id))
+        queries.execute(cursor, "people.update", (data['father_name'], data['mother_name'], data['dob'], 
+                                                  data['address'], data['gender'], person_id))
               
         # 2. Update fullname table
-        cursor.execute("""
-            UPDATE fullname
-            SET first_name = ?, middle_name = ?, last_name = ?
-            WHERE person_id = ?
-        """, (data['first_name'], data['middle_name'], data['last_name'], person_id))
+        queries.execute(cursor, "fullnames.update",
+                        (data['first_name'], data['middle_name'], data['last_name'], person_id))
+        index_person_name(cursor, person_id, data['first_name'], data['middle_name'], data['last_name'])
         
         # 3. Update student table
-        cursor.execute("""
-            UPDATE student
-            SET family_id = ?, date_of_admission = ?, monthly_fee = ?, 
-                annual_fund = ?, class = ?
-            WHERE id = ?
-        """, (family_id, data['date_of_admission'], float(data['monthly_fee']),
-              float(data['annual_fund']), data['student_class'], student_id))
+        queries.execute(cursor, "students.update",
+                        (family_id, data['date_of_admission'], float(data['monthly_fee']),
+                         float(data['annual_fund']), data['student_class'], student_id))
               
         # 4. Delete old contacts
-        cursor.execute("DELETE FROM contact WHERE person_id = ?", (person_id,))
+        queries.execute(cursor, "contacts.delete_for_person", (person_id,))
         
         # 5. Insert new contacts
         for contact in contacts:
-            cursor.execute("""
-                INSERT INTO contact (person_id, type, value, label)
-                VALUES (?, ?, ?, ?)
-            """, (person_id, contact.get('type'), contact.get('value'), contact.get('label')))
+            queries.execute(cursor, "contacts.insert", contact_row(person_id, contact))
+        check_person(cursor, person_id)
             
         # 6. Commit
         conn.commit()
@@ -1,12 +1,8 @@
 # SMS/core/utils.py
-from PyQt5.QtWidgets import QMessageBox
+# Plain validators only: nothing under core/ may import Qt (see ui/utils.py for dialogs).
 from datetime import datetime
 import re
 
-def show_warning(parent, title, message):
-    """A reusable wrapper for QMessageBox.warning."""
-    QMessageBox.warning(parent, title, message)
-
 def validate_required_fields(data_dict, required_keys, display_names=None):
     """
     Validates that all specified keys in data_dict have non-empty string values.
@@ -64,13 +60,39 @@ def validate_password_length(password, min_length=8):
     
 def validate_phone_length(phone_number, required_length=11):
     """
-    Validates that the phone number is exactly the required length (11 digits).
+    Validates that the phone number is exactly the required length (11 digits)
+    in national form, so "+92 300 1234567" is accepted like "0300-1234567".
     """
-    digits_only = re.sub(r'\D', '', phone_number)
+    digits_only = normalize_contact_key("phone", phone_number) or ""
     if len(digits_only) != required_length:
         return False, f"Phone number must be exactly {required_length} digits long."
     return True, None
 
+# Country calling code stripped from phone numbers by normalize_contact_key.
+PHONE_COUNTRY_CODE = "92"
+
+def normalize_contact_key(contact_type, value):
+    """
+    Returns the indexed lookup key for a contact value (contact.contact_key):
+    phone numbers in national form with digits only, so "+92 300-1234567",
+    "0092 300 1234567" and "0300-1234567" all give "03001234567"; emails and
+    other types trimmed and lower-cased. Returns None for an empty value.
+    """
+    if value is None:
+        return None
+    if contact_type == "phone":
+        digits = re.sub(r'\D', '', value)
+        if digits.startswith("00"):
+            digits = digits[2:]
+        # National numbers start with 0, so a leading country code is unambiguous
+        if digits.startswith(PHONE_COUNTRY_CODE):
+            digits = digits[len(PHONE_COUNTRY_CODE):]
+        if digits and not digits.startswith("0"):
+            digits = "0" + digits
+        return digits or None
+    key = value.strip().lower()
+    return key or None
+
 def validate_is_float(value_str):
     """
     Validates that a string can be converted to a positive float.
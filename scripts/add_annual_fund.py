@@ -0,0 +1,34 @@
+# scripts/add_annual_fund.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from core.db_init import initialize_db
+from core.annual_fund import run_annual_fund_billing, annual_fund_due_type, current_academic_year
+
+def main():
+    """
+    Bills the annual fund for an academic year (default: the current one).
+    Safe to run more than once; an interrupted run resumes.
+
+    Usage: python scripts/add_annual_fund.py [academic_year]
+    """
+    academic_year = int(sys.argv[1]) if len(sys.argv) > 1 else current_academic_year()
+    initialize_db()
+    print(f"Billing '{annual_fund_due_type(academic_year)}'...")
+
+    success, result = run_annual_fund_billing(
+        academic_year,
+        progress_callback=lambda scanned, inserted: print(f"  {scanned} students scanned, {inserted} billed")
+    )
+    if not success:
+        print(f"[ERROR] Annual fund billing failed: {result}")
+        sys.exit(1)
+    if result["already_billed"]:
+        print(f"Annual fund for {academic_year} has already been billed. No action taken.")
+        return
+    print(f"Billed {result['inserted']} students ({result['prorated']} prorated) in {result['chunks']} chunks: "
+          f"{result['seconds']:.2f}s, {result['rows_per_second']:.0f} rows/s.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# scripts/bench_archive.py
+"""
+Hot-table size and query latency before and after archiving old paid dues.
+
+Seeds `students` students with `months` monthly dues each, pays all but the
+last three months, then runs archive_paid_dues and times the hot queries
+(unpaid dues, payment total, monthly-run check) and the full-history query
+that now spans both databases.
+
+Usage: python scripts/bench_archive.py [students] [months]
+"""
+import random
+import sys
+import time
+from bench_utils import use_temp_database, seed_students
+from core.db_init import connect_db
+from core.archive import archive_paid_dues, get_tier_sizes
+from core.due_operations import (
+    get_unpaid_dues_for_student, get_all_student_dues_with_summary, check_if_monthly_fee_was_run
+)
+
+def pay_old_dues(months):
+    """Marks every due older than the last three months as paid, with one payment each."""
+    conn = connect_db()
+    conn.execute("""
+        UPDATE pending_due SET due_date = date('now', '-' || (? - CAST(substr(due_type, 21) AS INTEGER)) || ' months')
+    """, (months,))
+    conn.execute("""
+        INSERT INTO payment_record (pending_due_id, amount_paid, payment_timestamp, payment_mode, received_by_user)
+        SELECT id, amount_due, due_date || ' 09:00:00', 'Cash', 'Bench Desk'
+        FROM pending_due WHERE due_date < date('now', '-3 months')
+    """)
+    conn.execute("UPDATE pending_due SET status = 'paid' WHERE due_date < date('now', '-3 months')")
+    conn.commit()
+    conn.close()
+
+def payment_total(due_id):
+    conn = connect_db()
+    try:
+        return conn.execute("SELECT SUM(amount_paid) FROM payment_record WHERE pending_due_id = ?", (due_id,)).fetchone()
+    finally:
+        conn.close()
+
+def time_queries(student_ids, due_ids):
+    timings = {}
+    for label, func, args in (
+        ("get_unpaid_dues_for_student", get_unpaid_dues_for_student, student_ids),
+        ("payment total (make_payment)", payment_total, due_ids),
+        ("check_if_monthly_fee_was_run", lambda _: check_if_monthly_fee_was_run(), student_ids[:50]),
+        ("get_all_student_dues_with_summary", get_all_student_dues_with_summary, student_ids),
+    ):
+        start = time.perf_counter()
+        for arg in args:
+            func(arg)
+        timings[label] = (time.perf_counter() - start) / len(args)
+    return timings
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else 36
+    db_path = use_temp_database()
+    due_ids = seed_students(students, dues_per_student=months)
+    pay_old_dues(months)
+    rng = random.Random(7)
+    student_ids = [rng.randint(1, students) for _ in range(300)]
+    sample_dues = [rng.choice(due_ids) for _ in range(300)]
+    print(f"Database: {db_path} ({students} students x {months} months)\n")
+
+    before_sizes, before = get_tier_sizes(), time_queries(student_ids, sample_dues)
+    success, stats = archive_paid_dues()
+    if not success:
+        raise SystemExit(stats)
+    conn = connect_db()
+    conn.execute("VACUUM")
+    conn.close()
+    after_sizes, after = get_tier_sizes(), time_queries(student_ids, sample_dues)
+
+    print(f"Archived {stats['archived_dues']} dues in {stats['chunks']} chunks, {stats['seconds']:.2f}s\n")
+    for table in before_sizes:
+        print(f"{table:<24} {before_sizes[table]:>9} -> {after_sizes[table]:>9} rows")
+    print()
+    for label in before:
+        print(f"{label:<36} {before[label] * 1000:7.3f} ms -> {after[label] * 1000:7.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# scripts/bench_backup.py
+"""
+Online backup cost: snapshot time and size for the page-stepped backup API
+and VACUUM INTO, and how long front-desk payments wait while a backup runs.
+
+Usage: python scripts/bench_backup.py [students] [dues_per_student]
+"""
+import os
+import sys
+import threading
+import time
+from bench_utils import use_temp_database, seed_students
+from core.backup import create_backup, list_backups
+from core.due_operations import make_payment
+
+def payment_latencies(due_ids, stop_event):
+    """Pays dues one by one until stopped; returns each call's latency."""
+    latencies = []
+    for due_id in due_ids:
+        if stop_event.is_set():
+            break
+        start = time.perf_counter()
+        make_payment(due_id, 1.0, "Cash", "2025-11-03 09:00:00", "Bench Desk")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def run_with_payments(due_ids, action):
+    stop_event = threading.Event()
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("lat", payment_latencies(due_ids, stop_event)))
+    thread.start()
+    outcome = action()
+    stop_event.set()
+    thread.join()
+    lat = sorted(result["lat"])
+    return outcome, lat
+
+def describe(lat):
+    if not lat:
+        return "no payments"
+    return (f"{len(lat)} payments, median {lat[len(lat) // 2] * 1000:.2f} ms, "
+            f"max {lat[-1] * 1000:.2f} ms")
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    dues = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    db_path = use_temp_database()
+    due_ids = seed_students(students, dues_per_student=dues)
+    backup_dir = os.path.join(os.path.dirname(db_path), "backups")
+    print(f"Database: {db_path} ({os.path.getsize(db_path) / 1024 / 1024:.1f} MiB)\n")
+
+    _, lat = run_with_payments(due_ids, lambda: time.sleep(1.0))
+    print(f"payments, no backup      : {describe(lat)}")
+
+    for method in ("backup", "vacuum"):
+        (success, stats), lat = run_with_payments(due_ids[len(due_ids) // 2:],
+                                                  lambda: create_backup(backup_dir, method))
+        if not success:
+            print(f"{method}: FAILED {stats}")
+            continue
+        print(f"{method:<6} snapshot          : copy {stats['copy_seconds']:.3f}s, "
+              f"verify {stats['verify_seconds']:.3f}s, {stats['size_bytes'] / 1024 / 1024:.1f} MiB, "
+              f"restarts={stats['restarts']}")
+        print(f"  payments during {method:<7}: {describe(lat)}")
+
+    print(f"\n{len(list_backups(backup_dir))} snapshot(s) in {backup_dir}")
+
+if __name__ == "__main__":
+    main()
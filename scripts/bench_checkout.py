@@ -0,0 +1,69 @@
+# scripts/bench_checkout.py
+"""
+System time per payment at the cashier desk, without the person: the
+Make Payment page's round trips (search_students() for the term, the
+unpaid dues of the picked student, the payment) against fast checkout
+(get_checkout() for the scanned code, the payment). Half the scans are
+student cards ("S<id>"), half family SSNs. Fast-checkout transactions
+are timed with CheckoutTimer and read back with get_checkout_stats(),
+the same figures the health page and `report checkout` show.
+
+Usage: python scripts/bench_checkout.py [students] [payments]
+"""
+import random
+import sys
+import time
+from datetime import datetime
+from bench_utils import use_temp_database, seed_students
+from core.checkout import get_checkout, CheckoutTimer, get_checkout_stats, flush_checkout_runs
+from core.due_operations import get_unpaid_dues_for_student, make_payment
+from core.student_operations import search_students
+
+def pay(due):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return make_payment(due.pending_due_id, 100.0, "Cash", timestamp, "bench")
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    payments = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print(f"Database: {use_temp_database()}")
+    seed_students(students, dues_per_student=12)
+    families = max(1, students // 2)
+    rng = random.Random(5)
+    codes = [f"S{rng.randint(1, students)}" if i % 2 else str(10001 + rng.randint(0, families - 1))
+             for i in range(payments)]
+
+    start = time.perf_counter()
+    for code in codes:
+        # The search term is the bare number, as typed on the Make Payment page
+        results = search_students(code.lstrip("S")) or []
+        if results:
+            dues = get_unpaid_dues_for_student(results[0].student_id)
+            if dues:
+                pay(dues[0])
+    page = (time.perf_counter() - start) / payments
+
+    start = time.perf_counter()
+    for code in codes:
+        timer = CheckoutTimer()
+        timer.start()
+        rows = [(student, due) for student, dues in get_checkout(code) for due in dues]
+        timer.mark("lookup")
+        if rows:
+            student, due = min(rows, key=lambda row: row[1].due_date)
+            _, _, payment_id = pay(due)
+            timer.mark("payment")
+            timer.finish("bench", student.student_id, payment_id, "paid")
+    fast = (time.perf_counter() - start) / payments
+
+    flush_checkout_runs()
+    stats = get_checkout_stats()
+    print(f"\n{students} students, {payments} payments (system time only, no printing)")
+    print(f"  Make Payment round trips : {page * 1000:7.2f} ms/payment")
+    print(f"  fast checkout            : {fast * 1000:7.2f} ms/payment (checkout_run row written in the background)")
+    print(f"  recorded: {stats['transactions']} transactions, median {stats['median_seconds'] * 1000:.2f} ms, "
+          f"p90 {stats['p90_seconds'] * 1000:.2f} ms (lookup {stats['avg_lookup_seconds'] * 1000:.2f} ms, "
+          f"payment {stats['avg_payment_seconds'] * 1000:.2f} ms)")
+
+if __name__ == "__main__":
+    main()
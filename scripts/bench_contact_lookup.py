@@ -0,0 +1,62 @@
+# scripts/bench_contact_lookup.py
+"""
+Reverse phone lookup: the indexed contact_key lookup behind
+find_students_by_contact() versus matching the raw contact.value the way
+it had to be done before (LIKE on the stored, unnormalized text).
+
+Usage: python scripts/bench_contact_lookup.py [students] [lookups]
+"""
+import random
+import sys
+import time
+from bench_utils import use_temp_database, seed_students
+from core.db_init import connect_db
+from core.student_operations import find_students_by_contact
+
+def formatted(phone, rng):
+    """The same number the way a caller might read it out."""
+    national = phone[1:]
+    return rng.choice([
+        phone,
+        f"+92 {national[:3]} {national[3:]}",
+        f"0092-{national[:3]}-{national[3:]}",
+        f"{phone[:4]}-{phone[4:]}",
+    ])
+
+def like_lookup(phone):
+    """Best effort without the key: suffix match on the stored text (a full scan)."""
+    conn = connect_db()
+    try:
+        return conn.execute("""
+            SELECT s.id FROM contact c JOIN student s ON s.person_id = c.person_id
+            WHERE c.type = 'phone' AND REPLACE(REPLACE(c.value, '-', ''), ' ', '') LIKE ?
+        """, (f"%{phone[-10:]}",)).fetchall()
+    finally:
+        conn.close()
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"Database: {use_temp_database()}")
+    seed_students(students, dues_per_student=0)
+    rng = random.Random(3)
+    conn = connect_db()
+    phones = [row[0] for row in conn.execute(
+        "SELECT value FROM contact WHERE type = 'phone' ORDER BY RANDOM() LIMIT ?", (lookups,))]
+    conn.close()
+    queries = [formatted(phone, rng) for phone in phones]
+
+    start = time.perf_counter()
+    found = sum(1 for query in queries if find_students_by_contact(query))
+    indexed = (time.perf_counter() - start) / lookups
+    start = time.perf_counter()
+    for phone in phones[:20]:
+        like_lookup(phone)
+    scanned = (time.perf_counter() - start) / 20
+
+    print(f"\n{students} students, {lookups} lookups in mixed formats (+92 / 0092 / dashes)")
+    print(f"  find_students_by_contact : {indexed * 1000:8.3f} ms/lookup, {found}/{lookups} resolved")
+    print(f"  LIKE on contact.value    : {scanned * 1000:8.3f} ms/lookup ({scanned / indexed:.0f}x)")
+
+if __name__ == "__main__":
+    main()
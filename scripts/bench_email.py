@@ -0,0 +1,81 @@
+# scripts/bench_email.py
+"""
+Sending verification-code style e-mails through a local SMTP stand-in
+(scripts/smtp_stub.py) that takes connect_ms per connection (TCP + TLS +
+login on a real server) and 20 ms per message, failing every 10th DATA
+with a 451:
+
+  direct - what send_code() used to do: connect, log in, send, quit, on
+           the caller's thread, for every message (a failure is lost)
+  outbox - queue_email() on the caller's thread, then the background
+           sender over one reused session, with retries
+
+Usage: python scripts/bench_email.py [messages] [connect_ms]
+"""
+import os
+import smtplib
+import sys
+import time
+from email.mime.text import MIMEText
+from bench_utils import use_temp_database
+from smtp_stub import SMTPStub
+from core import emailer
+
+def send_direct(port, recipient, subject, body):
+    msg = MIMEText(body)
+    msg['Subject'], msg['From'], msg['To'] = subject, "bench@example.com", recipient
+    with smtplib.SMTP("127.0.0.1", port) as server:
+        server.login("bench", "secret")
+        server.send_message(msg)
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    connect = (int(sys.argv[2]) if len(sys.argv) > 2 else 300) / 1000
+    print(f"Database: {use_temp_database()}")
+
+    stub = SMTPStub(connect_delay=connect, message_delay=0.02, fail_every=10).start()
+    os.environ.update({"CAMPUSCORE_SMTP_HOST": "127.0.0.1", "CAMPUSCORE_SMTP_PORT": str(stub.port),
+                       "CAMPUSCORE_SMTP_STARTTLS": "0", "CAMPUSCORE_SMTP_USER": "bench",
+                       "CAMPUSCORE_SMTP_PASSWORD": "secret", "CAMPUSCORE_SMTP_SENDER": "bench@example.com",
+                       "CAMPUSCORE_SMTP_RATE": "0"})
+    emailer.RETRY_BASE_SECONDS = 0.2  # Keep the retries inside the run
+
+    direct_count = min(messages, 30)
+    lost = 0
+    start = time.perf_counter()
+    for i in range(direct_count):
+        try:
+            send_direct(stub.port, "admin@example.com", "Code", f"Code {i}")
+        except smtplib.SMTPException:
+            lost += 1
+    direct = (time.perf_counter() - start) / direct_count
+
+    stub.messages.clear()
+    stub.connections = 0
+    blocked = 0.0
+    start = time.perf_counter()
+    for i in range(messages):
+        queued_at = time.perf_counter()
+        emailer.queue_email("admin@example.com", "Code", f"Code {i}")
+        blocked += time.perf_counter() - queued_at
+    while True:
+        stats = emailer.get_outbox_stats()
+        if stats["pending"] == 0 and stats["sending"] == 0:
+            break
+        time.sleep(0.05)
+    drained = time.perf_counter() - start
+    emailer.get_email_sender().stop()
+    sender = stats["sender"]
+
+    print(f"\n{messages} messages, {connect * 1000:.0f} ms to connect + log in, 20 ms per message, "
+          f"every 10th refused with 451")
+    print(f"  direct : caller blocked {direct * 1000:7.1f} ms/message, one connection each, "
+          f"{lost}/{direct_count} lost to the 451s")
+    print(f"  outbox : caller blocked {blocked / messages * 1000:7.2f} ms/message; all sent in {drained:.2f}s "
+          f"over {stub.connections} connection(s), {sender['batches']} batches, {sender['retried']} retries, "
+          f"{len(stub.messages)} delivered")
+    print(f"           latency queued -> sent: avg {stats['avg_latency_seconds']:.2f}s, "
+          f"max {stats['max_latency_seconds']:.2f}s; avg send {sender['avg_send_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# scripts/bench_enrollment.py
+"""
+Enrollment latency: the old four-connection sequence
+(get_or_create_family -> add_student -> check_if_monthly_fee_was_run ->
+add_specific_monthly_fee) versus enroll_student's single transaction.
+
+Usage: python scripts/bench_enrollment.py [students]
+"""
+import sys
+import time
+from bench_utils import use_temp_database, seed_students
+from core.db_init import connect_db
+from core.due_operations import add_specific_monthly_fee, current_monthly_fee_due_type
+from core.student_operations import get_or_create_family, add_student, enroll_student
+
+CONTACTS = [{"type": "phone", "value": "03001234567", "label": "father"}]
+
+def legacy_enroll(i):
+    family_id = get_or_create_family(str(50000 + i), f"Legacy Family {i}")
+    success, status, student_id, fee_amount, due_type_name = add_student(
+        "Ali", None, "Khan", "Ahmed Khan", "Sara Khan", "2015-05-05", "Lahore", "Male",
+        CONTACTS, "2025-11-03", "5000", "12000", "3", family_id
+    )
+    if status == "NEEDS_FEE_CONFIRMATION":
+        add_specific_monthly_fee(student_id, fee_amount, due_type_name)
+    return success
+
+def single_transaction_enroll(i):
+    success, *_ = enroll_student(
+        "Ali", None, "Khan", "Ahmed Khan", "Sara Khan", "2015-05-05", "Lahore", "Male",
+        CONTACTS, "2025-11-03", "5000", "12000", "3", family_name=f"New Family {i}",
+        add_current_month_fee=True
+    )
+    return success
+
+def time_runs(label, enroll, count):
+    start = time.perf_counter()
+    ok = sum(1 for i in range(count) if enroll(i))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22}: {elapsed:7.3f}s  {elapsed / count * 1000:7.2f} ms/student  ok={ok}/{count}")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    use_temp_database()
+    seed_students(2000)
+
+    # Post this month's fee so both paths add it to the new students.
+    conn = connect_db()
+    conn.execute("""
+        INSERT INTO pending_due (student_id, due_type, amount_due, due_date, status)
+        VALUES (1, ?, 5000.0, '2025-11-10', 'unpaid')
+    """, (current_monthly_fee_due_type(),))
+    conn.commit()
+    conn.close()
+
+    print(f"Enrolling {count} students (fee already posted this month)\n")
+    time_runs("four connections", legacy_enroll, count)
+    time_runs("single transaction", single_transaction_enroll, count)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# scripts/bench_fixtures.py
+"""
+Cost of getting a fresh, seeded database for one test/benchmark run:
+creating the schema and seeding from scratch (on disk and in memory)
+versus cloning a seeded DatabaseTemplate with the backup API.
+
+Usage: python scripts/bench_fixtures.py [students] [runs]
+"""
+import sys
+import time
+from bench_utils import use_temp_database, use_memory_database, seed_students, DatabaseTemplate
+from core.db_init import connect_db
+
+def timed(setup, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        setup()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def student_count():
+    conn = connect_db()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM student").fetchone()[0]
+    finally:
+        conn.close()
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"Fresh database with {students} seeded students (best of {runs})\n")
+
+    elapsed = timed(lambda: (use_temp_database(), seed_students(students)), runs)
+    print(f"schema + seed, temp file  : {elapsed * 1000:9.1f} ms")
+
+    elapsed = timed(lambda: (use_memory_database(), seed_students(students)), runs)
+    print(f"schema + seed, in memory  : {elapsed * 1000:9.1f} ms")
+
+    start = time.perf_counter()
+    template = DatabaseTemplate(lambda: seed_students(students))
+    print(f"build template (once)     : {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    elapsed = timed(template.clone, runs)
+    print(f"clone template, in memory : {elapsed * 1000:9.1f} ms")
+    assert student_count() == students
+
+    # Clones are independent of each other and of the template
+    conn = connect_db()
+    conn.execute("DELETE FROM student")
+    conn.commit()
+    conn.close()
+    template.clone()
+    assert student_count() == students
+    template.close()
+
+if __name__ == "__main__":
+    main()
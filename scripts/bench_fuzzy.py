@@ -0,0 +1,85 @@
+# scripts/bench_fuzzy.py
+"""
+Typo-tolerant name search: recall@10 and latency of search_students_fuzzy()
+(trigram candidates ranked by edit distance) versus the LIKE search of
+search_students(), for names typed with one typo per word.
+
+Usage: python scripts/bench_fuzzy.py [students] [lookups]
+"""
+import random
+import sys
+import time
+from bench_utils import use_temp_database, seed_students
+from core.db_init import connect_db
+from core.name_index import PERSON, index_person_name
+from core.student_operations import search_students, search_students_fuzzy
+
+SYLLABLES = ["mu", "ham", "mad", "ah", "med", "ha", "san", "ay", "e", "sha", "fa", "ti", "ma",
+             "zai", "nab", "us", "man", "bi", "lal", "ra", "za", "iq", "bal", "qu", "re", "shi",
+             "ka", "mi", "na", "ta", "ri", "de", "lo", "nu", "ja", "wed", "da", "ud"]
+
+def make_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+def misspell(word, rng):
+    """One substitution, deletion, insertion or transposition."""
+    i = rng.randrange(1, len(word)) if len(word) > 1 else 0
+    letter = rng.choice("aeioumnhsdr")
+    edit = rng.choice(["sub", "del", "ins", "swap"])
+    if edit == "sub":
+        return word[:i] + letter + word[i + 1:]
+    if edit == "del" and len(word) > 3:
+        return word[:i] + word[i + 1:]
+    if edit == "swap" and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + letter + word[i:]
+
+def rename_students(rng):
+    """Gives every student a generated first/last name (the seed only has 10 x 10) and reindexes them."""
+    conn = connect_db()
+    cursor = conn.cursor()
+    person_ids = [row[0] for row in cursor.execute("SELECT person_id FROM fullname")]
+    names = {person_id: (make_word(rng), make_word(rng)) for person_id in person_ids}
+    cursor.executemany("UPDATE fullname SET first_name = ?, last_name = ? WHERE person_id = ?",
+                       [(first, last, person_id) for person_id, (first, last) in names.items()])
+    for person_id, (first, last) in names.items():
+        index_person_name(cursor, person_id, first, None, last)
+    conn.commit()
+    conn.close()
+
+def measure(search, lookups, k=10):
+    """Returns (recall@k, ms per lookup) over [(query, student_id)]."""
+    hits = 0
+    start = time.perf_counter()
+    for query, student_id in lookups:
+        hits += student_id in [r.student_id for r in search(query)[:k]]
+    return hits / len(lookups), (time.perf_counter() - start) / len(lookups) * 1000
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"Database: {use_temp_database()}")
+    seed_students(students, dues_per_student=0)
+    rng = random.Random(7)
+    rename_students(rng)
+    conn = connect_db()
+    rows = conn.execute("""
+        SELECT s.id, f.first_name, f.last_name FROM student s JOIN fullname f ON f.person_id = s.person_id
+        ORDER BY RANDOM() LIMIT ?
+    """, (count,)).fetchall()
+    trigrams = conn.execute("SELECT COUNT(*) FROM name_trigram WHERE kind = ?", (PERSON,)).fetchone()[0]
+    conn.close()
+
+    exact = [(f"{first} {last}", student_id) for student_id, first, last in rows]
+    typo = [(f"{misspell(first, rng)} {misspell(last, rng)}", student_id) for student_id, first, last in rows]
+
+    print(f"\n{students} students, {trigrams} person trigrams, {count} lookups, one typo per word")
+    for label, search in (("search_students (LIKE)", search_students),
+                          ("search_students_fuzzy", search_students_fuzzy)):
+        exact_recall, exact_ms = measure(search, exact)
+        typo_recall, typo_ms = measure(search, typo)
+        print(f"  {label:<24} exact: recall@10 {exact_recall:6.1%} {exact_ms:7.2f} ms   "
+              f"typo: recall@10 {typo_recall:6.1%} {typo_ms:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# scripts/bench_import_time.py
+"""
+Start-up cost of the headless entry points, and a check that nothing under
+core/ pulls in Qt.
+
+Each measurement runs in a fresh interpreter with PyQt5 blocked, so an
+accidental Qt import fails loudly even on machines where PyQt5 is installed.
+
+Usage: python scripts/bench_import_time.py [runs]
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+BLOCK_QT = """
+import sys
+class _BlockQt:
+    def find_spec(self, name, path=None, target=None):
+        if name == 'PyQt5' or name.startswith('PyQt5.'):
+            raise ImportError('core must not import ' + name)
+sys.meta_path.insert(0, _BlockQt())
+"""
+
+CORE_MODULES = [
+    "core.db_init", "core.utils", "core.due_operations", "core.student_operations",
+    "core.annual_fund", "core.scheduler", "core.reports", "core.cli",
+]
+
+CASES = [
+    ("import core.cli", "import core.cli"),
+    ("import every core module", "\n".join(f"import {m}" for m in CORE_MODULES)),
+    ("campuscore --help", "import core.cli\ntry:\n    core.cli.main(['--help'])\nexcept SystemExit:\n    pass"),
+]
+
+def time_in_fresh_interpreter(code):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", BLOCK_QT + code], cwd=ROOT,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"FAILED:\n{result.stderr}")
+    return elapsed
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    baseline = min(time_in_fresh_interpreter("pass") for _ in range(runs))
+    print(f"Interpreter start-up: {baseline * 1000:.1f} ms (best of {runs})")
+    for label, code in CASES:
+        best = min(time_in_fresh_interpreter(code) for _ in range(runs))
+        print(f"{label:<28} {best * 1000:7.1f} ms  (+{(best - baseline) * 1000:.1f} ms over bare interpreter)")
+    print("No PyQt5 import attempted by core/.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# scripts/bench_login.py
+"""
+Logins against a database of students (fullname rows) and receptionists:
+
+  lookup    - the old plaintext check (admin/receptionist joined to
+              fullname on first/last name, no index) against the
+              credential row found through its UNIQUE (role, username) key
+  GUI       - how long the caller is blocked: verify_login() inline (one
+              salted hash) against submit_login() on the worker thread
+  migration - converting receptionists with plaintext passwords to
+              credential rows in bulk (migrate_credentials)
+
+Usage: python scripts/bench_login.py [students] [receptionists]
+"""
+import sys
+import time
+from bench_utils import use_temp_database, seed_students
+from core import queries
+from core.db_init import connect_db, initialize_db
+from core.passwords import migrate_credentials, ITERATIONS
+from core.db_login import verify_login, submit_login
+
+OLD_LOGIN = """
+    SELECT r.id
+    FROM receptionist r
+    JOIN fullname f ON r.person_id = f.person_id
+    WHERE f.first_name = ? AND f.last_name = ? AND r.password = ?
+"""
+
+def add_plaintext_receptionists(count):
+    """Receptionists the way they were stored before credential existed."""
+    conn = connect_db()
+    cursor = conn.cursor()
+    for i in range(count):
+        cursor.execute("INSERT INTO person (fathername, mothername, dob, address, gender) "
+                       "VALUES ('F', 'M', '1990-01-01', 'Lahore', 'Female')")
+        person_id = cursor.lastrowid
+        cursor.execute("INSERT INTO fullname (person_id, first_name, middle_name, last_name) VALUES (?, ?, NULL, ?)",
+                       (person_id, f"Desk{i}", "Clerk"))
+        cursor.execute("INSERT INTO receptionist (person_id, password) VALUES (?, ?)", (person_id, f"password{i}"))
+    conn.commit()
+    conn.close()
+
+def per_lookup(cursor, sql, params, runs=200):
+    start = time.perf_counter()
+    for _ in range(runs):
+        cursor.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / runs
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    receptionists = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    print(f"Database: {use_temp_database()}")
+    seed_students(students)
+    add_plaintext_receptionists(receptionists)
+
+    conn = connect_db()
+    cursor = conn.cursor()
+    old = per_lookup(cursor, OLD_LOGIN, ("Desk0", "Clerk", "password0"))
+    start = time.perf_counter()
+    migrated = migrate_credentials(cursor)
+    conn.commit()
+    migration = time.perf_counter() - start
+    new = per_lookup(cursor, queries.get_sql("credentials.by_username"), ("receptionist", "desk0 clerk"))
+    conn.close()
+    initialize_db()  # Nothing left to migrate: the start-up cost it adds
+
+    start = time.perf_counter()
+    assert verify_login("receptionist", "Desk0 Clerk", "password0")[0]
+    inline = time.perf_counter() - start
+    start = time.perf_counter()
+    future = submit_login("receptionist", "Desk1 Clerk", "password1")
+    blocked = time.perf_counter() - start
+    assert future.result()[0]
+
+    print(f"\n{students} students, {receptionists} receptionists, PBKDF2-SHA256 x {ITERATIONS}")
+    print(f"  lookup    : plaintext join {old * 1000:7.3f} ms   credential key {new * 1000:7.3f} ms")
+    print(f"  GUI       : verify_login inline {inline * 1000:6.1f} ms   submit_login {blocked * 1000:6.3f} ms blocked")
+    print(f"  migration : {migrated} account(s) in {migration:.2f}s ({migration / max(migrated, 1) * 1000:.0f} ms each)")
+
+if __name__ == "__main__":
+    main()
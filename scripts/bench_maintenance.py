@@ -0,0 +1,116 @@
+# scripts/bench_maintenance.py
+"""
+Effect of the maintenance tasks on a database that has never had them:
+search/detail latency before and after ANALYZE, and the file size before and
+after the incremental vacuum once contacts have been rewritten (as
+update_student does) and dues archived.
+
+Usage: python scripts/bench_maintenance.py [students]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from bench_utils import use_temp_database, seed_students
+from core import queries
+from core.db_init import connect_db
+from core.maintenance import run_maintenance, get_database_health
+from core.student_operations import search_students, get_student_details_by_id, _student_search_shape
+
+ROUNDS = 5
+
+def time_lookups(terms, student_ids):
+    """
+    Median over ROUNDS of the average search_students() and
+    get_student_details_by_id() time. Searches bypass the search cache:
+    otherwise a handful of misses among the hits decide the figure.
+    """
+    searches = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for term in terms:
+            search_students.uncached(term)
+        searches.append((time.perf_counter() - start) / len(terms))
+    search = statistics.median(searches)
+    start = time.perf_counter()
+    for student_id in student_ids:
+        get_student_details_by_id(student_id)
+    details = (time.perf_counter() - start) / len(student_ids)
+    return search, details
+
+def rewrite_contacts():
+    """Deletes and re-inserts every contact, the way update_student does per student."""
+    conn = connect_db()
+    rows = conn.execute("SELECT person_id, type, value, label, contact_key FROM contact").fetchall()
+    conn.execute("DELETE FROM contact")
+    conn.executemany("""
+        INSERT INTO contact (person_id, type, value, label, contact_key) VALUES (?, ?, ?, ?, ?)
+    """, rows)
+    conn.execute("DELETE FROM pending_due WHERE id % 2 = 0")
+    conn.commit()
+    conn.close()
+
+def search_plans(terms):
+    """The query plan of each distinct search term's statement."""
+    conn = connect_db()
+    try:
+        plans = {}
+        for term in dict.fromkeys(terms):
+            shape, params, _ = _student_search_shape(term)
+            sql = queries.get_sql(f"students.search_{shape}")
+            plans[term] = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        return plans
+    finally:
+        conn.close()
+
+def describe(health, db_path):
+    return (f"{os.path.getsize(db_path) / 1024 / 1024:6.2f} MiB, {health['freelist_count']} free pages "
+            f"({health['freelist_ratio']:.1%}), auto_vacuum={health['auto_vacuum']}")
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    db_path = use_temp_database()
+    # A database from before this change: no auto_vacuum, no statistics
+    conn = connect_db()
+    conn.isolation_level = None
+    conn.execute("PRAGMA auto_vacuum = NONE")
+    conn.execute("VACUUM")
+    conn.close()
+    seed_students(students, dues_per_student=4)
+
+    rng = random.Random(3)
+    terms = [rng.choice(["Ali", "Khan", "Fatima", "Malik", "Sara Raza"]) for _ in range(30)]
+    student_ids = [rng.randint(1, students) for _ in range(500)]
+
+    before = time_lookups(terms, student_ids)
+    plans_before = search_plans(terms)
+    rewrite_contacts()
+    print(f"Before maintenance : {describe(get_database_health(), db_path)}")
+
+    all_ok, results = run_maintenance()
+    for task, result in results.items():
+        print(f"  {task:<20} {result['status']:<8} {result['seconds']:8.3f}s  {result['detail']}")
+    print(f"After maintenance  : {describe(get_database_health(), db_path)}\n")
+
+    after = time_lookups(terms, student_ids)
+    print(f"search_students (uncached): {before[0] * 1000:8.3f} ms -> {after[0] * 1000:8.3f} ms")
+    print(f"get_student_details_by_id : {before[1] * 1000:8.3f} ms -> {after[1] * 1000:8.3f} ms")
+    for term, plan in search_plans(terms).items():
+        if plan != plans_before[term]:
+            print(f"  plan for '{term}' changed: {'; '.join(plans_before[term])}\n"
+                  f"  {' ' * (len(term) + 19)}-> {'; '.join(plan)}")
+
+    # Now in incremental mode: bulk deletes leave free pages that the next run returns
+    conn = connect_db()
+    conn.execute("DELETE FROM pending_due")
+    conn.commit()
+    conn.close()
+    print(f"\nAfter deleting dues: {describe(get_database_health(), db_path)}")
+    _, results = run_maintenance(["incremental_vacuum"])
+    print(f"  incremental_vacuum {results['incremental_vacuum']['seconds']:.3f}s: "
+          f"{results['incremental_vacuum']['detail']}")
+    print(f"After vacuum       : {describe(get_database_health(), db_path)}")
+
+if __name__ == "__main__":
+    main()
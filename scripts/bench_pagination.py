@@ -0,0 +1,92 @@
+# scripts/bench_pagination.py
+"""
+Latency of page 1 vs page 1000 for the keyset-paginated search and history
+APIs, next to the same pages read with LIMIT/OFFSET, and a check that
+walking every page returns exactly the unpaginated result.
+
+Usage: python scripts/bench_pagination.py [students] [page_size]
+"""
+import sys
+import time
+from bench_utils import use_temp_database, seed_students
+from core import queries
+from core.db_init import connect_db
+from core.student_operations import search_students, search_students_page, search_families_page
+from core.due_operations import get_all_student_dues_with_summary, get_student_dues_page
+from core.records import StudentSummary, fetch_records
+
+def best_of(func, runs=5):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def walk(fetch_page):
+    """Follows next_cursor to the end. Returns (items, cursors), cursors[i] fetching page i + 1."""
+    items, cursors, cursor = [], [None], None
+    while True:
+        page = fetch_page(cursor)
+        items.extend(page.items)
+        if page.next_cursor is None:
+            return items, cursors
+        cursor = page.next_cursor
+        cursors.append(cursor)
+
+def offset_page(name, params, page_size, page_number):
+    """The same page read the OFFSET way: every earlier row is produced and thrown away."""
+    sql = queries.get_sql(name).replace("AND s.id > ? ORDER BY s.id LIMIT ?", "ORDER BY s.id LIMIT ? OFFSET ?")
+    conn = connect_db()
+    try:
+        cursor = conn.execute(sql, params + (page_size, (page_number - 1) * page_size))
+        return fetch_records(cursor, StudentSummary)
+    finally:
+        conn.close()
+
+def report(label, fetch_page, page_size, offset_args=None):
+    items, cursors = walk(fetch_page)
+    last = len(cursors)
+    target = min(1000, last)
+    first_time = best_of(lambda: fetch_page(None))
+    target_time = best_of(lambda: fetch_page(cursors[target - 1]))
+    print(f"{label:<32} {len(items):>7} rows {last:>5} pages  "
+          f"page 1 {first_time * 1000:7.3f} ms  page {target} {target_time * 1000:7.3f} ms")
+    if offset_args:
+        name, params = offset_args
+        offset_time = best_of(lambda: offset_page(name, params, page_size, target))
+        print(f"{'  same page with OFFSET':<32} {'':>30}  page {target} {offset_time * 1000:7.3f} ms")
+    return items
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"Database: {use_temp_database()}")
+    seed_students(students, dues_per_student=1)
+    print(f"{students} students, page size {page_size}\n")
+
+    items = report("search_students('')", lambda c: search_students_page("", c, page_size),
+                   page_size, ("students.page_all", ()))
+    assert [s.student_id for s in items] == sorted(s.student_id for s in search_students(""))
+
+    items = report("search_students('a')", lambda c: search_students_page("a", c, page_size),
+                   page_size, ("students.page_by_name_1", ("%a%",) * 3))
+    assert sorted(items) == sorted(search_students("a"))
+
+    report("search_families('1')", lambda c: search_families_page("1", c, page_size), page_size)
+
+    # One student with a long due history
+    conn = connect_db()
+    conn.executemany("""
+        INSERT INTO pending_due (student_id, due_type, amount_due, due_date, status)
+        VALUES (1, ?, 100, ?, 'unpaid')
+    """, [(f"Fee {i}", f"{2000 + i // 365:04d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}") for i in range(page_size * 1000)])
+    conn.commit()
+    conn.close()
+    items = report("dues history (student 1)", lambda c: get_student_dues_page(1, c, page_size), page_size)
+    full = get_all_student_dues_with_summary(1)
+    assert sorted(items) == sorted(full) and len(set(d.pending_due_id for d in items)) == len(full)
+    print("\nEvery walk returned the unpaginated result exactly once.")
+
+if __name__ == "__main__":
+    main()
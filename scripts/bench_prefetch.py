@@ -0,0 +1,55 @@
+# scripts/bench_prefetch.py
+"""
+Time-to-data of the screen opened after picking a student, with and
+without prefetching: the dialog's selection starts the load, the user
+takes `think_ms` to click OK, then the screen asks for its data. Every
+tenth pick has a payment land in between, which must make the prefetched
+dues stale rather than shown.
+
+Usage: python scripts/bench_prefetch.py [students] [picks] [think_ms]
+"""
+import random
+import sys
+import time
+from datetime import datetime
+from bench_utils import use_temp_database, seed_students
+from core.due_operations import make_payment
+from core.prefetch import (prefetch_student, get_prefetched, get_prefetch_stats,
+                           reset_prefetch_stats, PREFETCH_LOADERS)
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    picks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    think = (int(sys.argv[3]) if len(sys.argv) > 3 else 150) / 1000
+    print(f"Database: {use_temp_database()}")
+    due_ids = seed_students(students, dues_per_student=24)
+    rng = random.Random(9)
+    chosen = [rng.randint(1, students) for _ in range(picks)]
+
+    print(f"\n{students} students with 24 dues each, {picks} picks, {think * 1000:.0f} ms to click OK")
+    for kind in PREFETCH_LOADERS:
+        direct = 0.0
+        for student_id in chosen:
+            time.sleep(think)
+            start = time.perf_counter()
+            PREFETCH_LOADERS[kind](student_id)
+            direct += time.perf_counter() - start
+
+        reset_prefetch_stats()
+        waited = 0.0
+        for i, student_id in enumerate(chosen):
+            prefetch_student(student_id, (kind,))
+            time.sleep(think)
+            if i % 10 == 0:
+                make_payment((student_id - 1) * 24 + 1, 1, "Cash",
+                             datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "bench")
+            start = time.perf_counter()
+            get_prefetched(kind, student_id)
+            waited += time.perf_counter() - start
+        stats = get_prefetch_stats()
+        print(f"  {kind:<13} direct {direct / picks * 1000:7.3f} ms   prefetched {waited / picks * 1000:7.3f} ms   "
+              f"hit rate {stats['hit_rate']:.0%} ({stats['stale']} stale), "
+              f"{stats['avg_saved_ms']:.3f} ms saved per hit")
+
+if __name__ == "__main__":
+    main()
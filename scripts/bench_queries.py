@@ -0,0 +1,70 @@
+# scripts/bench_queries.py
+"""
+Cost of the front-desk lookups with a fresh connection per call and the
+default statement cache (the old pattern) versus connect_db()'s pooled
+connections running catalog statements, then the per-query statistics the
+catalog collected.
+
+Usage: python scripts/bench_queries.py [students] [lookups]
+"""
+import random
+import sqlite3
+import sys
+import time
+from bench_utils import use_temp_database, seed_students
+from core import db_init, queries
+from core.records import StudentDetails, ContactRecord, DueSummary, fetch_records
+from core.student_operations import get_student_details_by_id
+from core.due_operations import get_unpaid_dues_for_student
+
+def fresh_connection_lookup(student_id):
+    """get_student_details_by_id + get_unpaid_dues_for_student as they ran before the pool."""
+    conn = sqlite3.connect(db_init.DB_PATH)
+    try:
+        main_data = conn.execute(queries.get_sql("students.details"), (student_id,)).fetchone()
+        contacts = fetch_records(conn.execute(queries.get_sql("contacts.for_person"), (main_data[1],)),
+                                 ContactRecord)
+        StudentDetails._make(main_data + (contacts,))
+    finally:
+        conn.close()
+    conn = sqlite3.connect(db_init.DB_PATH)
+    try:
+        fetch_records(conn.execute(queries.get_sql("dues.unpaid_for_student"), (student_id,)), DueSummary)
+    finally:
+        conn.close()
+
+def pooled_lookup(student_id):
+    get_student_details_by_id(student_id)
+    get_unpaid_dues_for_student(student_id)
+
+def time_lookups(lookup, student_ids):
+    start = time.perf_counter()
+    for student_id in student_ids:
+        lookup(student_id)
+    return (time.perf_counter() - start) / len(student_ids)
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    print(f"Database: {use_temp_database()}")
+    seed_students(students, dues_per_student=3)
+    rng = random.Random(7)
+    student_ids = [rng.randint(1, students) for _ in range(lookups)]
+
+    # Warm the page cache for both sides
+    time_lookups(pooled_lookup, student_ids[:100])
+    queries.reset_query_stats()
+
+    fresh = time_lookups(fresh_connection_lookup, student_ids)
+    pooled = time_lookups(pooled_lookup, student_ids)
+    print(f"\n{lookups} detail + unpaid-dues lookups over {students} students")
+    print(f"  fresh connection per call: {fresh * 1000:7.3f} ms/lookup")
+    print(f"  pooled + catalog:          {pooled * 1000:7.3f} ms/lookup ({fresh / pooled:.1f}x)")
+
+    print(f"\n{'Query':<28} {'calls':>7} {'errors':>6} {'total s':>9} {'avg ms':>8} {'max ms':>8}")
+    for stats in queries.get_query_stats():
+        print(f"{stats['name']:<28} {stats['calls']:>7} {stats['errors']:>6} {stats['total_seconds']:>9.3f} "
+              f"{stats['avg_ms']:>8.3f} {stats['max_ms']:>8.3f}")
+
+if __name__ == "__main__":
+    main()
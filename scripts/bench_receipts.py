@@ -0,0 +1,99 @@
+# scripts/bench_receipts.py
+"""
+Receipt rendering throughput (pages per second) for a day's receipts:
+the cached template (ui/receipt.py: labels and rules replayed from a
+QPicture, only the values drawn) against painting the whole layout for
+every receipt, the way MakePaymentWidget.print_receipt used to. Both
+render offscreen, to one multi-page PDF and to 150 dpi QImages.
+
+Needs PyQt5; runs on the offscreen Qt platform.
+
+Usage: python scripts/bench_receipts.py [payments]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from bench_utils import use_temp_database, seed_students
+from core.due_operations import make_payment, get_receipts_for_day
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtGui import QGuiApplication, QPainter, QPdfWriter, QPageSize, QColor
+from PyQt5.QtCore import Qt
+from ui import receipt as engine
+
+def paint_whole_layout(painter, details, dpi):
+    """Every text and line of the layout, fonts set per item: no template."""
+    painter.save()
+    painter.scale(dpi / engine.LAYOUT_DPI, dpi / engine.LAYOUT_DPI)
+    painter.setPen(QColor(Qt.black))
+    for item in engine.RECEIPT_LAYOUT:
+        if item[0] == "text":
+            painter.setFont(engine._font(item[1]))
+            painter.drawText(item[2], item[3], item[4])
+        elif item[0] == "line":
+            painter.drawLine(engine.LABEL_X, item[1], engine.RULE_END_X, item[1])
+        else:
+            _, y, label, key, fmt = item
+            painter.setFont(engine._font("header"))
+            painter.drawText(engine.LABEL_X, y, label)
+            painter.setFont(engine._font("body"))
+            painter.drawText(engine.VALUE_X, y, fmt.format(details[key]))
+    painter.restore()
+
+def pdf_pages_per_second(receipts, paint, path):
+    start = time.perf_counter()
+    writer = QPdfWriter(path)
+    writer.setPageSize(QPageSize(QPageSize.A4))
+    writer.setResolution(engine.LAYOUT_DPI)
+    painter = QPainter(writer)
+    for i, receipt in enumerate(receipts):
+        if i:
+            writer.newPage()
+        paint(painter, receipt, writer.logicalDpiX())
+    painter.end()
+    return len(receipts) / (time.perf_counter() - start)
+
+def image_pages_per_second(receipts, paint, dpi=150):
+    original = engine.paint_receipt
+    engine.paint_receipt = paint  # render_receipt_image() paints through this name
+    try:
+        start = time.perf_counter()
+        for receipt in receipts:
+            engine.render_receipt_image(receipt, dpi)
+        return len(receipts) / (time.perf_counter() - start)
+    finally:
+        engine.paint_receipt = original
+
+def main():
+    payments = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    app = QGuiApplication([sys.argv[0]])
+    print(f"Database: {use_temp_database()}")
+    due_ids = seed_students(payments, dues_per_student=1)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for due_id in due_ids:
+        make_payment(due_id, 2500.0, "Cash", timestamp, "bench")
+
+    start = time.perf_counter()
+    receipts = get_receipts_for_day(timestamp[:10])
+    load = time.perf_counter() - start
+    out_dir = tempfile.mkdtemp(prefix="campuscore-bench-")
+
+    template = engine.paint_receipt
+    engine.render_receipt_image(receipts[0])  # Records the template once
+    print(f"\n{len(receipts)} receipts of {timestamp[:10]} loaded in {load * 1000:.1f} ms")
+    print(f"  PDF     whole layout {pdf_pages_per_second(receipts, paint_whole_layout, os.path.join(out_dir, 'a.pdf')):8.0f} pages/s"
+          f"   template {pdf_pages_per_second(receipts, template, os.path.join(out_dir, 'b.pdf')):8.0f} pages/s")
+    print(f"  QImage  whole layout {image_pages_per_second(receipts, paint_whole_layout):8.0f} pages/s"
+          f"   template {image_pages_per_second(receipts, template):8.0f} pages/s")
+
+    future = engine.get_receipt_queue().pdf_day(timestamp[:10], os.path.join(out_dir, "queue.pdf"))
+    future.result()
+    stats = engine.get_receipt_queue_stats()
+    print(f"  queue   {stats['pages']} pages in {stats['render_seconds']:.2f}s "
+          f"({stats['pages_per_second']:.0f} pages/s incl. loading)")
+    app.quit()
+
+if __name__ == "__main__":
+    main()
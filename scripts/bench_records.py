@@ -0,0 +1,87 @@
+# scripts/bench_records.py
+"""
+Memory and latency of materialising a large result set as dict(sqlite3.Row)
+(the old pattern) versus the record types in core.records.
+
+Usage: python scripts/bench_records.py [rows]
+"""
+import sqlite3
+import sys
+import time
+import tracemalloc
+from bench_utils import use_memory_database, seed_students
+from core.db_init import connect_db
+from core.records import StudentSummary, fetch_records
+
+QUERY = """
+    SELECT
+        s.id as student_id,
+        f.first_name || ' ' || COALESCE(f.middle_name || ' ', '') || f.last_name as full_name,
+        p.fathername as father_name,
+        p.mothername as mother_name,
+        s.class,
+        s.monthly_fee,
+        s.annual_fund,
+        fam.family_SSN,
+        fam.family_name
+    FROM student s
+    JOIN person p ON s.person_id = p.id
+    JOIN fullname f ON f.person_id = p.id
+    LEFT JOIN family fam ON s.family_id = fam.id
+"""
+
+def as_dicts(conn):
+    conn.row_factory = sqlite3.Row
+    return [dict(row) for row in conn.execute(QUERY).fetchall()]
+
+def as_records(conn):
+    conn.row_factory = None
+    return fetch_records(conn.execute(QUERY), StudentSummary)
+
+def as_records_row_factory(conn):
+    conn.row_factory = StudentSummary.row_factory
+    return conn.execute(QUERY).fetchall()
+
+def measure(build, runs=3):
+    conn = connect_db()
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = build(conn)
+        best = min(best, time.perf_counter() - start)
+        del rows
+    tracemalloc.start()
+    rows = build(conn)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Touch every row the way the search tree does
+    start = time.perf_counter()
+    for row in rows:
+        (row["student_id"], row["full_name"], row["class"], row["monthly_fee"])
+    key_access = time.perf_counter() - start
+    attr_access = None
+    if not isinstance(rows[0], dict):
+        start = time.perf_counter()
+        for row in rows:
+            (row.student_id, row.full_name, row.student_class, row.monthly_fee)
+        attr_access = time.perf_counter() - start
+    conn.close()
+    return len(rows), best, retained, peak, key_access, attr_access
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    use_memory_database()
+    seed_students(rows, dues_per_student=0)
+    print(f"{rows} StudentSummary rows (time: best of 3)\n")
+    print(f"{'':<26} {'fetch':>9} {'retained':>11} {'peak':>11} {'row[key] x4':>12} {'row.attr x4':>12}")
+    for label, build in (("dict(sqlite3.Row)", as_dicts),
+                         ("fetch_records", as_records),
+                         ("row_factory", as_records_row_factory)):
+        count, elapsed, retained, peak, key_access, attr_access = measure(build)
+        assert count == rows
+        attr = f"{attr_access * 1000:10.1f}ms" if attr_access is not None else f"{'-':>12}"
+        print(f"{label:<26} {elapsed * 1000:7.1f}ms {retained / 1024 / 1024:9.1f}MiB "
+              f"{peak / 1024 / 1024:9.1f}MiB {key_access * 1000:10.1f}ms {attr}")
+
+if __name__ == "__main__":
+    main()
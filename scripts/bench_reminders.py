@@ -0,0 +1,93 @@
+# scripts/bench_reminders.py
+"""
+Due reminders for every family with unpaid dues:
+
+  per student - what today's APIs allow: get_unpaid_dues_for_student()
+                and get_student_contacts() for every student, grouped per
+                family in Python (two queries per student)
+  campaign    - run_reminder_campaign(): one aggregate query, render,
+                queue in one transaction
+
+then the campaign's delivery through the outbox sender to the local SMTP
+stand-in (scripts/smtp_stub.py), throttled to rate messages per second
+over one session.
+
+Usage: python scripts/bench_reminders.py [students] [rate]
+"""
+import os
+import sys
+import time
+from bench_utils import use_temp_database, seed_students
+from smtp_stub import SMTPStub
+from core.db_init import connect_db
+from core.due_operations import make_payment, get_unpaid_dues_for_student
+from core.student_operations import get_student_contacts
+from core import emailer
+from core.reminders import run_reminder_campaign, get_campaign_stats
+
+def add_emails(every=10):
+    """An e-mail contact for every student but each every-th one."""
+    conn = connect_db()
+    conn.execute("""
+        INSERT INTO contact (person_id, type, value, label)
+        SELECT person_id, 'email', 'parent' || id || '@example.com', 'parent'
+        FROM student WHERE id % ? != 0
+    """, (every,))
+    conn.commit()
+    conn.close()
+
+def per_student():
+    conn = connect_db()
+    rows = conn.execute("SELECT id, family_id FROM student ORDER BY id").fetchall()
+    conn.close()
+    families = {}
+    for student_id, family_id in rows:
+        dues = get_unpaid_dues_for_student(student_id)
+        if not dues:
+            continue
+        emails = [c.value for c in get_student_contacts(student_id) if c.type == "email"]
+        family = families.setdefault(family_id or -student_id, {"dues": [], "recipients": set()})
+        family["dues"].extend(dues)
+        family["recipients"].update(emails)
+    return families
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rate = sys.argv[2] if len(sys.argv) > 2 else "50"
+    print(f"Database: {use_temp_database()}")
+    due_ids = seed_students(students, dues_per_student=3)
+    add_emails()
+    for due_id in due_ids[::4]:
+        make_payment(due_id, 2500.0, "Cash", "2025-06-01 10:00:00", "bench")
+
+    stub = SMTPStub(connect_delay=0.3, message_delay=0.005).start()
+    os.environ.update({"CAMPUSCORE_SMTP_HOST": "127.0.0.1", "CAMPUSCORE_SMTP_PORT": str(stub.port),
+                       "CAMPUSCORE_SMTP_STARTTLS": "0", "CAMPUSCORE_SMTP_USER": "bench",
+                       "CAMPUSCORE_SMTP_PASSWORD": "secret", "CAMPUSCORE_SMTP_SENDER": "bench@example.com",
+                       "CAMPUSCORE_SMTP_RATE": rate})
+
+    start = time.perf_counter()
+    families = per_student()
+    baseline = time.perf_counter() - start
+
+    success, stats = run_reminder_campaign("2025-12-31", "bench")
+    if not success:
+        print(stats)
+        return
+    while True:
+        campaign = get_campaign_stats(1)[0]
+        if campaign["pending"] == 0:
+            break
+        time.sleep(0.1)
+    emailer.get_email_sender().stop()
+
+    print(f"\n{students} students, {stats['families']} families with unpaid dues "
+          f"({stats['dues']} dues, {stats['total_amount']:.0f} outstanding), {stats['no_email']} without e-mail")
+    print(f"  per student : {baseline * 1000:8.1f} ms to load ({2 * students} queries, {len(families)} families)")
+    print(f"  campaign    : {stats['query_seconds'] * 1000:8.1f} ms query, {stats['render_seconds'] * 1000:.1f} ms render, "
+          f"{stats['queue_seconds'] * 1000:.1f} ms queue -> {stats['messages_per_second']:.0f} messages/s queued")
+    print(f"  delivery    : {campaign['sent']} sent, {campaign['failed']} failed in {campaign['delivery_seconds']:.2f}s "
+          f"= {campaign['messages_per_second']:.1f} messages/s (limit {rate}) over {stub.connections} connection(s)")
+
+if __name__ == "__main__":
+    main()
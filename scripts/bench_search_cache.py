@@ -0,0 +1,72 @@
+# scripts/bench_search_cache.py
+"""
+A receptionist's shift against the search cache: repeated lookups of a
+few families and students (by SSN, ID and name) mixed with payments, which
+don't touch the searched tables, and the odd enrollment, which does.
+Reports the hit rate and the time per search with and without the cache,
+and checks that a write from an outside connection is seen at once.
+
+Usage: python scripts/bench_search_cache.py [students] [searches]
+"""
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from bench_utils import use_temp_database, seed_students
+from core import db_init
+from core.due_operations import make_payment
+from core.search_cache import get_search_cache_stats, reset_search_cache_stats
+from core.student_operations import search_students, search_families, enroll_student
+
+def shift(students, searches, due_ids, rng, search_student, search_family):
+    """Runs the workload and returns the seconds spent in searches."""
+    # A shift revisits a small set of families: each is looked up by SSN,
+    # then its students by ID and name on the due / payment / history pages
+    regulars = [rng.randint(1, students) for _ in range(40)]
+    spent = 0.0
+    for i in range(searches):
+        student_id = rng.choice(regulars)
+        term = rng.choice([str(student_id), f"{10001 + student_id // 2:05d}", "Ali Khan"])
+        start = time.perf_counter()
+        if rng.random() < 0.2:
+            search_family(term[:5])
+        else:
+            search_student(term)
+        spent += time.perf_counter() - start
+        if i % 10 == 0:
+            make_payment(rng.choice(due_ids), 10, "Cash", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "bench")
+        if i % 200 == 0:
+            enroll_student("Walk", None, "In", "F", "M", "2015-01-01", "Lahore", "Male",
+                           [{"type": "phone", "value": f"0300{i:07d}", "label": "primary"}],
+                           "2025-04-01", 5000, 12000, "1")
+    return spent
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    searches = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    print(f"Database: {use_temp_database()}")
+    due_ids = seed_students(students, dues_per_student=1)
+
+    uncached = shift(students, searches, due_ids, random.Random(5),
+                     search_students.uncached, search_families.uncached)
+    reset_search_cache_stats()
+    cached = shift(students, searches, due_ids, random.Random(5), search_students, search_families)
+    stats = get_search_cache_stats()
+
+    print(f"\n{students} students, {searches} searches, a payment every 10 and an enrollment every 200")
+    print(f"  uncached: {uncached / searches * 1000:7.3f} ms/search")
+    print(f"  cached  : {cached / searches * 1000:7.3f} ms/search ({uncached / cached:.1f}x), "
+          f"hit rate {stats['hit_rate']:.1%}, {stats['invalidations']} invalidations, {stats['entries']} entries")
+
+    # A rename by another connection (another terminal, the CLI) is seen on the next search
+    search_students("1")
+    outside = sqlite3.connect(db_init.DB_PATH)
+    outside.execute("UPDATE fullname SET first_name = 'Renamed' WHERE person_id = (SELECT person_id FROM student WHERE id = 1)")
+    outside.commit()
+    outside.close()
+    assert search_students("1")[0].full_name.startswith("Renamed")
+    print("  A write from another connection invalidated the cache.")
+
+if __name__ == "__main__":
+    main()
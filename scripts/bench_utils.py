@@ -0,0 +1,109 @@
+# scripts/bench_utils.py
+"""
+Shared helpers for the bench_*.py scripts: a throwaway database and
+synthetic students/dues to run against.
+"""
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.db_init import connect_db, initialize_db, configure_db, clone_db, MEMORY_DB
+from core.utils import normalize_contact_key
+from core.name_index import backfill_name_index
+
+FIRST_NAMES = ["Ali", "Ahmed", "Muhammad", "Fatima", "Ayesha", "Hassan", "Zainab", "Usman", "Sara", "Bilal"]
+LAST_NAMES = ["Khan", "Hussain", "Malik", "Sheikh", "Butt", "Chaudhry", "Qureshi", "Raza", "Iqbal", "Siddiqui"]
+
+def use_temp_database():
+    """Points core.db_init at a fresh file in a temp directory and creates the schema."""
+    tmp_dir = tempfile.mkdtemp(prefix="campuscore-bench-")
+    db_path = configure_db(os.path.join(tmp_dir, "campuscore.db"))
+    initialize_db()
+    return db_path
+
+def use_memory_database():
+    """Points core.db_init at a fresh shared-cache in-memory database with the schema."""
+    db_path = configure_db(MEMORY_DB)
+    initialize_db()
+    return db_path
+
+class DatabaseTemplate:
+    """
+    Builds a schema (and optional seed data) once, then hands out fresh
+    copies of it: clone() restores the template into a new in-memory (or
+    file) database with the backup API instead of re-running the schema
+    and seeding for every run.
+
+        template = DatabaseTemplate(lambda: seed_students(1000))
+        template.clone()   # connect_db() now opens a private copy
+    """
+    def __init__(self, seed=None):
+        use_memory_database()
+        if seed is not None:
+            seed()
+        self._conn = sqlite3.connect(MEMORY_DB)  # Private copy, independent of configure_db()
+        source = connect_db()
+        try:
+            source.backup(self._conn)
+        finally:
+            source.close()
+
+    def clone(self, target=None):
+        """Points connect_db() at a fresh copy of the template. Returns its path/URI."""
+        return clone_db(self._conn, target)
+
+    def close(self):
+        self._conn.close()
+
+def seed_students(count, families=None, dues_per_student=1, seed=42):
+    """
+    Inserts `count` students spread over `families` families, each with
+    `dues_per_student` unpaid dues. Returns the list of pending_due ids.
+    """
+    rng = random.Random(seed)
+    families = families or max(1, count // 2)
+    conn = connect_db()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO family (family_SSN, family_name) VALUES (?, ?)",
+        [(str(10001 + i), f"The {rng.choice(LAST_NAMES)} Family") for i in range(families)]
+    )
+    due_ids = []
+    for i in range(count):
+        last = rng.choice(LAST_NAMES)
+        cursor.execute("""
+            INSERT INTO person (fathername, mothername, dob, address, gender)
+            VALUES (?, ?, ?, ?, ?)
+        """, (f"{rng.choice(FIRST_NAMES)} {last}", f"{rng.choice(FIRST_NAMES)} {last}",
+              f"{rng.randint(2005, 2018)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+              "Lahore", rng.choice(["Male", "Female"])))
+        person_id = cursor.lastrowid
+        cursor.execute("""
+            INSERT INTO fullname (person_id, first_name, middle_name, last_name)
+            VALUES (?, ?, ?, ?)
+        """, (person_id, rng.choice(FIRST_NAMES), None, last))
+        phone = f"03{rng.randint(100000000, 999999999)}"
+        cursor.execute("""
+            INSERT INTO contact (person_id, type, value, label, contact_key)
+            VALUES (?, 'phone', ?, 'primary', ?)
+        """, (person_id, phone, normalize_contact_key("phone", phone)))
+        cursor.execute("""
+            INSERT INTO student (person_id, family_id, date_of_admission, monthly_fee, annual_fund, class)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (person_id, rng.randint(1, families), "2024-04-01", 5000.0, 12000.0, str(rng.randint(1, 10))))
+        student_id = cursor.lastrowid
+        for month in range(dues_per_student):
+            cursor.execute("""
+                INSERT INTO pending_due (student_id, due_type, amount_due, due_date, status)
+                VALUES (?, ?, ?, ?, 'unpaid')
+            """, (student_id, f"Monthly Fee - Month {month + 1}", 5000.0, f"2025-{(month % 12) + 1:02d}-10"))
+            due_ids.append(cursor.lastrowid)
+    cursor.execute("UPDATE id_sequence SET next_value = ? WHERE name = 'family_ssn'", (10001 + families,))
+    backfill_name_index(cursor)
+    conn.commit()
+    conn.close()
+    return due_ids
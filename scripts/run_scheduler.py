@@ -0,0 +1,38 @@
+# scripts/run_scheduler.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from core.db_init import initialize_db
+from core.scheduler import JobScheduler, get_job_status, POLL_INTERVAL
+
+def main():
+    """
+    Runs the background jobs (monthly fees, annual fund, ...) without the GUI,
+    e.g. from cron / Task Scheduler on the machine that holds the database.
+
+    Usage: python scripts/run_scheduler.py [--once]
+      --once  run whatever is due (including missed periods) and exit
+    """
+    initialize_db()
+    scheduler = JobScheduler()
+
+    if "--once" in sys.argv:
+        for name, run_for, success, result in scheduler.run_pending():
+            print(f"{name} for {run_for:%Y-%m-%d}: {'ok' if success else 'FAILED'} {result}")
+        for job in get_job_status():
+            print(f"  {job['name']:<14} next run {job['next_run_at']}  last {job['last_status']} "
+                  f"({job['last_duration_seconds'] or 0:.2f}s)")
+        return
+
+    print(f"Scheduler running as {scheduler.owner}; checking every {POLL_INTERVAL}s. Ctrl+C to stop.")
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+if __name__ == "__main__":
+    main()
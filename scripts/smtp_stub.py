@@ -0,0 +1,112 @@
+# scripts/smtp_stub.py
+"""
+A local SMTP stand-in for testing the e-mail outbox without a mail
+provider: plain SMTP with AUTH (any login is accepted), messages kept in
+memory. connect_delay stands in for the TCP + TLS + login round trips
+of a real server, message_delay for its per-message time, and fail_every
+makes every n-th DATA fail with a transient 451 so retries can be seen.
+
+Point the app at it with
+    CAMPUSCORE_SMTP_HOST=127.0.0.1 CAMPUSCORE_SMTP_PORT=8025 CAMPUSCORE_SMTP_STARTTLS=0
+
+Usage: python scripts/smtp_stub.py [port]   (prints each message received)
+"""
+import socketserver
+import sys
+import threading
+import time
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        time.sleep(server.connect_delay)
+        self.reply("220 campuscore smtp stub")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode().rstrip("\r\n").partition(" ")
+            command = command.upper()
+            if command in ("EHLO", "HELO"):
+                self.wfile.write(b"250-campuscore\r\n250-AUTH PLAIN LOGIN\r\n")
+                self.reply("250 8BITMIME")
+            elif command == "AUTH":
+                mechanism = argument.split()[0].upper() if argument else ""
+                if mechanism == "LOGIN":
+                    if len(argument.split()) == 1:
+                        self.reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                elif len(argument.split()) == 1:
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.reply("235 2.7.0 Authentication successful")
+            elif command == "MAIL":
+                sender, recipients = argument, []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(argument)
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                time.sleep(server.message_delay)
+                with server.lock:
+                    server.data_commands += 1
+                    fail = server.fail_every and server.data_commands % server.fail_every == 0
+                    if not fail:
+                        server.messages.append((sender, recipients, b"".join(lines).decode()))
+                if fail:
+                    self.reply("451 4.3.0 Try again later")
+                else:
+                    self.reply("250 OK queued")
+                    if server.verbose:
+                        print(f"--- message from {sender} to {', '.join(recipients)}\n{b''.join(lines).decode()}")
+            elif command in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Runs on a daemon thread after start(); messages, connections and data_commands count what it saw."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, connect_delay=0.0, message_delay=0.0, fail_every=0, verbose=False):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.fail_every = fail_every
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self.data_commands = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="SMTPStub", daemon=True).start()
+        return self
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8025
+    print(f"SMTP stub listening on 127.0.0.1:{port}")
+    SMTPStub(port, verbose=True).serve_forever()
@@ -5,7 +5,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QDate
 from core.due_operations import add_manual_due
-from core.utils import show_warning, validate_required_fields, validate_date_format, validate_is_float
+from core.utils import validate_required_fields, validate_date_format, validate_is_float
+from .utils import show_warning
 from datetime import datetime
 # --- Import the new search dialog ---
 from .student_search_dialog import StudentSearchDialog
@@ -83,7 +84,7 @@ class AddDueWidget(QWidget):
         """
         Opens the reusable student search dialog.
         """
-        dialog = StudentSearchDialog(self)
+        dialog = StudentSearchDialog(self, prefetch_kinds=())  # Nothing is loaded for the student
         if dialog.exec_() == QDialog.Accepted: # If the user clicked "OK"
             student_id, student_name = dialog.get_selected_student()
             if student_id:
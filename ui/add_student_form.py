@@ -6,11 +6,12 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont
-from core.student_operations import get_next_family_ssn, get_or_create_family
+from core.student_operations import get_next_family_ssn, create_family, TERMINAL_ID
 from core.utils import (
-    show_warning, validate_required_fields, validate_date_format, 
+    validate_required_fields, validate_date_format, 
     validate_phone_length, validate_is_float, validate_ssn
 )
+from .utils import show_warning
 from .family_search_dialog import FamilySearchDialog
 from datetime import datetime
 
@@ -61,7 +62,7 @@ class StudentFormWidget(QWidget):
 
     def load_initial_data(self):
         """Fetches data needed when the form loads, like the next SSN."""
-        self.next_available_ssn = get_next_family_ssn()
+        self.next_available_ssn = get_next_family_ssn(TERMINAL_ID)
         self.new_family_ssn_label.setText(self.next_available_ssn)
 
     def init_ui(self):
@@ -240,10 +241,12 @@ class StudentFormWidget(QWidget):
                 self.linked_family_label.setText(f"Selected: {fam_name} ({fam_ssn})")
                 self.linked_family_label.setStyleSheet("color: green; font-weight: bold;")
         
-    def get_data(self):
+    def get_data(self, defer_family_creation=False):
         """
         Validates all fields and returns the data for submission.
         Returns: (data_dict, contacts, family_id, is_valid)
+        With defer_family_creation, a new family is not created here: family_id
+        is None and data['family_name'] holds the name for the caller to create.
         """
         data = {
             "first_name": self.first_name.text().strip(),
@@ -294,19 +297,25 @@ class StudentFormWidget(QWidget):
         # --- Family ID Logic ---
         final_family_id = None
         if self.radio_create_new.isChecked():
-            new_ssn = self.new_family_ssn_label.text()
             new_name = self.new_family_name_input.text().strip()
             if not new_name:
                 show_warning(self, "Validation Error", "A Family Name is required to create a new family.")
                 return None, None, None, False
-            final_family_id = get_or_create_family(new_ssn, new_name)
+            if defer_family_creation:
+                data['family_name'] = new_name
+                final_family_id = None
+            else:
+                # The SSN is allocated at creation time; show the one actually assigned.
+                final_family_id, new_ssn = create_family(new_name, TERMINAL_ID)
+                if new_ssn:
+                    self.new_family_ssn_label.setText(new_ssn)
         else: # Link to existing
             if not self.selected_family_id:
                 show_warning(self, "Validation Error", "Please use the 'Search' button to select a family.")
                 return None, None, None, False
             final_family_id = self.selected_family_id
             
-        if not final_family_id:
+        if not final_family_id and not defer_family_creation:
             show_warning(self, "Family Error", "Could not create or link the family record.")
             return None, None, None, False
 
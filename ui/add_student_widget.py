@@ -3,8 +3,9 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QMessageBox, QLab
 # --- FIX: Added import for Qt ---
 from PyQt5.QtCore import Qt
 from .add_student_form import StudentFormWidget # <-- Import the refactored form
-from core.student_operations import add_student
-from core.due_operations import add_specific_monthly_fee
+from core.student_operations import enroll_student, TERMINAL_ID
+from core.due_operations import check_if_monthly_fee_was_run
+from core.dedup import get_student_duplicates
 
 class AddStudentWidget(QWidget):
     """
@@ -48,37 +49,48 @@ class AddStudentWidget(QWidget):
         """
         Handles the logic for *adding* a new student.
         """
-        # 1. Get validated data from the form
-        data, contacts, family_id, is_valid = self.form_widget.get_data()
+        # 1. Get validated data from the form (a new family is created by the enrollment itself)
+        data, contacts, family_id, is_valid = self.form_widget.get_data(defer_family_creation=True)
         
         if not is_valid:
             return # Validation failed, warnings already shown
             
-        # 2. Call the backend operation
-        success, status_msg, student_id, fee_amount, due_type_name = add_student(
+        # 2. If this month's fee was already posted, ask up front so the
+        #    fee can be added in the same transaction as the student
+        add_fee = False
+        fee_declined = False
+        if float(data['monthly_fee']) > 0:
+            script_has_run, due_type_name = check_if_monthly_fee_was_run()
+            if script_has_run:
+                reply = QMessageBox.question(self, "Confirm Monthly Fee",
+                    f"The fee '{due_type_name}' has already been posted for other students this month.\n\n"
+                    f"Do you want to add this fee to this new student?",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+                add_fee = reply == QMessageBox.Yes
+                fee_declined = not add_fee
+
+        # 3. Call the backend operation
+        success, status_msg, student_id, family_ssn, fee_due_type = enroll_student(
             data['first_name'], data['middle_name'], data['last_name'], data['father_name'],
             data['mother_name'], data['dob'], data['address'], data['gender'], contacts,
             data['date_of_admission'], data['monthly_fee'], data['annual_fund'], 
-            data['student_class'], family_id
+            data['student_class'], family_id=family_id, family_name=data.get('family_name'),
+            add_current_month_fee=add_fee, terminal_id=TERMINAL_ID
         )
 
         if success:
-            # 3. Handle the response (e.g., ask for fee confirmation)
-            if status_msg == "NEEDS_FEE_CONFIRMATION":
-                reply = QMessageBox.question(self, "Confirm Monthly Fee",
-                    f"Student added successfully (ID: {student_id}).\n\n"
-                    f"The fee '{due_type_name}' has already been posted for other students this month.\n\n"
-                    f"Do you want to add this fee to this new student?",
-                    QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
-                
-                if reply == QMessageBox.Yes:
-                    add_specific_monthly_fee(student_id, fee_amount, due_type_name)
-                    QMessageBox.information(self, "Success", "Student and monthly fee added successfully!")
-                else:
-                    QMessageBox.information(self, "Success", "Student added successfully. Monthly fee was *not* applied.")
-            
-            else: # Standard "SUCCESS" message
-                QMessageBox.information(self, "Success", "Student added successfully!")
+            # 4. Report what was saved
+            message = f"Student added successfully (ID: {student_id}, Family SSN: {family_ssn})."
+            if fee_due_type:
+                message += f"\n\nThe fee '{fee_due_type}' was added to this student."
+            elif fee_declined:
+                message += "\n\nMonthly fee was *not* applied."
+            duplicates = get_student_duplicates(student_id)
+            if duplicates:
+                message += "\n\nThis may be a duplicate of:\n" + "\n".join(
+                    f"  ID {d['student_id']}: {d['full_name']} ({d['reasons']})" for d in duplicates)
+                message += "\nAn administrator can merge them with 'campuscore dedup merge'."
+            QMessageBox.information(self, "Success", message)
             
             self.form_widget.clear_fields()
         else:
@@ -0,0 +1,109 @@
+# ui/admin_dashboard.py
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+    QFrame, QButtonGroup, QStyle
+)
+from PyQt5.QtCore import Qt
+from ui.database_health_widget import DatabaseHealthWidget
+from ui.due_reminder_widget import DueReminderWidget
+
+class AdminDashboard(QWidget):
+    def __init__(self, username, go_back_callback=None):
+        super().__init__()
+        self.username = username
+        self.go_back_callback = go_back_callback
+        self.setWindowTitle(f"Admin Dashboard - {username}")
+        self.setFixedSize(1000, 600)
+        self.setStyleSheet(open("assets/style.qss").read())
+
+        style = self.style()
+        self.health_icon = style.standardIcon(QStyle.SP_DriveHDIcon)
+        self.reminder_icon = style.standardIcon(QStyle.SP_MessageBoxInformation)
+        self.logout_icon = style.standardIcon(QStyle.SP_DialogCancelButton)
+
+        self.init_ui()
+        self.show_database_health()
+        self.btn_database_health.setChecked(True)
+
+    def init_ui(self):
+        main_layout = QHBoxLayout()
+        main_layout.setContentsMargins(0, 0, 0, 0)
+        main_layout.setSpacing(0)
+        self.setLayout(main_layout)
+
+        # Sidebar
+        sidebar = QFrame()
+        sidebar.setFixedWidth(200)
+        sidebar.setObjectName("sidebarFrame")
+
+        self.sidebar_button_group = QButtonGroup(self)
+        self.sidebar_button_group.setExclusive(True)
+
+        self.btn_database_health = QPushButton(" Database Health")
+        self.btn_database_health.setIcon(self.health_icon)
+
+        self.btn_due_reminders = QPushButton(" Due Reminders")
+        self.btn_due_reminders.setIcon(self.reminder_icon)
+
+        self.btn_logout = QPushButton(" Logout")
+        self.btn_logout.setIcon(self.logout_icon)
+
+        buttons = [self.btn_database_health, self.btn_due_reminders]
+
+        sidebar_layout = QVBoxLayout(sidebar)
+        for button in buttons:
+            button.setObjectName("sidebarButton")
+            button.setCheckable(True)
+            self.sidebar_button_group.addButton(button)
+            sidebar_layout.addWidget(button)
+
+        sidebar_layout.addStretch()
+
+        self.btn_logout.setObjectName("sidebarButton")
+        sidebar_layout.addWidget(self.btn_logout)
+
+        # Content Area
+        self.content_area = QFrame()
+        self.content_layout = QVBoxLayout(self.content_area)
+        self.content_area.setObjectName("contentArea")
+        self.content_layout.setContentsMargins(0, 0, 0, 0)
+
+        header = QLabel(f"Welcome, {self.username}")
+        header.setAlignment(Qt.AlignRight)
+        header.setObjectName("headerLabel")
+        self.content_layout.addWidget(header)
+
+        self.content_stack = QFrame()
+        self.content_stack_layout = QVBoxLayout(self.content_stack)
+        self.content_stack_layout.setContentsMargins(20, 10, 20, 10)
+        self.content_layout.addWidget(self.content_stack, 1)
+
+        main_layout.addWidget(sidebar)
+        main_layout.addWidget(self.content_area, 1)
+
+        self.btn_database_health.clicked.connect(self.show_database_health)
+        self.btn_due_reminders.clicked.connect(self.show_due_reminders)
+        self.btn_logout.clicked.connect(self.handle_logout)
+
+    def _clear_content_area(self):
+        """Helper function to clear the content area."""
+        for i in reversed(range(self.content_stack_layout.count())):
+            item = self.content_stack_layout.takeAt(i)
+            widget = item.widget()
+            if widget:
+                widget.deleteLater()
+
+    def show_database_health(self):
+        self._clear_content_area()
+        widget = DatabaseHealthWidget()
+        self.content_stack_layout.addWidget(widget)
+
+    def show_due_reminders(self):
+        self._clear_content_area()
+        widget = DueReminderWidget(self.username)
+        self.content_stack_layout.addWidget(widget)
+
+    def handle_logout(self):
+        self.close()
+        if self.go_back_callback:
+            self.go_back_callback()
@@ -0,0 +1,176 @@
+# SMS/ui/bulk_due_widget.py
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QFormLayout,
+    QMessageBox, QComboBox
+)
+from PyQt5.QtCore import Qt
+from core.due_operations import preview_bulk_due, assign_bulk_due
+from core.utils import validate_required_fields, validate_date_format, validate_is_float
+from .utils import show_warning
+from datetime import datetime
+
+class BulkDueWidget(QWidget):
+    """
+    A form for charging the same due (exam fee, trip, uniform...) to a whole
+    class, a list of families, every student, or a filtered set at once.
+    """
+    # (label shown in the combo, target kind for core.due_operations, input placeholder)
+    TARGETS = [
+        ("Class", "class", "e.g., 9"),
+        ("Families (SSNs)", "families", "e.g., 10001, 10002, 10007"),
+        ("All Students", "all", ""),
+        ("Filter", "filter", "e.g., class = 9 and monthly_fee >= 3000"),
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        title = QLabel("Assign Due to Many Students")
+        title.setObjectName("titleLabel")
+        title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title)
+
+        form_layout = QFormLayout()
+
+        # --- Target Section ---
+        self.target_combo = QComboBox()
+        self.target_combo.addItems([label for label, _, _ in self.TARGETS])
+        self.target_input = QLineEdit()
+        form_layout.addRow("Charge To:", self.target_combo)
+        form_layout.addRow("", self.target_input)
+
+        # --- Due Details Section ---
+        self.due_type_input = QLineEdit()
+        self.due_type_input.setPlaceholderText("e.g., Exam Fee - Term 1")
+
+        self.amount_input = QLineEdit()
+        self.amount_input.setPlaceholderText("e.g., 1500.00")
+
+        self.due_date_input = QLineEdit()
+        self.due_date_input.setPlaceholderText("YYYY-MM-DD")
+        self.due_date_input.setText(datetime.now().strftime("%Y-%m-%d"))
+
+        form_layout.addRow("Due Type:", self.due_type_input)
+        form_layout.addRow("Amount:", self.amount_input)
+        form_layout.addRow("Due Date:", self.due_date_input)
+
+        self.preview_label = QLabel("Click 'Preview' to see how many students will be charged.")
+        self.preview_label.setWordWrap(True)
+        form_layout.addRow("Preview:", self.preview_label)
+
+        self.btn_preview = QPushButton("Preview")
+        self.btn_preview.setObjectName("secondaryButton")
+        self.btn_preview.clicked.connect(self.handle_preview)
+
+        self.btn_submit = QPushButton("Assign Due")
+        self.btn_submit.setObjectName("primaryButton")
+        self.btn_submit.clicked.connect(self.handle_submit)
+
+        layout.addLayout(form_layout)
+        layout.addStretch()
+        layout.addWidget(self.btn_preview)
+        layout.addWidget(self.btn_submit)
+
+        self.target_combo.currentIndexChanged.connect(self.on_target_changed)
+        self.on_target_changed(0)
+
+        self.target_input.returnPressed.connect(self.due_type_input.setFocus)
+        self.due_type_input.returnPressed.connect(self.amount_input.setFocus)
+        self.amount_input.returnPressed.connect(self.due_date_input.setFocus)
+        self.due_date_input.returnPressed.connect(self.btn_preview.click)
+
+    def on_target_changed(self, index):
+        _, kind, placeholder = self.TARGETS[index]
+        self.target_input.clear()
+        self.target_input.setPlaceholderText(placeholder)
+        self.target_input.setEnabled(kind != "all")
+        self.preview_label.setText("Click 'Preview' to see how many students will be charged.")
+
+    def get_target(self):
+        """Returns (target_kind, target_value) from the selector."""
+        _, kind, _ = self.TARGETS[self.target_combo.currentIndex()]
+        value = self.target_input.text().strip()
+        if kind == "families":
+            return kind, [ssn for ssn in value.replace(",", " ").split() if ssn]
+        return kind, value
+
+    def get_data(self):
+        """
+        Validates the form.
+        Returns (target_kind, target_value, data_dict) or None if invalid.
+        """
+        target_kind, target_value = self.get_target()
+        if target_kind != "all" and not target_value:
+            show_warning(self, "Validation Error", "Please enter who the due should be charged to.")
+            return None
+
+        data = {
+            "due_type": self.due_type_input.text().strip(),
+            "amount": self.amount_input.text().strip(),
+            "due_date": self.due_date_input.text().strip()
+        }
+        is_valid, error_msg = validate_required_fields(data, data.keys())
+        if not is_valid:
+            show_warning(self, "Validation Error", error_msg)
+            return None
+
+        is_valid, error_msg = validate_is_float(data['amount'])
+        if not is_valid:
+            show_warning(self, "Validation Error", f"Amount: {error_msg}")
+            return None
+
+        is_valid, error_msg = validate_date_format(data['due_date'])
+        if not is_valid:
+            show_warning(self, "Validation Error", f"Due Date: {error_msg}")
+            return None
+        return target_kind, target_value, data
+
+    def handle_preview(self):
+        form = self.get_data()
+        if not form:
+            return
+        target_kind, target_value, data = form
+        success, targeted, already_charged = preview_bulk_due(
+            target_kind, target_value, data['due_type'], data['due_date']
+        )
+        if not success:
+            show_warning(self, "Preview Failed", targeted)
+            return
+        self.preview_label.setText(
+            f"{targeted} student(s) matched; {targeted - already_charged} will be charged, "
+            f"{already_charged} already have this due."
+        )
+
+    def handle_submit(self):
+        form = self.get_data()
+        if not form:
+            return
+        target_kind, target_value, data = form
+
+        success, targeted, already_charged = preview_bulk_due(
+            target_kind, target_value, data['due_type'], data['due_date']
+        )
+        if not success:
+            show_warning(self, "Error", targeted)
+            return
+        reply = QMessageBox.question(self, "Confirm Bulk Due",
+            f"Charge '{data['due_type']}' ({float(data['amount']):.2f}) to "
+            f"{targeted - already_charged} student(s)?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.No:
+            return
+
+        result = assign_bulk_due(target_kind, target_value, data['due_type'],
+                                 float(data['amount']), data['due_date'])
+        if result[0]:
+            stats = result[1]
+            QMessageBox.information(self, "Success",
+                f"Due added for {stats['inserted']} student(s); {stats['skipped']} already had it.\n"
+                f"({stats['rows_per_second']:.0f} rows/s)")
+            self.preview_label.setText("Click 'Preview' to see how many students will be charged.")
+        else:
+            QMessageBox.critical(self, "Error", f"Failed to assign due:\n{result[1]}")
@@ -0,0 +1,209 @@
+# SMS/ui/database_health_widget.py
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget,
+    QTreeWidgetItem, QAbstractItemView, QGroupBox, QFormLayout, QHeaderView,
+    QMessageBox
+)
+from PyQt5.QtCore import Qt, QTimer
+from core.maintenance import get_database_health, start_maintenance
+from core.queries import get_query_stats
+from core.search_cache import get_search_cache_stats
+from core.prefetch import get_prefetch_stats
+from core.checkout import get_checkout_stats
+from .receipt import get_receipt_queue_stats
+from core.emailer import get_outbox_stats
+
+class DatabaseHealthWidget(QWidget):
+    """
+    Admin view of the database file: size, free pages, fragmentation,
+    largest tables, the last run of each maintenance task, and the
+    per-query timings, search cache and prefetch hit rates of this session,
+    the seconds per fast-checkout transaction over the last week, and the
+    receipt queue's pages per second and the e-mail outbox's depth and
+    send latency.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.maintenance_future = None
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(200)
+        self.poll_timer.timeout.connect(self.check_maintenance_done)
+        self.init_ui()
+        self.load_health()
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+
+        title = QLabel("Database Health")
+        title.setObjectName("titleLabel")
+        title.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(title)
+
+        # --- 1. File Summary ---
+        summary_group = QGroupBox("Database File")
+        summary_layout = QFormLayout()
+        self.size_label = QLabel("N/A")
+        self.free_label = QLabel("N/A")
+        self.settings_label = QLabel("N/A")
+        self.stats_label = QLabel("N/A")
+        summary_layout.addRow("Size:", self.size_label)
+        summary_layout.addRow("Free Pages:", self.free_label)
+        summary_layout.addRow("Settings:", self.settings_label)
+        summary_layout.addRow("Planner Statistics:", self.stats_label)
+        summary_group.setLayout(summary_layout)
+        main_layout.addWidget(summary_group)
+
+        # --- 2. Largest Tables ---
+        tables_group = QGroupBox("Largest Tables and Indexes")
+        tables_layout = QVBoxLayout()
+        self.tables_tree = QTreeWidget()
+        self.tables_tree.setColumnCount(3)
+        self.tables_tree.setHeaderLabels(["Name", "Size (KiB)", "Unused Space"])
+        self.tables_tree.setRootIsDecorated(False)
+        self.tables_tree.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tables_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        tables_layout.addWidget(self.tables_tree)
+        tables_group.setLayout(tables_layout)
+        main_layout.addWidget(tables_group, 1)
+
+        # --- 3. Maintenance History ---
+        runs_group = QGroupBox("Last Maintenance Runs")
+        runs_layout = QVBoxLayout()
+        self.runs_tree = QTreeWidget()
+        self.runs_tree.setColumnCount(5)
+        self.runs_tree.setHeaderLabels(["Task", "Started", "Duration (s)", "Status", "Details"])
+        self.runs_tree.setRootIsDecorated(False)
+        self.runs_tree.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.runs_tree.header().setSectionResizeMode(4, QHeaderView.Stretch)
+        runs_layout.addWidget(self.runs_tree)
+        runs_group.setLayout(runs_layout)
+        main_layout.addWidget(runs_group, 1)
+
+        # --- 4. Query Statistics (this session) ---
+        queries_group = QGroupBox("Query Statistics (this session)")
+        queries_layout = QVBoxLayout()
+        self.queries_tree = QTreeWidget()
+        self.queries_tree.setColumnCount(6)
+        self.queries_tree.setHeaderLabels(["Query", "Calls", "Errors", "Total (s)", "Avg (ms)", "Max (ms)"])
+        self.queries_tree.setRootIsDecorated(False)
+        self.queries_tree.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.queries_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        queries_layout.addWidget(self.queries_tree)
+        self.search_cache_label = QLabel("")
+        queries_layout.addWidget(self.search_cache_label)
+        self.prefetch_label = QLabel("")
+        queries_layout.addWidget(self.prefetch_label)
+        self.checkout_label = QLabel("")
+        queries_layout.addWidget(self.checkout_label)
+        self.receipts_label = QLabel("")
+        queries_layout.addWidget(self.receipts_label)
+        self.outbox_label = QLabel("")
+        queries_layout.addWidget(self.outbox_label)
+        queries_group.setLayout(queries_layout)
+        main_layout.addWidget(queries_group, 1)
+
+        button_layout = QHBoxLayout()
+        self.btn_refresh = QPushButton("Refresh")
+        self.btn_refresh.setObjectName("secondaryButton")
+        self.btn_refresh.clicked.connect(self.load_health)
+        self.btn_run = QPushButton("Run Maintenance Now")
+        self.btn_run.setObjectName("primaryButton")
+        self.btn_run.clicked.connect(self.handle_run_maintenance)
+        button_layout.addWidget(self.btn_refresh)
+        button_layout.addWidget(self.btn_run)
+        main_layout.addLayout(button_layout)
+
+    def load_health(self):
+        health = get_database_health()
+        if health is None:
+            QMessageBox.critical(self, "Error", "Could not read the database health figures.")
+            return
+
+        size_bytes = health["page_count"] * health["page_size"]
+        self.size_label.setText(
+            f"{size_bytes / 1024 / 1024:.2f} MiB ({health['page_count']} pages of {health['page_size']} bytes)"
+        )
+        self.free_label.setText(
+            f"{health['freelist_count']} ({health['free_bytes'] / 1024:.0f} KiB, {health['freelist_ratio']:.1%})"
+        )
+        self.settings_label.setText(
+            f"auto_vacuum = {health['auto_vacuum']}, journal_mode = {health['journal_mode']}"
+        )
+        self.stats_label.setText("Collected" if health["analyzed"] else "Missing (run maintenance)")
+
+        self.tables_tree.clear()
+        for table in health["tables"][:15]:
+            QTreeWidgetItem(self.tables_tree, [
+                table["name"], f"{table['bytes'] / 1024:.1f}", f"{table['unused_ratio']:.1%}"
+            ])
+
+        self.runs_tree.clear()
+        for run in health["last_runs"]:
+            QTreeWidgetItem(self.runs_tree, [
+                run["task"], run["started_at"], f"{run['duration_seconds'] or 0:.3f}",
+                run["status"].capitalize(), run["detail"] or ""
+            ])
+
+        self.queries_tree.clear()
+        for stats in get_query_stats()[:20]:
+            QTreeWidgetItem(self.queries_tree, [
+                stats["name"], str(stats["calls"]), str(stats["errors"]), f"{stats['total_seconds']:.3f}",
+                f"{stats['avg_ms']:.2f}", f"{stats['max_ms']:.2f}"
+            ])
+        cache = get_search_cache_stats()
+        self.search_cache_label.setText(
+            f"Search cache: {cache['hit_rate']:.1%} hit rate ({cache['hits']} hits, {cache['misses']} misses), "
+            f"{cache['entries']} entries, {cache['invalidations']} invalidations by writes, "
+            f"{cache['expired']} expired, {cache['evicted']} evicted"
+        )
+        prefetch = get_prefetch_stats()
+        self.prefetch_label.setText(
+            f"Prefetch: {prefetch['hit_rate']:.1%} of screens opened from prefetched data "
+            f"({prefetch['hits']} hits, {prefetch['misses']} misses, {prefetch['stale']} stale), "
+            f"{prefetch['saved_seconds']:.2f}s saved ({prefetch['avg_saved_ms']:.1f} ms per hit)"
+        )
+        checkout = get_checkout_stats()
+        if checkout is not None:
+            self.checkout_label.setText(
+                f"Fast checkout (7 days): {checkout['transactions']} transactions, "
+                f"median {checkout['median_seconds']:.1f}s, p90 {checkout['p90_seconds']:.1f}s end to end "
+                f"(lookup {checkout['avg_lookup_seconds']:.2f}s, payment {checkout['avg_payment_seconds']:.2f}s, "
+                f"print {checkout['avg_print_seconds']:.2f}s on average)"
+            )
+        receipts = get_receipt_queue_stats()
+        self.receipts_label.setText(
+            f"Receipt queue: {receipts['pages']} pages in {receipts['jobs']} jobs ({receipts['failed']} failed), "
+            f"{receipts['pages_per_second']:.1f} pages/s"
+        )
+        outbox = get_outbox_stats()
+        if outbox is not None:
+            self.outbox_label.setText(
+                f"E-mail outbox: {outbox['pending']} waiting, {outbox['sending']} sending; "
+                f"{outbox['sent_recently']} sent in 24h, latency avg {outbox['avg_latency_seconds']:.1f}s, "
+                f"max {outbox['max_latency_seconds']:.1f}s; {outbox['sender']['retried']} retries, "
+                f"{outbox['sender']['failed']} failed this session"
+            )
+
+    def handle_run_maintenance(self):
+        if self.maintenance_future is not None:
+            return
+        self.btn_run.setEnabled(False)
+        self.btn_run.setText("Running...")
+        self.maintenance_future = start_maintenance()
+        self.poll_timer.start()
+
+    def check_maintenance_done(self):
+        if not self.maintenance_future.done():
+            return
+        self.poll_timer.stop()
+        all_ok, results = self.maintenance_future.result()
+        self.maintenance_future = None
+        self.btn_run.setEnabled(True)
+        self.btn_run.setText("Run Maintenance Now")
+        self.load_health()
+        if all_ok:
+            total = sum(r["seconds"] for r in results.values())
+            QMessageBox.information(self, "Maintenance Complete", f"All tasks succeeded in {total:.2f}s.")
+        else:
+            failed = [f"{task}: {r['detail']}" for task, r in results.items() if r["status"] != "success"]
+            QMessageBox.warning(self, "Maintenance Problems", "\n".join(failed))
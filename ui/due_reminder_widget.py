@@ -0,0 +1,133 @@
+# SMS/ui/due_reminder_widget.py
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QFormLayout, QMessageBox,
+    QGroupBox, QTreeWidget, QTreeWidgetItem, QHeaderView, QAbstractItemView
+)
+from PyQt5.QtCore import Qt, QTimer
+from core.reminders import preview_reminders, run_reminder_campaign, get_campaign_stats
+from core.utils import validate_date_format
+from .utils import show_warning
+from datetime import datetime
+
+class DueReminderWidget(QWidget):
+    """
+    Sends every family with unpaid dues one e-mail listing them, and shows
+    the last campaigns with their delivery progress (refreshed while any
+    message is still waiting in the outbox).
+    """
+    def __init__(self, username=None, parent=None):
+        super().__init__(parent)
+        self.username = username
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(2000)
+        self.refresh_timer.timeout.connect(self.load_campaigns)
+        self.init_ui()
+        self.load_campaigns()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        title = QLabel("Due Reminders")
+        title.setObjectName("titleLabel")
+        title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title)
+
+        form_layout = QFormLayout()
+        self.due_before_input = QLineEdit()
+        self.due_before_input.setPlaceholderText("YYYY-MM-DD")
+        self.due_before_input.setText(datetime.now().strftime("%Y-%m-%d"))
+        form_layout.addRow("Dues Due On/Before:", self.due_before_input)
+
+        self.preview_label = QLabel("Click 'Preview' to see how many families will be reminded.")
+        self.preview_label.setWordWrap(True)
+        form_layout.addRow("Preview:", self.preview_label)
+        layout.addLayout(form_layout)
+
+        self.btn_preview = QPushButton("Preview")
+        self.btn_preview.setObjectName("secondaryButton")
+        self.btn_preview.clicked.connect(self.handle_preview)
+        self.btn_send = QPushButton("Send Reminders")
+        self.btn_send.setObjectName("primaryButton")
+        self.btn_send.clicked.connect(self.handle_send)
+        layout.addWidget(self.btn_preview)
+        layout.addWidget(self.btn_send)
+
+        campaigns_group = QGroupBox("Last Campaigns")
+        campaigns_layout = QVBoxLayout()
+        self.campaigns_tree = QTreeWidget()
+        self.campaigns_tree.setColumnCount(7)
+        self.campaigns_tree.setHeaderLabels(
+            ["Started", "Families", "Messages", "Sent", "Failed", "Waiting", "Timing"]
+        )
+        self.campaigns_tree.setRootIsDecorated(False)
+        self.campaigns_tree.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.campaigns_tree.header().setSectionResizeMode(6, QHeaderView.Stretch)
+        campaigns_layout.addWidget(self.campaigns_tree)
+        campaigns_group.setLayout(campaigns_layout)
+        layout.addWidget(campaigns_group, 1)
+
+        self.due_before_input.returnPressed.connect(self.btn_preview.click)
+
+    def get_due_before(self):
+        due_before = self.due_before_input.text().strip()
+        is_valid, error_msg = validate_date_format(due_before)
+        if not is_valid:
+            show_warning(self, "Validation Error", error_msg)
+            return None
+        return due_before
+
+    def handle_preview(self):
+        due_before = self.get_due_before()
+        if not due_before:
+            return
+        success, stats = preview_reminders(due_before)
+        if not success:
+            show_warning(self, "Preview Failed", stats)
+            return
+        self.preview_label.setText(
+            f"{stats['families']} famil{'y' if stats['families'] == 1 else 'ies'} owe "
+            f"{stats['total_amount']:.2f} over {stats['dues']} due(s); {stats['messages']} will be e-mailed, "
+            f"{stats['no_email']} have no e-mail address."
+        )
+
+    def handle_send(self):
+        due_before = self.get_due_before()
+        if not due_before:
+            return
+        success, stats = preview_reminders(due_before)
+        if not success:
+            show_warning(self, "Error", stats)
+            return
+        if not stats['messages']:
+            QMessageBox.information(self, "Nothing to Send", "No family with an e-mail address has unpaid dues.")
+            return
+        reply = QMessageBox.question(self, "Confirm Reminders",
+            f"E-mail {stats['messages']} famil{'y' if stats['messages'] == 1 else 'ies'} about their unpaid dues?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.No:
+            return
+
+        success, stats = run_reminder_campaign(due_before, self.username)
+        if not success:
+            QMessageBox.critical(self, "Error", f"Failed to queue the reminders:\n{stats}")
+            return
+        QMessageBox.information(self, "Reminders Queued",
+            f"{stats['messages']} reminder(s) queued; they are being sent in the background.\n"
+            f"(query {stats['query_seconds'] * 1000:.0f} ms, {stats['messages_per_second']:.0f} messages/s queued)")
+        self.preview_label.setText("Click 'Preview' to see how many families will be reminded.")
+        self.load_campaigns()
+
+    def load_campaigns(self):
+        campaigns = get_campaign_stats()
+        self.campaigns_tree.clear()
+        for c in campaigns:
+            timing = (f"query {c['query_seconds'] * 1000:.0f} ms, render {c['render_seconds'] * 1000:.0f} ms; "
+                      f"{c['messages_per_second']:.1f} sent/s")
+            QTreeWidgetItem(self.campaigns_tree, [
+                c['started_at'], str(c['families']), str(c['messages']), str(c['sent']),
+                str(c['failed']), str(c['pending']), timing
+            ])
+        if any(c['pending'] for c in campaigns):
+            self.refresh_timer.start()
+        else:
+            self.refresh_timer.stop()
@@ -1,9 +1,10 @@
 # SMS/ui/family_search_dialog.py
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QDialogButtonBox,
-    QLineEdit, QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView
+    QLineEdit, QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QLabel, QCheckBox
 )
-from core.student_operations import search_families
+from core.pagination import Page
+from core.student_operations import search_families_page, search_families_fuzzy
 
 class FamilySearchDialog(QDialog):
     """
@@ -17,6 +18,9 @@ class FamilySearchDialog(QDialog):
         self.selected_family_id = None
         self.selected_family_ssn = None
         self.selected_family_name = None
+        self.current_term = None
+        self.next_cursor = None
+        self.total_results = None
 
         main_layout = QVBoxLayout(self)
         
@@ -24,9 +28,12 @@ class FamilySearchDialog(QDialog):
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by Family SSN or Family Name...")
+        self.fuzzy_check = QCheckBox("Typo-tolerant")
+        self.fuzzy_check.setToolTip("Find family names that are spelled differently, closest first")
         self.search_btn = QPushButton("Search")
         self.search_btn.setObjectName("primaryButton")
         search_layout.addWidget(self.search_input, 1)
+        search_layout.addWidget(self.fuzzy_check)
         search_layout.addWidget(self.search_btn)
         
         # --- Results Table ---
@@ -38,6 +45,14 @@ class FamilySearchDialog(QDialog):
         self.results_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.results_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
         
+        more_layout = QHBoxLayout()
+        self.count_label = QLabel("")
+        self.load_more_btn = QPushButton("Load More")
+        self.load_more_btn.setObjectName("secondaryButton")
+        self.load_more_btn.setVisible(False)
+        more_layout.addWidget(self.count_label, 1)
+        more_layout.addWidget(self.load_more_btn)
+        
         # --- Dialog Buttons ---
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         self.button_box.accepted.connect(self.on_accept)
@@ -46,11 +61,13 @@ class FamilySearchDialog(QDialog):
 
         main_layout.addLayout(search_layout)
         main_layout.addWidget(self.results_table)
+        main_layout.addLayout(more_layout)
         main_layout.addWidget(self.button_box)
         
         # --- Connections ---
         self.search_btn.clicked.connect(self.on_search)
         self.search_input.returnPressed.connect(self.on_search)
+        self.load_more_btn.clicked.connect(self.on_load_more)
         self.results_table.itemSelectionChanged.connect(self.on_selection_changed)
         self.results_table.itemDoubleClicked.connect(self.on_accept)
 
@@ -60,14 +77,34 @@ class FamilySearchDialog(QDialog):
         if not search_term:
             return
             
-        results = search_families(search_term)
+        self.current_term = search_term
         self.results_table.setRowCount(0)
-        
-        for row, family in enumerate(results):
+        if self.fuzzy_check.isChecked() and not search_term.isdigit():
+            # Closest names first, all on one page
+            families = search_families_fuzzy(search_term)
+            page = Page(families, None, len(families))
+        else:
+            page = search_families_page(search_term, with_total=True)
+        self.total_results = page.total
+        self.append_page(page)
+
+    def on_load_more(self):
+        if self.current_term and self.next_cursor:
+            self.append_page(search_families_page(self.current_term, self.next_cursor))
+
+    def append_page(self, page):
+        """Adds one page of families below the rows already shown."""
+        self.next_cursor = page.next_cursor
+        for family in page.items:
+            row = self.results_table.rowCount()
             self.results_table.insertRow(row)
             self.results_table.setItem(row, 0, QTableWidgetItem(str(family['id'])))
             self.results_table.setItem(row, 1, QTableWidgetItem(family['family_SSN']))
             self.results_table.setItem(row, 2, QTableWidgetItem(family['family_name']))
+        shown = self.results_table.rowCount()
+        self.count_label.setText(f"Showing {shown} of {self.total_results}" if self.total_results is not None
+                                 else f"Showing {shown}")
+        self.load_more_btn.setVisible(self.next_cursor is not None)
 
     def on_selection_changed(self):
         """Enables the OK button when a family is selected."""
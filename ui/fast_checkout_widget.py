@@ -0,0 +1,203 @@
+# SMS/ui/fast_checkout_widget.py
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QComboBox, QShortcut
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QKeySequence
+from datetime import datetime
+from core.checkout import get_checkout, CheckoutTimer
+from core.due_operations import make_payment
+from .receipt import get_receipt_queue, has_default_printer
+
+class FastCheckoutWidget(QWidget):
+    """
+    Keyboard / scanner checkout for the cashier desk. Scan a card (or type
+    a student ID or family SSN) and press Enter: the student's, or every
+    sibling's, unpaid dues appear with the oldest selected and its balance
+    filled in. Enter again records the payment and prints the receipt on
+    the default printer in the background; focus goes back to the scan field
+    for the next one.
+    No dialogs: problems are shown in the status line. Each transaction's
+    seconds are recorded (see core/checkout.py).
+    """
+    def __init__(self, username, parent=None):
+        super().__init__(parent)
+        self.received_by_user = username
+        self.current_code = None
+        self.rows = []  # (StudentSummary, DueSummary) per table row
+        self.scanning = False
+        self.timer = CheckoutTimer()
+        self.init_ui()
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+
+        title = QLabel("Fast Checkout")
+        title.setObjectName("titleLabel")
+        title.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(title)
+
+        scan_layout = QHBoxLayout()
+        self.scan_input = QLineEdit()
+        self.scan_input.setPlaceholderText("Scan card or type Student ID / Family SSN, then Enter (F2)")
+        self.scan_input.textEdited.connect(self.on_scan_edited)
+        self.scan_input.returnPressed.connect(self.handle_lookup)
+        scan_layout.addWidget(QLabel("Scan:"))
+        scan_layout.addWidget(self.scan_input, 1)
+        main_layout.addLayout(scan_layout)
+
+        self.student_label = QLabel("")
+        main_layout.addWidget(self.student_label)
+
+        self.dues_table = QTableWidget()
+        self.dues_table.setColumnCount(5)
+        self.dues_table.setHorizontalHeaderLabels([
+            "Student", "Due ID", "Due Type", "Amount Remaining", "Due Date"
+        ])
+        self.dues_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.dues_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.dues_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.dues_table.currentCellChanged.connect(self.on_due_changed)
+        main_layout.addWidget(self.dues_table, 1)
+
+        pay_layout = QHBoxLayout()
+        self.amount_input = QLineEdit()
+        self.amount_input.setPlaceholderText("Amount")
+        self.amount_input.returnPressed.connect(self.handle_pay_and_print)
+        self.payment_mode_combo = QComboBox()
+        self.payment_mode_combo.addItems(["Cash", "Credit Card", "Bank Transfer"])
+        self.pay_btn = QPushButton("Pay && Print (Enter)")
+        self.pay_btn.setObjectName("primaryButton")
+        self.pay_btn.clicked.connect(self.handle_pay_and_print)
+        pay_layout.addWidget(QLabel("Amount:"))
+        pay_layout.addWidget(self.amount_input, 1)
+        pay_layout.addWidget(self.payment_mode_combo)
+        pay_layout.addWidget(self.pay_btn)
+        main_layout.addLayout(pay_layout)
+
+        self.status_label = QLabel("Ready.")
+        main_layout.addWidget(self.status_label)
+
+        QShortcut(QKeySequence("F2"), self, activated=self.focus_scan)
+        self.set_payment_enabled(False)
+        self.focus_scan()
+
+    def focus_scan(self):
+        self.scan_input.setFocus()
+        self.scan_input.selectAll()
+
+    def set_payment_enabled(self, enabled):
+        self.amount_input.setEnabled(enabled)
+        self.payment_mode_combo.setEnabled(enabled)
+        self.pay_btn.setEnabled(enabled)
+
+    def show_status(self, message, error=False):
+        self.status_label.setStyleSheet("color: #c0392b;" if error else "")
+        self.status_label.setText(message)
+
+    def on_scan_edited(self, text):
+        # A new transaction starts with the first character scanned or typed
+        if text and not self.scanning:
+            self.scanning = True
+            self.timer.start()
+
+    def handle_lookup(self):
+        code = self.scan_input.text().strip()
+        if not code:
+            return
+        if not self.timer.running:
+            self.timer.start()
+        results = get_checkout(code)
+        self.timer.mark("lookup")
+        self.scan_input.clear()
+        self.scanning = False
+        if not results:
+            self.show_status(f"No student or family found for '{code}'.", error=True)
+            self.load_rows(None, [])
+            return
+        self.load_rows(code, results)
+        if not self.rows:
+            self.show_status("No unpaid dues.")
+            self.focus_scan()
+            return
+        self.show_status(f"{len(self.rows)} unpaid due(s). Enter to pay the selected one.")
+        self.amount_input.setFocus()
+        self.amount_input.selectAll()
+
+    def load_rows(self, code, results):
+        """Fills the table from get_checkout() results and selects the oldest due."""
+        self.current_code = code
+        self.rows = [(student, due) for student, dues in results for due in dues]
+        self.student_label.setText(", ".join(
+            f"{student.full_name} (ID {student.student_id}, Class {student.student_class})"
+            for student, _ in results
+        ))
+        self.dues_table.setRowCount(len(self.rows))
+        for row, (student, due) in enumerate(self.rows):
+            self.dues_table.setItem(row, 0, QTableWidgetItem(student.full_name))
+            self.dues_table.setItem(row, 1, QTableWidgetItem(str(due.pending_due_id)))
+            self.dues_table.setItem(row, 2, QTableWidgetItem(due.due_type))
+            self.dues_table.setItem(row, 3, QTableWidgetItem(f"{due.amount_remaining:.2f}"))
+            self.dues_table.setItem(row, 4, QTableWidgetItem(due.due_date))
+        self.dues_table.resizeColumnsToContents()
+        if self.rows:
+            oldest = min(range(len(self.rows)), key=lambda row: self.rows[row][1].due_date)
+            self.dues_table.setCurrentCell(oldest, 0)
+        else:
+            self.amount_input.clear()
+        self.set_payment_enabled(bool(self.rows))
+
+    def on_due_changed(self, row, column, previous_row, previous_column):
+        if 0 <= row < len(self.rows):
+            self.amount_input.setText(f"{self.rows[row][1].amount_remaining:.2f}")
+
+    def handle_pay_and_print(self):
+        row = self.dues_table.currentRow()
+        if not (0 <= row < len(self.rows)):
+            self.show_status("Scan a student first.", error=True)
+            return
+        student, due = self.rows[row]
+        try:
+            amount_to_pay = float(self.amount_input.text().strip())
+        except ValueError:
+            self.show_status("Payment amount must be a valid number.", error=True)
+            return
+        if amount_to_pay <= 0:
+            self.show_status("Payment amount must be greater than zero.", error=True)
+            return
+        if amount_to_pay > due.amount_remaining + 0.005:
+            # Pre-payments need the confirmation on the Make Payment page
+            self.show_status(
+                f"{amount_to_pay:.2f} is more than the remaining {due.amount_remaining:.2f}; "
+                "use Make Payment for pre-payments.", error=True)
+            return
+
+        # Another due of the students on screen is timed from here, without a lookup
+        if not self.timer.running:
+            self.timer.start()
+        payment_mode = self.payment_mode_combo.currentText()
+        payment_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        success, message, new_payment_id = make_payment(
+            due.pending_due_id, amount_to_pay, payment_mode, payment_timestamp, self.received_by_user
+        )
+        self.timer.mark("payment")
+        if not success:
+            self.show_status(f"The payment could not be recorded: {message}", error=True)
+            return
+
+        # The receipt is rendered and printed by the background receipt queue
+        printed = has_default_printer()
+        if printed:
+            get_receipt_queue().print_payments([new_payment_id])
+        self.timer.mark("print")
+        seconds = self.timer.finish(self.received_by_user, student.student_id, new_payment_id,
+                                    "paid" if printed else "print_failed")
+
+        self.load_rows(self.current_code, get_checkout(self.current_code))
+        self.show_status(
+            f"Paid {amount_to_pay:.2f} for {student.full_name} ({due.due_type}), receipt {new_payment_id}, "
+            f"{message.title()}, in {seconds:.1f} s."
+            + ("" if printed else " No default printer: the receipt was not printed."),
+            error=not printed)
+        self.focus_scan()
@@ -1,9 +1,9 @@
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QMessageBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
-from core.db_login import validate_admin, validate_receptionist
+from core.db_login import submit_login
 
 class LoginWindow(QWidget):
     def __init__(self, role, go_back_callback, open_dashboard_callback):
@@ -11,6 +11,12 @@ class LoginWindow(QWidget):
         self.role = role
         self.go_back_callback = go_back_callback
         self.open_dashboard_callback = open_dashboard_callback
+        # The password is checked on the login worker thread; poll for its result
+        self.login_future = None
+        self.login_username = None
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(50)
+        self.poll_timer.timeout.connect(self.check_login_done)
 
         self.setWindowTitle(f"{role} Login - School Management System")
         self.setFixedSize(600, 400)
@@ -67,6 +73,8 @@ class LoginWindow(QWidget):
         self.password_input.returnPressed.connect(self.handle_login)
 
     def handle_login(self):
+        if self.login_future is not None:
+            return
         username = self.username_input.text().strip()
         password = self.password_input.text().strip()
 
@@ -74,18 +82,33 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Error", "Please enter both username and password.")
             return
 
-        # Validate based on role
-        if self.role == "Admin":
-            valid = validate_admin(username, password)
-        else:
-            valid = validate_receptionist(username, password)
+        # Validate based on role, off the GUI thread
+        self.login_username = username
+        self.login_future = submit_login(self.role.lower(), username, password)
+        self.btn_login.setEnabled(False)
+        self.btn_login.setText("Checking...")
+        self.poll_timer.start()
+
+    def check_login_done(self):
+        if not self.login_future.done():
+            return
+        self.poll_timer.stop()
+        future, self.login_future = self.login_future, None
+        self.btn_login.setEnabled(True)
+        self.btn_login.setText("Login")
+        try:
+            valid, message = future.result()
+        except Exception as e:
+            valid, message = False, f"Could not check the login:\n{e}"
 
         if valid:
             QMessageBox.information(self, "Success", f"{self.role} logged in successfully!")
-            self.open_dashboard_callback(self.role, username)
+            self.open_dashboard_callback(self.role, self.login_username)
             self.close()
         else:
-            QMessageBox.critical(self, "Login Failed", "Invalid username or password.")
+            self.password_input.clear()
+            self.password_input.setFocus()
+            QMessageBox.critical(self, "Login Failed", message)
 
     def handle_back(self):
         self.close()
@@ -8,10 +8,12 @@ from PyQt5.QtCore import Qt
 from datetime import datetime
 from .student_search_dialog import StudentSearchDialog
 from core.due_operations import get_unpaid_dues_for_student, make_payment
-from core.utils import show_warning
+from core.prefetch import get_prefetched
+from .utils import show_warning
 
 from PyQt5.QtPrintSupport import QPrintDialog, QPrinter
-from PyQt5.QtGui import QPainter, QFont, QColor
+from PyQt5.QtGui import QFont
+from .receipt import get_receipt_queue, has_default_printer
 
 class MakePaymentWidget(QWidget):
     """
@@ -101,7 +103,7 @@ class MakePaymentWidget(QWidget):
 
     def open_student_search(self):
         """Opens the search dialog and retrieves the selected student."""
-        dialog = StudentSearchDialog(self)
+        dialog = StudentSearchDialog(self, prefetch_kinds=("unpaid_dues",))
         if dialog.exec_() == QDialog.Accepted:
             student_id, student_name = dialog.get_selected_student()
             if student_id:
@@ -109,14 +111,21 @@ class MakePaymentWidget(QWidget):
                 self.selected_student_name = student_name
                 self.student_id_label.setText(str(student_id))
                 self.student_name_label.setText(student_name)
-                self.load_unpaid_dues()
+                self.load_unpaid_dues(use_prefetch=True)
 
-    def load_unpaid_dues(self):
-        """Loads the unpaid dues for the selected student into the table."""
+    def load_unpaid_dues(self, use_prefetch=False):
+        """
+        Loads the unpaid dues for the selected student into the table.
+        use_prefetch takes the dues loaded while the student was selected
+        in the search dialog (refreshes after a payment query afresh).
+        """
         if not self.selected_student_id:
             return
             
-        dues = get_unpaid_dues_for_student(self.selected_student_id)
+        if use_prefetch:
+            dues = get_prefetched("unpaid_dues", self.selected_student_id)
+        else:
+            dues = get_unpaid_dues_for_student(self.selected_student_id)
         self.dues_table.setRowCount(0) # Clear table
         
         if not dues:
@@ -130,12 +139,12 @@ class MakePaymentWidget(QWidget):
         
         for row, due in enumerate(dues):
             self.dues_table.insertRow(row)
-            self.dues_table.setItem(row, 0, QTableWidgetItem(str(due['pending_due_id'])))
-            self.dues_table.setItem(row, 1, QTableWidgetItem(due['due_type']))
-            self.dues_table.setItem(row, 2, QTableWidgetItem(f"{due['amount_due']:.2f}"))
-            self.dues_table.setItem(row, 3, QTableWidgetItem(f"{due['total_paid']:.2f}"))
-            self.dues_table.setItem(row, 4, QTableWidgetItem(f"{due['amount_remaining']:.2f}"))
-            self.dues_table.setItem(row, 5, QTableWidgetItem(due['due_date']))
+            self.dues_table.setItem(row, 0, QTableWidgetItem(str(due.pending_due_id)))
+            self.dues_table.setItem(row, 1, QTableWidgetItem(due.due_type))
+            self.dues_table.setItem(row, 2, QTableWidgetItem(f"{due.amount_due:.2f}"))
+            self.dues_table.setItem(row, 3, QTableWidgetItem(f"{due.total_paid:.2f}"))
+            self.dues_table.setItem(row, 4, QTableWidgetItem(f"{due.amount_remaining:.2f}"))
+            self.dues_table.setItem(row, 5, QTableWidgetItem(due.due_date))
         
         self.dues_table.resizeColumnsToContents()
 
@@ -158,8 +167,6 @@ class MakePaymentWidget(QWidget):
         payment_mode = self.payment_mode_combo.currentText()
         # --- FIX: Generate timestamp on click ---
         payment_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        due_type = self.dues_table.item(self.dues_table.currentRow(), 1).text()
 
         # --- Validation ---
         if not self.selected_pending_due_id:
@@ -195,18 +202,7 @@ class MakePaymentWidget(QWidget):
         if success:
             QMessageBox.information(self, "Success", f"Payment of {amount_to_pay:.2f} recorded. New status: {message.title()}")
             
-            receipt_details = {
-                "receipt_id": new_payment_id,
-                "student_name": self.student_name_label.text(),
-                "student_id": self.student_id_label.text(),
-                "payment_timestamp": payment_timestamp, # Pass the generated timestamp
-                "amount_paid": amount_to_pay,
-                "payment_mode": payment_mode,
-                "due_type": due_type,
-                "amount_remaining": self.selected_amount_remaining - amount_to_pay,
-                "received_by": self.received_by_user
-            }
-            self.prompt_to_print_receipt(receipt_details)
+            self.prompt_to_print_receipt(new_payment_id)
             
             # Refresh
             self.load_unpaid_dues()
@@ -216,108 +212,25 @@ class MakePaymentWidget(QWidget):
         else:
             QMessageBox.critical(self, "Payment Failed", f"The payment could not be recorded:\n{message}")
 
-    def prompt_to_print_receipt(self, details):
+    def prompt_to_print_receipt(self, payment_id):
         reply = QMessageBox.question(self, "Print Receipt",
-            f"Payment successful. Do you want to print a receipt (ID: {details['receipt_id']})?",
+            f"Payment successful. Do you want to print a receipt (ID: {payment_id})?",
             QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
             
         if reply == QMessageBox.Yes:
-            self.print_receipt(details)
+            self.print_receipt(payment_id)
 
-    def print_receipt(self, details):
+    def print_receipt(self, payment_id):
         """
-        Opens a QPrintDialog and prints a formatted receipt.
+        Queues the receipt on the background receipt queue (ui/receipt.py)
+        for the default printer; a printer is only asked for when there is
+        no default one.
         """
-        printer = QPrinter(QPrinter.HighResolution)
-        dialog = QPrintDialog(printer, self)
-        
-        if dialog.exec_() == QDialog.Accepted:
-            painter = QPainter()
-            painter.begin(printer)
-            
-            title_font = QFont("Arial", 14, QFont.Bold)
-            header_font = QFont("Arial", 10, QFont.Bold)
-            body_font = QFont("Arial", 10)
-            
-            y_pos = 1000 
-            
-            painter.setFont(title_font)
-            painter.drawText(1000, y_pos, "School Management System")
-            y_pos += 300
-            
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "OFFICIAL PAYMENT RECEIPT")
-            y_pos += 200
-            
-            painter.setPen(QColor(Qt.black))
-            painter.drawLine(1000, y_pos, 7000, y_pos)
-            y_pos += 200
-            
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "Receipt ID:")
-            painter.setFont(body_font)
-            painter.drawText(3000, y_pos, str(details['receipt_id']))
-            y_pos += 200
-
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "Payment Date/Time:")
-            painter.setFont(body_font)
-            painter.drawText(3000, y_pos, details['payment_timestamp'])
-            y_pos += 200
-
-            painter.drawLine(1000, y_pos, 7000, y_pos)
-            y_pos += 200
-            
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "Student ID:")
-            painter.setFont(body_font)
-            painter.drawText(3000, y_pos, details['student_id'])
-            y_pos += 200
-            
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "Student Name:")
-            painter.setFont(body_font)
-            painter.drawText(3000, y_pos, details['student_name'])
-            y_pos += 200
-            
-            painter.drawLine(1000, y_pos, 7000, y_pos)
-            y_pos += 200
-
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "Payment For:")
-            painter.setFont(body_font)
-            painter.drawText(3000, y_pos, details['due_type'])
-            y_pos += 200
-            
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "Payment Mode:")
-            painter.setFont(body_font)
-            painter.drawText(3000, y_pos, details['payment_mode'])
-            y_pos += 200
-            
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "Received By:")
-            painter.setFont(body_font)
-            painter.drawText(3000, y_pos, details['received_by'])
-            y_pos += 200
-            
-            y_pos += 200 # Extra space
-            
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "Amount Paid:")
-            painter.setFont(body_font)
-            painter.drawText(3000, y_pos, f"{details['amount_paid']:.2f}")
-            y_pos += 200
-            
-            painter.setFont(header_font)
-            painter.drawText(1000, y_pos, "Amount Remaining on this Due:")
-            painter.setFont(body_font)
-            painter.drawText(3000, y_pos, f"{details['amount_remaining']:.2f}")
-            y_pos += 400
-            
-            painter.setFont(body_font)
-            painter.drawText(1000, y_pos, "Thank you for your payment.")
-            
-            painter.end()
-        else:
-            QMessageBox.warning(self, "Print Cancelled", "The receipt was not printed.")
\ No newline at end of file
+        printer_name = None
+        if not has_default_printer():
+            printer = QPrinter(QPrinter.HighResolution)
+            if QPrintDialog(printer, self).exec_() != QDialog.Accepted:
+                QMessageBox.warning(self, "Print Cancelled", "The receipt was not printed.")
+                return
+            printer_name = printer.printerName()
+        get_receipt_queue().print_payments([payment_id], printer_name)
@@ -1,24 +1,33 @@
 # SMS/ui/payment_history_widget.py
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QPushButton, QTreeWidget, 
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget, 
     QTreeWidgetItem, QAbstractItemView, QGroupBox, QFormLayout, QDialog,
-    QHeaderView
+    QHeaderView, QDateEdit, QFileDialog
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QDate, QTimer
 from PyQt5.QtGui import QFont
 from .student_search_dialog import StudentSearchDialog
-from core.due_operations import get_all_student_dues_with_summary, get_payments_for_due
+from core.due_operations import get_payments_for_due
+from core.prefetch import get_prefetched
+from .receipt import get_receipt_queue
 
 class PaymentHistoryWidget(QWidget):
     """
     A widget to find a student and display their complete payment history
-    grouped by due, with installments shown as children.
+    grouped by due, with installments shown as children. A selected
+    installment's receipt can be reprinted, and a whole day's receipts
+    printed or saved as one PDF (both on the background receipt queue).
     """
     def __init__(self, parent=None):
         super().__init__(parent)
         self.selected_student_id = None
         self.selected_student_name = None
         self.DUE_ID_ROLE = Qt.UserRole + 1 # Role to store the pending_due_id
+        self.PAYMENT_ID_ROLE = Qt.UserRole + 2 # Role to store an installment's payment_record id
+        self.receipt_jobs = [] # (future, description) of queued receipt jobs
+        self.job_timer = QTimer(self)
+        self.job_timer.setInterval(200)
+        self.job_timer.timeout.connect(self.check_receipt_jobs)
         self.init_ui()
 
     def init_ui(self):
@@ -60,16 +69,42 @@ class PaymentHistoryWidget(QWidget):
         self.history_tree.header().setSectionResizeMode(6, QHeaderView.Stretch)
         
         history_layout.addWidget(self.history_tree)
+        self.reprint_btn = QPushButton("Reprint Receipt")
+        self.reprint_btn.setObjectName("secondaryButton")
+        self.reprint_btn.setEnabled(False)
+        self.reprint_btn.clicked.connect(self.handle_reprint)
+        history_layout.addWidget(self.reprint_btn)
         history_group.setLayout(history_layout)
         main_layout.addWidget(history_group, 1) # Give tree more space
         
         self.history_tree.itemExpanded.connect(self.on_due_expand)
+        self.history_tree.currentItemChanged.connect(self.on_item_changed)
         
         history_group.setEnabled(False)
 
+        # --- 3. Day's Receipts Group ---
+        day_group = QGroupBox("3. Receipts of a Day")
+        day_layout = QHBoxLayout()
+        self.day_edit = QDateEdit(QDate.currentDate())
+        self.day_edit.setCalendarPopup(True)
+        self.day_edit.setDisplayFormat("yyyy-MM-dd")
+        self.print_day_btn = QPushButton("Print All")
+        self.print_day_btn.setObjectName("secondaryButton")
+        self.print_day_btn.clicked.connect(self.handle_print_day)
+        self.pdf_day_btn = QPushButton("Save as PDF...")
+        self.pdf_day_btn.setObjectName("secondaryButton")
+        self.pdf_day_btn.clicked.connect(self.handle_pdf_day)
+        self.receipt_status_label = QLabel("")
+        day_layout.addWidget(self.day_edit)
+        day_layout.addWidget(self.print_day_btn)
+        day_layout.addWidget(self.pdf_day_btn)
+        day_layout.addWidget(self.receipt_status_label, 1)
+        day_group.setLayout(day_layout)
+        main_layout.addWidget(day_group)
+
     def open_student_search(self):
         """Opens the search dialog and retrieves the selected student."""
-        dialog = StudentSearchDialog(self)
+        dialog = StudentSearchDialog(self, prefetch_kinds=("dues_summary",))
         if dialog.exec_() == QDialog.Accepted:
             student_id, student_name = dialog.get_selected_student()
             if student_id:
@@ -81,11 +116,11 @@ class PaymentHistoryWidget(QWidget):
                 self.load_dues_summary()
 
     def load_dues_summary(self):
-        """Loads the summary of all dues for the selected student."""
+        """Loads the summary of all dues for the selected student (prefetched while it was selected)."""
         if not self.selected_student_id:
             return
             
-        dues_summary = get_all_student_dues_with_summary(self.selected_student_id)
+        dues_summary = get_prefetched("dues_summary", self.selected_student_id)
         self.history_tree.clear() # Clear tree
         
         if not dues_summary:
@@ -100,18 +135,18 @@ class PaymentHistoryWidget(QWidget):
             due_item = QTreeWidgetItem(self.history_tree)
             due_item.setFont(0, bold_font)
             
-            status = due['status'].title()
+            status = due.status.title()
             if status != "Paid":
                 status = "Uncompleted"
             
-            due_item.setText(0, due['due_type'])
-            due_item.setText(1, due['due_date'])
+            due_item.setText(0, due.due_type)
+            due_item.setText(1, due.due_date)
             due_item.setText(2, status)
-            due_item.setText(3, f"{due['amount_due']:.2f}")
-            due_item.setText(4, f"{due['total_paid']:.2f}")
-            due_item.setText(5, f"{due['amount_remaining']:.2f}")
+            due_item.setText(3, f"{due.amount_due:.2f}")
+            due_item.setText(4, f"{due.total_paid:.2f}")
+            due_item.setText(5, f"{due.amount_remaining:.2f}")
             
-            due_item.setData(0, self.DUE_ID_ROLE, due['pending_due_id'])
+            due_item.setData(0, self.DUE_ID_ROLE, due.pending_due_id)
             
             placeholder = QTreeWidgetItem(due_item, ["Loading installments..."])
             placeholder.setDisabled(True)
@@ -164,7 +199,7 @@ class PaymentHistoryWidget(QWidget):
             child = QTreeWidgetItem(item)
             
             # --- FIX: Split timestamp into date and time ---
-            timestamp_str = payment['payment_timestamp']
+            timestamp_str = payment.payment_timestamp
             payment_date = "N/A"
             payment_time = "N/A"
             if timestamp_str:
@@ -179,6 +214,45 @@ class PaymentHistoryWidget(QWidget):
             child.setText(0, f"  Installment {i + 1}")
             child.setText(1, payment_date)
             child.setText(2, payment_time) # <-- NEW DATA
-            child.setText(3, f"{payment['amount_paid']:.2f}")
-            child.setText(4, payment['payment_mode'])
-            child.setText(5, payment['received_by_user'])
\ No newline at end of file
+            child.setText(3, f"{payment.amount_paid:.2f}")
+            child.setText(4, payment.payment_mode)
+            child.setText(5, payment.received_by_user)
+            child.setData(0, self.PAYMENT_ID_ROLE, payment.payment_id)
+
+    def on_item_changed(self, current, previous):
+        self.reprint_btn.setEnabled(current is not None and current.data(0, self.PAYMENT_ID_ROLE) is not None)
+
+    def handle_reprint(self):
+        item = self.history_tree.currentItem()
+        payment_id = item.data(0, self.PAYMENT_ID_ROLE) if item else None
+        if payment_id is None:
+            return
+        self.queue_receipt_job(get_receipt_queue().print_payments([payment_id]), f"Receipt {payment_id}")
+
+    def handle_print_day(self):
+        day = self.day_edit.date().toString("yyyy-MM-dd")
+        self.queue_receipt_job(get_receipt_queue().print_day(day), f"Receipts of {day}")
+
+    def handle_pdf_day(self):
+        day = self.day_edit.date().toString("yyyy-MM-dd")
+        path, _ = QFileDialog.getSaveFileName(self, "Save Receipts", f"receipts-{day}.pdf", "PDF Files (*.pdf)")
+        if path:
+            self.queue_receipt_job(get_receipt_queue().pdf_day(day, path), f"Receipts of {day}")
+
+    def queue_receipt_job(self, future, description):
+        self.receipt_jobs.append((future, description))
+        self.receipt_status_label.setText(f"{description}: queued...")
+        self.job_timer.start()
+
+    def check_receipt_jobs(self):
+        """Reports finished receipt jobs (polled, as they finish on the queue's thread)."""
+        for future, description in [job for job in self.receipt_jobs if job[0].done()]:
+            self.receipt_jobs.remove((future, description))
+            try:
+                pages = future.result()
+                self.receipt_status_label.setText(
+                    f"{description}: {pages} page(s) done." if pages else f"{description}: no receipts found.")
+            except Exception as e:
+                self.receipt_status_label.setText(f"{description}: failed ({e}).")
+        if not self.receipt_jobs:
+            self.job_timer.stop()
@@ -0,0 +1,220 @@
+# SMS/ui/receipt.py
+"""
+Receipt rendering engine and background print queue.
+
+A receipt is laid out once, in RECEIPT_LAYOUT, on a virtual page of
+LAYOUT_DPI units per inch (fonts are sized in those units too, so the
+layout scales to any device). Everything that is the same on every
+receipt - titles, labels, rules - is recorded once into a QPicture (the
+cached template); rendering a receipt replays it and draws only the
+field values. Rendering works on any paint device and needs no window:
+QPdfWriter (render_receipts_pdf), QImage (render_receipt_image) or a
+QPrinter (print_receipts).
+
+ReceiptQueue runs print and PDF jobs on a worker thread, so printing
+neither waits for a dialog nor blocks the GUI. Reprints load the
+receipt by payment_record id and batches a whole day's receipts
+(core.due_operations.get_receipts / get_receipts_for_day). Every job
+counts its pages and render time for get_receipt_queue_stats().
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from functools import lru_cache
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QFont, QColor, QImage, QPicture, QPdfWriter, QPageSize, QFontDatabase
+from PyQt5.QtPrintSupport import QPrinter, QPrinterInfo
+from core.due_operations import get_receipts, get_receipts_for_day
+
+LAYOUT_DPI = 1200
+# The receipt's area of the page, in layout units (inches * LAYOUT_DPI)
+RECEIPT_WIDTH = 8000
+RECEIPT_HEIGHT = 5200
+
+# Font sizes are given in points and converted to layout units
+FONTS = {"title": ("Arial", 14, True), "header": ("Arial", 10, True), "body": ("Arial", 10, False)}
+
+# ("text", font, x, y, text) and ("line", y) are drawn into the template;
+# ("field", y, label, key, format) draws the label into the template and
+# the receipt's value at VALUE_X when each receipt is rendered.
+LABEL_X = 1000
+VALUE_X = 3000
+RULE_END_X = 7000
+RECEIPT_LAYOUT = (
+    ("text", "title", LABEL_X, 1000, "School Management System"),
+    ("text", "header", LABEL_X, 1300, "OFFICIAL PAYMENT RECEIPT"),
+    ("line", 1500),
+    ("field", 1700, "Receipt ID:", "receipt_id", "{}"),
+    ("field", 1900, "Payment Date/Time:", "payment_timestamp", "{}"),
+    ("line", 2100),
+    ("field", 2300, "Student ID:", "student_id", "{}"),
+    ("field", 2500, "Student Name:", "student_name", "{}"),
+    ("line", 2700),
+    ("field", 2900, "Payment For:", "due_type", "{}"),
+    ("field", 3100, "Payment Mode:", "payment_mode", "{}"),
+    ("field", 3300, "Received By:", "received_by", "{}"),
+    ("field", 3700, "Amount Paid:", "amount_paid", "{:.2f}"),
+    ("field", 3900, "Amount Remaining on this Due:", "amount_remaining", "{:.2f}"),
+    ("text", "body", LABEL_X, 4300, "Thank you for your payment."),
+)
+
+def _font(name):
+    family, points, bold = FONTS[name]
+    font = QFont(family)
+    font.setPixelSize(round(points * LAYOUT_DPI / 72))
+    font.setBold(bold)
+    return font
+
+@lru_cache(maxsize=1)
+def _template():
+    """The static part of RECEIPT_LAYOUT as a QPicture, recorded on first use."""
+    picture = QPicture()
+    painter = QPainter(picture)
+    painter.setPen(QColor(Qt.black))
+    for item in RECEIPT_LAYOUT:
+        if item[0] == "text":
+            _, font, x, y, text = item
+            painter.setFont(_font(font))
+            painter.drawText(x, y, text)
+        elif item[0] == "line":
+            painter.drawLine(LABEL_X, item[1], RULE_END_X, item[1])
+        else:
+            painter.setFont(_font("header"))
+            painter.drawText(LABEL_X, item[1], item[2])
+    painter.end()
+    return picture
+
+@lru_cache(maxsize=1)
+def _fields():
+    """(y, key, format) of every field, and the font their values are drawn in."""
+    return [(item[1], item[3], item[4]) for item in RECEIPT_LAYOUT if item[0] == "field"], _font("body")
+
+def paint_receipt(painter, receipt, dpi):
+    """
+    Draws one receipt (a ReceiptRecord, or a dict with the same keys) with
+    painter, whose device has dpi dots per inch, at the painter's origin.
+    """
+    fields, body_font = _fields()
+    painter.save()
+    painter.scale(dpi / LAYOUT_DPI, dpi / LAYOUT_DPI)
+    painter.drawPicture(0, 0, _template())
+    painter.setPen(QColor(Qt.black))
+    painter.setFont(body_font)
+    for y, key, fmt in fields:
+        painter.drawText(VALUE_X, y, fmt.format(receipt[key]))
+    painter.restore()
+
+def _paint_pages(device, receipts, new_page):
+    """One receipt per page on a paged device. Returns the number of pages."""
+    painter = QPainter(device)
+    try:
+        for i, receipt in enumerate(receipts):
+            if i:
+                new_page()
+            paint_receipt(painter, receipt, device.logicalDpiX())
+    finally:
+        painter.end()
+    return len(receipts)
+
+def render_receipts_pdf(receipts, path):
+    """Writes receipts to a PDF file, one A4 page each. Returns the number of pages."""
+    writer = QPdfWriter(path)
+    writer.setPageSize(QPageSize(QPageSize.A4))
+    writer.setResolution(LAYOUT_DPI)
+    writer.setTitle("Payment Receipts")
+    return _paint_pages(writer, receipts, writer.newPage)
+
+def render_receipt_image(receipt, dpi=150):
+    """The receipt as a white QImage at dpi (for previews, e-mail or thermal printers)."""
+    scale = dpi / LAYOUT_DPI
+    image = QImage(round(RECEIPT_WIDTH * scale), round(RECEIPT_HEIGHT * scale), QImage.Format_RGB32)
+    image.setDotsPerMeterX(round(dpi / 0.0254))
+    image.setDotsPerMeterY(round(dpi / 0.0254))
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.TextAntialiasing)
+    try:
+        paint_receipt(painter, receipt, dpi)
+    finally:
+        painter.end()
+    return image
+
+def has_default_printer():
+    return not QPrinterInfo.defaultPrinter().isNull()
+
+def print_receipts(receipts, printer_name=None):
+    """Prints receipts, one page each, on printer_name (default: the system default). Returns pages."""
+    printer = QPrinter(QPrinter.HighResolution)
+    if printer_name:
+        printer.setPrinterName(printer_name)
+    printer.setDocName("Payment Receipts")
+    return _paint_pages(printer, receipts, printer.newPage)
+
+class ReceiptQueue:
+    """
+    Print and PDF jobs for receipts, run one at a time on a worker thread.
+    Each method returns a Future of the job's page count. Where the Qt
+    platform can't render text outside the GUI thread, jobs run inline.
+    """
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ReceiptQueue")
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(["jobs", "failed", "pages"], 0)
+        self._render_seconds = 0.0
+
+    def _submit(self, job, *args):
+        if QFontDatabase.supportsThreadedFontRendering():
+            return self._executor.submit(self._run, job, *args)
+        future = Future()
+        try:
+            future.set_result(self._run(job, *args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _run(self, job, load, output, *args):
+        start = time.perf_counter()
+        try:
+            receipts = load()
+            pages = output(receipts, *args) if receipts else 0
+        except Exception as e:
+            print(f"[ERROR] ReceiptQueue {job}: {e}")
+            with self._lock:
+                self._counts["jobs"] += 1
+                self._counts["failed"] += 1
+            raise
+        with self._lock:
+            self._counts["jobs"] += 1
+            self._counts["pages"] += pages
+            self._render_seconds += time.perf_counter() - start
+        return pages
+
+    def print_payments(self, payment_ids, printer_name=None):
+        """Prints (or reprints) the receipts of these payment_record ids."""
+        return self._submit("print", lambda: get_receipts(payment_ids), print_receipts, printer_name)
+
+    def print_day(self, day, printer_name=None):
+        """Prints every receipt of day ("YYYY-MM-DD")."""
+        return self._submit("print_day", lambda: get_receipts_for_day(day), print_receipts, printer_name)
+
+    def pdf_payments(self, payment_ids, path):
+        return self._submit("pdf", lambda: get_receipts(payment_ids), render_receipts_pdf, path)
+
+    def pdf_day(self, day, path):
+        return self._submit("pdf_day", lambda: get_receipts_for_day(day), render_receipts_pdf, path)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts, render_seconds=self._render_seconds)
+        stats["pages_per_second"] = stats["pages"] / stats["render_seconds"] if stats["render_seconds"] else 0.0
+        return stats
+
+_queue = ReceiptQueue()
+
+def get_receipt_queue():
+    return _queue
+
+def get_receipt_queue_stats():
+    """jobs, failed, pages, render_seconds (loading included) and pages_per_second of this session."""
+    return _queue.stats()
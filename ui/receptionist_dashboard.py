@@ -8,7 +8,9 @@ from ui.add_student_widget import AddStudentWidget
 from ui.update_student_widget import UpdateStudentWidget
 from ui.search_student_widget import SearchStudentWidget
 from ui.add_due_widget import AddDueWidget
+from ui.bulk_due_widget import BulkDueWidget
 from ui.make_payment_widget import MakePaymentWidget
+from ui.fast_checkout_widget import FastCheckoutWidget
 from ui.payment_history_widget import PaymentHistoryWidget
 
 class ReceptionistDashboard(QWidget):
@@ -65,9 +67,15 @@ class ReceptionistDashboard(QWidget):
         self.btn_add_due = QPushButton(" Add Manual Due")
         self.btn_add_due.setIcon(self.add_due_icon)
         
+        self.btn_bulk_due = QPushButton(" Bulk Dues")
+        self.btn_bulk_due.setIcon(self.add_due_icon)
+        
         self.btn_make_payment = QPushButton(" Make Payment")
         self.btn_make_payment.setIcon(self.payment_icon)
         
+        self.btn_fast_checkout = QPushButton(" Fast Checkout")
+        self.btn_fast_checkout.setIcon(self.payment_icon)
+        
         self.btn_payment_history = QPushButton(" Payment History")
         self.btn_payment_history.setIcon(self.history_icon)
         
@@ -76,7 +84,8 @@ class ReceptionistDashboard(QWidget):
         
         buttons = [
             self.btn_add_student, self.btn_update_student, self.btn_search_student,
-            self.btn_add_due, self.btn_make_payment, self.btn_payment_history
+            self.btn_add_due, self.btn_bulk_due, self.btn_make_payment, self.btn_fast_checkout,
+            self.btn_payment_history
         ]
         
         sidebar_layout = QVBoxLayout(sidebar)
@@ -117,7 +126,9 @@ class ReceptionistDashboard(QWidget):
         self.btn_update_student.clicked.connect(self.show_update_student)
         self.btn_search_student.clicked.connect(self.show_search_student)
         self.btn_add_due.clicked.connect(self.show_add_due)
+        self.btn_bulk_due.clicked.connect(self.show_bulk_due)
         self.btn_make_payment.clicked.connect(self.show_make_payment)
+        self.btn_fast_checkout.clicked.connect(self.show_fast_checkout)
         self.btn_payment_history.clicked.connect(self.show_payment_history)
         self.btn_logout.clicked.connect(self.handle_logout)
 
@@ -149,11 +160,22 @@ class ReceptionistDashboard(QWidget):
         widget = AddDueWidget()
         self.content_stack_layout.addWidget(widget)
 
+    def show_bulk_due(self):
+        self._clear_content_area()
+        widget = BulkDueWidget()
+        self.content_stack_layout.addWidget(widget)
+
     def show_make_payment(self):
         self._clear_content_area()
         widget = MakePaymentWidget(username=self.username)
         self.content_stack_layout.addWidget(widget)
 
+    def show_fast_checkout(self):
+        self._clear_content_area()
+        widget = FastCheckoutWidget(username=self.username)
+        self.content_stack_layout.addWidget(widget)
+        widget.focus_scan()
+
     def show_payment_history(self):
         self._clear_content_area()
         widget = PaymentHistoryWidget()
@@ -2,25 +2,38 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
     QTreeWidget, QTreeWidgetItem, QAbstractItemView, QMessageBox, QLabel,
-    QHeaderView
+    QHeaderView, QComboBox, QCheckBox
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
-from core.student_operations import search_students
+from core.student_operations import search_students_page, search_students_fuzzy, find_students_by_contact
+from core.prefetch import prefetch_student, DETAILS
 from ui.student_details_window import StudentDetailsWindow 
 
 class SearchStudentWidget(QWidget):
     """
-    A reusable widget for searching students.
+    A reusable widget for searching students, by ID / Family SSN / name or,
+    in "Phone / Email" mode, by a caller's contact (with their siblings).
+    With "Typo-tolerant" checked, name searches also find misspelled names.
+    Selecting or hovering over a student starts loading prefetch_kinds
+    (see core/prefetch.py) for the screen that opens next.
     Double-clicking a student opens a separate details window.
     """
-    def __init__(self, parent=None, enable_double_click=True):
+    MODE_STUDENT = "Student ID, Family SSN or Name"
+    MODE_CONTACT = "Phone / Email"
+
+    def __init__(self, parent=None, enable_double_click=True, prefetch_kinds=DETAILS):
         super().__init__(parent)
         self.STUDENT_ID_ROLE = Qt.UserRole + 1 
         self.STUDENT_DATA_ROLE = Qt.UserRole + 2
         
         self.details_window = None 
         self.enable_double_click = enable_double_click
+        self.prefetch_kinds = prefetch_kinds
+        # Search term and cursor of the next page, for "Load More"
+        self.current_term = None
+        self.next_cursor = None
+        self.total_results = None
         self.init_ui()
         self.init_connections()
 
@@ -28,14 +41,20 @@ class SearchStudentWidget(QWidget):
         main_layout = QVBoxLayout(self)
         
         search_layout = QHBoxLayout()
-        self.search_label = QLabel("Search by Student ID, Family SSN (5 digits), or Name:")
+        self.search_label = QLabel("Search by:")
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems([self.MODE_STUDENT, self.MODE_CONTACT])
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("e.g., '101' or '10001' or 'John Doe'")
+        self.fuzzy_check = QCheckBox("Typo-tolerant")
+        self.fuzzy_check.setToolTip("Find names that are spelled differently, closest first")
         self.search_btn = QPushButton("Search")
         self.search_btn.setObjectName("primaryButton")
 
         search_layout.addWidget(self.search_label)
+        search_layout.addWidget(self.mode_combo)
         search_layout.addWidget(self.search_input, 1) 
+        search_layout.addWidget(self.fuzzy_check)
         search_layout.addWidget(self.search_btn)
         
         self.results_tree = QTreeWidget()
@@ -50,12 +69,27 @@ class SearchStudentWidget(QWidget):
         self.results_tree.setSelectionMode(QAbstractItemView.SingleSelection)
         self.results_tree.setRootIsDecorated(False) 
         
+        more_layout = QHBoxLayout()
+        self.count_label = QLabel("")
+        self.load_more_btn = QPushButton("Load More")
+        self.load_more_btn.setObjectName("secondaryButton")
+        self.load_more_btn.setVisible(False)
+        more_layout.addWidget(self.count_label, 1)
+        more_layout.addWidget(self.load_more_btn)
+        
         main_layout.addLayout(search_layout)
         main_layout.addWidget(self.results_tree)
+        main_layout.addLayout(more_layout)
 
     def init_connections(self):
         self.search_btn.clicked.connect(self.on_search)
         self.search_input.returnPressed.connect(self.on_search)
+        self.load_more_btn.clicked.connect(self.on_load_more)
+        self.mode_combo.currentTextChanged.connect(self.on_mode_changed)
+        if self.prefetch_kinds:
+            self.results_tree.setMouseTracking(True)  # itemEntered fires on hover
+            self.results_tree.itemEntered.connect(self.on_prefetch)
+            self.results_tree.currentItemChanged.connect(self.on_prefetch)
         
         if self.enable_double_click:
             self.results_tree.itemDoubleClicked.connect(self.on_open_details_window) 
@@ -63,17 +97,81 @@ class SearchStudentWidget(QWidget):
     def on_search(self):
         search_term = self.search_input.text().strip()
         self.results_tree.clear() 
+        self.current_term = search_term or None
+        self.next_cursor = None
+        self.total_results = None
+        self.update_page_controls()
         
         if not search_term:
             return
-            
+        if self.mode_combo.currentText() == self.MODE_CONTACT:
+            self.search_by_contact(search_term)
+        elif self.fuzzy_check.isChecked() and not any(ch.isdigit() for ch in search_term):
+            self.search_by_similar_name(search_term)
+        else:
+            self.load_page()
+
+    def on_mode_changed(self, mode):
+        if mode == self.MODE_CONTACT:
+            self.search_input.setPlaceholderText("e.g., '0300-1234567', '+92 300 1234567' or 'parent@mail.com'")
+        else:
+            self.search_input.setPlaceholderText("e.g., '101' or '10001' or 'John Doe'")
+        self.fuzzy_check.setEnabled(mode != self.MODE_CONTACT)
+        self.search_input.setFocus()
+
+    def search_by_contact(self, contact_value):
+        """Shows every student (and sibling) reachable through one phone number or email."""
+        try:
+            results = find_students_by_contact(contact_value)
+        except Exception as e:
+            print(f"Search Error: {e}")
+            QMessageBox.critical(self, "Error", f"An error occurred during search:\n{e}")
+            return
+        self.populate_tree(results)
+        families = {student.family_SSN for student in results}
+        self.count_label.setText(
+            f"{len(results)} student(s) in {len(families)} famil{'y' if len(families) == 1 else 'ies'}"
+            if results else "No student has this phone number or email."
+        )
+
+    def search_by_similar_name(self, name):
+        """Shows the students whose names are closest to name, misspellings included."""
+        try:
+            results = search_students_fuzzy(name)
+        except Exception as e:
+            print(f"Search Error: {e}")
+            QMessageBox.critical(self, "Error", f"An error occurred during search:\n{e}")
+            return
+        self.populate_tree(results)
+        self.count_label.setText(f"{len(results)} closest match(es)" if results else "No similar names found.")
+
+    def on_load_more(self):
+        if self.current_term and self.next_cursor:
+            self.load_page(self.next_cursor)
+
+    def load_page(self, cursor=None):
+        """Fetches one page of results (the first when cursor is None) and appends it."""
         try:
-            results = search_students(search_term)
-            self.populate_tree(results)
+            page = search_students_page(self.current_term, cursor, with_total=cursor is None)
+            if cursor is None:
+                self.total_results = page.total
+            self.next_cursor = page.next_cursor
+            self.populate_tree(page.items)
+            self.update_page_controls()
         except Exception as e:
             print(f"Search Error: {e}")
             QMessageBox.critical(self, "Error", f"An error occurred during search:\n{e}")
 
+    def update_page_controls(self):
+        shown = self.results_tree.topLevelItemCount()
+        if self.current_term is None:
+            self.count_label.setText("")
+        elif self.total_results is not None:
+            self.count_label.setText(f"Showing {shown} of {self.total_results}")
+        else:
+            self.count_label.setText(f"Showing {shown}")
+        self.load_more_btn.setVisible(self.next_cursor is not None)
+
     def populate_tree(self, results):
         if not results:
             return 
@@ -81,25 +179,32 @@ class SearchStudentWidget(QWidget):
         for student_data in results:
             item = QTreeWidgetItem(self.results_tree)
             
-            item.setText(0, str(student_data['student_id']))
-            item.setText(1, student_data['full_name'])
-            item.setText(2, student_data['class'])
-            item.setText(3, student_data.get('family_name', 'N/A'))
-            item.setText(4, student_data.get('family_SSN', 'N/A'))
-            item.setText(5, student_data['father_name'])
-            item.setText(6, student_data['mother_name'])
-            item.setText(7, f"{student_data['monthly_fee']:.2f}")
-            item.setText(8, f"{student_data['annual_fund']:.2f}")
+            item.setText(0, str(student_data.student_id))
+            item.setText(1, student_data.full_name)
+            item.setText(2, student_data.student_class)
+            item.setText(3, student_data.family_name)
+            item.setText(4, student_data.family_SSN)
+            item.setText(5, student_data.father_name)
+            item.setText(6, student_data.mother_name)
+            item.setText(7, f"{student_data.monthly_fee:.2f}")
+            item.setText(8, f"{student_data.annual_fund:.2f}")
             
-            item.setData(0, self.STUDENT_ID_ROLE, student_data['student_id'])
+            item.setData(0, self.STUDENT_ID_ROLE, student_data.student_id)
+            # The StudentSummary record itself (a small tuple, not a dict copy)
             item.setData(0, self.STUDENT_DATA_ROLE, student_data)
             
         for i in range(self.results_tree.columnCount()):
             self.results_tree.resizeColumnToContents(i)
 
+    def on_prefetch(self, item, *_):
+        """Starts loading the next screen's data for the hovered / selected student."""
+        student_id = item.data(0, self.STUDENT_ID_ROLE) if item is not None else None
+        if student_id:
+            prefetch_student(student_id, self.prefetch_kinds)
+
     def on_open_details_window(self, item, column):
         """
-        Passes the whole data dictionary to the details window.
+        Passes the student's StudentSummary record to the details window.
         """
         student_data = item.data(0, self.STUDENT_DATA_ROLE)
         
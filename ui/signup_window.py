@@ -8,9 +8,10 @@ from core.db_receptionist import add_receptionist
 from core.emailer import generate_code, send_code
 # Import reusable utilities
 from core.utils import (
-    show_warning, validate_required_fields, validate_dob_not_current_year,
+    validate_required_fields, validate_dob_not_current_year,
     validate_password_length
 )
+from ui.utils import show_warning
 from datetime import datetime
 
 class SignupWindow(QWidget):
@@ -128,8 +129,11 @@ class SignupWindow(QWidget):
 
     def handle_generate_code(self):
         self.verification_code = generate_code()
-        send_code(self.verification_code)
-        QMessageBox.information(self, "Code Sent", "Verification code sent to admin email.")
+        # Only queued here; the e-mail is sent in the background (core/emailer.py)
+        if send_code(self.verification_code) is None:
+            QMessageBox.critical(self, "Error", "The verification code could not be queued for sending.")
+            return
+        QMessageBox.information(self, "Code Sent", "Verification code is on its way to the admin email.")
 
     def handle_signup(self):
         # Collect inputs into a dictionary
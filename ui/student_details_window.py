@@ -5,8 +5,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
-from core.student_operations import get_student_contacts
-from core.due_operations import get_unpaid_dues_for_student
+# Contacts and dues were usually prefetched when the student was selected
+from core.prefetch import get_prefetched
 
 class StudentDetailsWindow(QWidget):
     """
@@ -140,7 +140,7 @@ class StudentDetailsWindow(QWidget):
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
 
-        contacts = get_student_contacts(self.student_id)
+        contacts = get_prefetched("contacts", self.student_id)
         table.setRowCount(len(contacts))
         
         if not contacts:
@@ -151,9 +151,9 @@ class StudentDetailsWindow(QWidget):
              table.setSpan(0, 0, 1, 3)
         else:
             for row, contact in enumerate(contacts):
-                contact_type = contact.get('type')
-                contact_label = contact.get('label')
-                contact_value = contact.get('value')
+                contact_type = contact.type
+                contact_label = contact.label
+                contact_value = contact.value
                 display_type = (contact_type or "N/A").title()
                 display_label = (contact_label or "N/A").title()
                 display_value = contact_value or "N/A"
@@ -174,7 +174,7 @@ class StudentDetailsWindow(QWidget):
         table.setAlternatingRowColors(True)
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         
-        dues = get_unpaid_dues_for_student(self.student_id)
+        dues = get_prefetched("unpaid_dues", self.student_id)
         table.setRowCount(len(dues))
 
         if not dues:
@@ -185,12 +185,12 @@ class StudentDetailsWindow(QWidget):
             table.setSpan(0, 0, 1, 6)
         else:
             for row, due in enumerate(dues):
-                due_type = due.get('due_type')
-                amount = due.get('amount_due', 0.0)
-                total_paid = due.get('total_paid', 0.0)
-                amount_remaining = due.get('amount_remaining', 0.0)
-                due_date = due.get('due_date')
-                status = due.get('status')
+                due_type = due.due_type
+                amount = due.amount_due
+                total_paid = due.total_paid
+                amount_remaining = due.amount_remaining
+                due_date = due.due_date
+                status = due.status
                 
                 display_type = (due_type or "N/A").title()
                 display_amount = f"{amount:.2f}"
@@ -3,13 +3,15 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QDialogButtonBox
 )
 from .search_student_widget import SearchStudentWidget # Import the widget
+from core.prefetch import DETAILS
 
 class StudentSearchDialog(QDialog):
     """
     A reusable dialog window that contains the SearchStudentWidget
-    and returns a selected student.
+    and returns a selected student. prefetch_kinds names what the caller
+    loads for the chosen student (see core/prefetch.py).
     """
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, prefetch_kinds=DETAILS):
         super().__init__(parent)
         self.setWindowTitle("Search and Select Student")
         self.setMinimumSize(700, 500) # Set a good default size
@@ -21,7 +23,7 @@ class StudentSearchDialog(QDialog):
         # --- Search Widget ---
         # We pass enable_double_click=False so double-clicking doesn't
         # open *another* details window from here.
-        self.search_widget = SearchStudentWidget(enable_double_click=False)
+        self.search_widget = SearchStudentWidget(enable_double_click=False, prefetch_kinds=prefetch_kinds)
         main_layout.addWidget(self.search_widget)
         
         # --- Buttons ---
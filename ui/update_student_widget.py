@@ -5,7 +5,7 @@ from PyQt5.QtWidgets import (
 from .add_student_form import StudentFormWidget # <-- Import the refactored form
 from .search_student_widget import SearchStudentWidget
 from core.student_operations import get_student_details_by_id, update_student
-from core.utils import show_warning
+from .utils import show_warning
 
 class UpdateStudentWidget(QWidget):
     """
@@ -0,0 +1,6 @@
+# SMS/ui/utils.py
+from PyQt5.QtWidgets import QMessageBox
+
+def show_warning(parent, title, message):
+    """A reusable wrapper for QMessageBox.warning."""
+    QMessageBox.warning(parent, title, message)
@@ -8,13 +8,11 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 from ui.signup_window import SignupWindow
 from ui.receptionist_dashboard import ReceptionistDashboard
+from ui.admin_dashboard import AdminDashboard
 from ui.login_window import LoginWindow 
 from core.db_init import initialize_db
-
-# --- Add this to fix the path for importing from the 'scripts' folder ---
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from scripts.add_monthly_fees import add_monthly_fees_for_all_students
-# --- End of new imports ---
+from core.scheduler import get_scheduler
+from core.emailer import get_email_sender
 
 class WelcomeWindow(QWidget):
     def __init__(self):
@@ -36,12 +34,14 @@ class WelcomeWindow(QWidget):
 
     def run_automated_tasks(self):
         """
-        Runs any automated tasks, like checking for monthly fee generation.
+        Starts the background job scheduler (monthly fees, annual fund, ...).
+        Jobs run off the GUI thread; if several desks are open, only the one
+        holding a job's lease runs it, and missed months are caught up.
+        Also starts the e-mail sender, which sends what is left in the outbox.
         """
-        print("Checking for automated tasks...")
-        # This function is safe to call daily.
-        # It has its own internal checks for the date and to prevent duplicates.
-        add_monthly_fees_for_all_students()
+        print("Starting background job scheduler...")
+        get_scheduler().start()
+        get_email_sender().start()
 
     def init_ui(self):
         # ... (rest of the file is unchanged) ...
@@ -95,8 +95,8 @@ class WelcomeWindow(QWidget):
 
     def open_dashboard(self, role, username):
         if role == "Admin":
-            QMessageBox.information(self, "Admin Dashboard", f"Welcome Admin {username}!")
-            self.show()
+            self.dashboard_window = AdminDashboard(username, self.show)
+            self.dashboard_window.show()
         else:
             self.dashboard_window = ReceptionistDashboard(username, self.show)
             self.dashboard_window.show()
\ No newline at end of file